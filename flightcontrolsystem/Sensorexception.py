@@ -1,4 +1,12 @@
 class SensorException(Exception):
     """This is the sensor exception for handling 
-    sensor errors"""
-    pass
+    sensor errors.  source is the dash pair, rule the check it failed,
+    value the reading and tick the tick it happened on, see validation.py"""
+
+    def __init__(self, message:str, source:str=None, rule:str=None, value:float=None,
+                 tick:int=None) -> None:
+        super().__init__(message)
+        self.source = source
+        self.rule = rule
+        self.value = value
+        self.tick = tick
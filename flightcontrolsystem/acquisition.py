@@ -0,0 +1,330 @@
+""" Asynchronous sensor acquisition.
+Every device is polled by its own asyncio task on one background event
+loop, so a slow device only holds up itself and reading all of them
+takes as long as the slowest one, not the sum.  Each channel keeps the
+last good sample and the simulation tick reads those with latest(),
+it never waits on a device.
+
+A source is anything with an async read(values, dt), dt being the
+miliseconds since its last poll.  SimSource wraps the existing sensors
+and their simulators, UdpSource asks a device over UDP and
+StandInDevices emulates the devices on a local UDP port """
+import asyncio
+import threading
+import time
+from typing import NamedTuple
+from sensors import Sensors
+
+TIMEOUT = 0.05 #seconds a device has to answer before its last good value is used
+
+
+class Sample(NamedTuple):
+    """the last good value of a channel, stamp is time.monotonic() when
+    it was read and misses counts the polls since then that failed"""
+    value: float
+    stamp: float
+    misses: int
+
+
+class ChannelStats(NamedTuple):
+    """polls, timeouts and errors of one channel, latency is the
+    slowest good read in milliseconds"""
+    name: str
+    polls: int
+    timeouts: int
+    errors: int
+    latency_max: float
+
+
+class SimSource:
+    """a sensor attached to its simulator, the way build_dash makes them.
+    The simulators are stepped off the event loop, under lock so a read
+    never runs while the cockpit is changing them"""
+
+    def __init__(self, sensor:Sensors, lock) -> None:
+        self.sensor = sensor
+        self.lock = lock
+
+    async def read(self, values:dict, dt:float=None) -> float:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, values, dt)
+
+    def _read(self, values:dict, dt:float) -> float:
+        with self.lock:
+            return self.sensor.read_sensor(values, dt)
+
+
+class _Client(asyncio.DatagramProtocol):
+    """matches the answers from the devices to the requests by sequence"""
+
+    def __init__(self) -> None:
+        self.pending = {}
+
+    def datagram_received(self, data:bytes, addr) -> None:
+        seq, _, value = data.partition(b' ')
+        future = self.pending.pop(int(seq), None)
+        if future is not None and not future.done():
+            future.set_result(float(value))
+
+
+class UdpSource:
+    """a device at address that answers "seq name throttle1 throttle2"
+    with "seq value".  Every source on a loop shares one socket"""
+
+    _clients = {} #event loop -> (transport, _Client)
+    _seq = 0
+
+    def __init__(self, name:str, address:tuple) -> None:
+        self.name = name
+        self.address = address
+
+    @classmethod
+    async def _client(cls) -> tuple:
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None:
+            client = cls._clients[loop] = await loop.create_datagram_endpoint(_Client, local_addr=('127.0.0.1', 0))
+        return client
+
+    async def read(self, values:dict, dt:float=None) -> float:
+        # the device keeps its own time, dt is not sent
+        transport, client = await self._client()
+        UdpSource._seq += 1
+        seq = UdpSource._seq
+        future = client.pending[seq] = asyncio.get_running_loop().create_future()
+        request = f'{seq} {self.name} {values["-THR1-"]} {values["-THR2-"]}'
+        transport.sendto(request.encode(), self.address)
+        try:
+            return await future
+        finally:
+            client.pending.pop(seq, None)
+
+    @classmethod
+    def close(cls) -> None:
+        """closes the socket of the running loop"""
+        client = cls._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            client[0].close()
+
+
+class StandInDevices(asyncio.DatagramProtocol):
+    """Emulates the tach, temp, fuel, compass and airspeed devices on a
+    UDP port so the acquisition can be run without hardware.  sensors
+    maps a device name to the sensor that makes its readings and latency
+    is an optional delay in seconds for each name, to emulate a slow
+    device"""
+
+    def __init__(self, sensors:dict, latency:dict=None) -> None:
+        self.sensors = sensors
+        self.latency = latency or {}
+        self.transport = None
+        self.requests = 0
+
+    async def start(self, host:str='127.0.0.1', port:int=0) -> tuple:
+        """binds the devices and returns their address"""
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        return self.transport.get_extra_info('sockname')
+
+    def datagram_received(self, data:bytes, addr) -> None:
+        seq, name, thr1, thr2 = data.decode().split()
+        sensor = self.sensors.get(name)
+        if sensor is None:
+            return # an unknown device never answers, like unplugged hardware
+        self.requests += 1
+        value = sensor.read_sensor({'-THR1-': float(thr1), '-THR2-': float(thr2)})
+        reply = f'{seq} {value!r}'.encode()
+        delay = self.latency.get(name, 0)
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self._send, reply, addr)
+        else:
+            self._send(reply, addr)
+
+    def _send(self, reply:bytes, addr) -> None:
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(reply, addr)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+class Channel:
+    """Polls one source every period miliseconds, the Acquisition's when
+    it is None.  A read that takes longer than timeout, or raises, keeps
+    the last good sample"""
+
+    def __init__(self, name:str, source, initVal:float=0.0, timeout:float=TIMEOUT,
+                 period:float=None) -> None:
+        self.name = name
+        self.source = source
+        self.timeout = timeout
+        self.period = period
+        self.sample = Sample(initVal, 0.0, 0)
+        self._polled = None # time.monotonic() of the last poll, for its dt
+        self.polls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latency_max = 0.0
+
+    async def poll(self, values:dict) -> Sample:
+        """one read of the source, the sample is replaced in one
+        assignment so a reader on another thread sees old or new"""
+        self.polls += 1
+        start = time.monotonic()
+        # a poll that timed out may still have stepped its source, so dt
+        # runs from the start of the last poll whatever came of it
+        dt = None if self._polled is None else (start - self._polled) * 1000
+        self._polled = start
+        try:
+            value = await asyncio.wait_for(self.source.read(values, dt), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except Exception:
+            self.errors += 1
+        else:
+            now = time.monotonic()
+            self.latency_max = max(self.latency_max, now - start)
+            self.sample = Sample(value, now, 0)
+            return self.sample
+        last = self.sample
+        self.sample = Sample(last.value, last.stamp, last.misses + 1)
+        return self.sample
+
+    async def run(self, values:dict, period:float) -> None:
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            next_time += period
+            delay = next_time - loop.time()
+            if delay < 0:
+                # a slow read drops the missed polls instead of bursting
+                next_time -= delay // period * period
+                delay = next_time - loop.time()
+            await asyncio.sleep(delay)
+            await self.poll(values)
+
+    def stats(self) -> ChannelStats:
+        return ChannelStats(self.name, self.polls, self.timeouts, self.errors, self.latency_max * 1000)
+
+
+class Acquisition:
+    """Runs the channels on an event loop in a background thread.  values
+    is the dict of control inputs the sources are read with, normally the
+    Cockpit's, and period is the polling rate in milliseconds"""
+
+    def __init__(self, channels:list, values:dict, period:float) -> None:
+        self.channels = channels
+        self.values = values
+        self.period = period
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stop = None
+
+    def start(self) -> None:
+        self._ready.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),),
+                                        name='acquisition', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        #one poll of everything first so latest() never returns a placeholder
+        await asyncio.gather(*(chan.poll(self.values) for chan in self.channels))
+        tasks = [asyncio.create_task(chan.run(self.values, (chan.period or self.period) / 1000))
+                 for chan in self.channels]
+        self._ready.set()
+        await self._stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        UdpSource.close()
+
+    def latest(self) -> tuple:
+        """the last good value of every channel, in channel order"""
+        return tuple(chan.sample.value for chan in self.channels)
+
+    def stale(self, age:float=None) -> list:
+        """names of the channels whose last poll failed, or with age in
+        seconds, whose sample is older than that"""
+        if age is None:
+            return [chan.name for chan in self.channels if chan.sample.misses]
+        oldest = time.monotonic() - age
+        return [chan.name for chan in self.channels if chan.sample.stamp < oldest]
+
+    def stats(self) -> list:
+        return [chan.stats() for chan in self.channels]
+
+
+class AcquiredSensor(Sensors):
+    """Stands in for a sensor in the dash, read_sensor returns the last
+    good sample of its channel without touching the device"""
+
+    def __init__(self, channel:Channel) -> None:
+        super().__init__(None)
+        self.channel = channel
+
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        return self.channel.sample.value
+
+
+def acquire(cockpit, sources:dict=None, timeout:float=TIMEOUT, period:float=None,
+            rates:dict=None) -> Acquisition:
+    """moves the sensors of the cockpit onto an Acquisition.  sources maps
+    a dash name to the source to poll for it, any name left out keeps
+    reading its simulator under the cockpit's lock.  rates maps a dash
+    name to the miliseconds between its polls, like Cockpit.set_rates.
+    The acquisition is returned not started"""
+    import simulations
+    sources = sources or {}
+    rates = rates or {}
+    channels = []
+    for index, (name, (sen, disp)) in enumerate(zip(cockpit.names, cockpit.dash)):
+        source = sources.get(name) or SimSource(sen, cockpit.lock)
+        channel = Channel(name, source, timeout=timeout, period=rates.get(name))
+        channels.append(channel)
+        cockpit.dash[index] = (AcquiredSensor(channel), disp)
+    period = simulations.UPDATE_PERIOD if period is None else period
+    return Acquisition(channels, cockpit.values, period)
+
+
+def stand_in_sources(address:tuple) -> dict:
+    """a UdpSource for every dash pair at address"""
+    from cockpit import DASH_NAMES
+    return {name: UdpSource(name, address) for name in DASH_NAMES}
+
+
+async def serve(host:str, port:int) -> None:
+    """runs the stand-in devices until interrupted"""
+    from cockpit import DASH_NAMES, make_sensor
+    devices = StandInDevices({name: make_sensor(name) for name in DASH_NAMES})
+    address = await devices.start(host, port)
+    print(f'stand-in devices on {address[0]}:{address[1]}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        devices.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='stand-in sensor devices over UDP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5600)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import unittest
+from flightcontrolsystem import acquisition
+from flightcontrolsystem.sensors import Sensors
+from flightcontrolsystem.simulations import Simulator
+
+
+def fixed(value):
+    return Sensors(Simulator('-THR1-', value))
+
+
+class TestChannel(unittest.TestCase):
+    ''' Tests polling one source'''
+
+    def test_timeout_keeps_last_good(self):
+        async def run():
+            devices = acquisition.StandInDevices({'tach1': fixed(3.0)})
+            address = await devices.start()
+            chan = acquisition.Channel('tach1', acquisition.UdpSource('tach1', address), timeout=0.2)
+            values = {'-THR1-': 10, '-THR2-': 10}
+            good = await chan.poll(values)
+            devices.latency['tach1'] = 0.5
+            slow = await chan.poll(values)
+            devices.close()
+            acquisition.UdpSource.close()
+            return good, slow, chan.stats()
+        good, slow, stats = asyncio.run(run())
+        self.assertEqual(good.value, 3.0)
+        self.assertEqual((slow.value, slow.stamp, slow.misses), (3.0, good.stamp, 1))
+        self.assertEqual((stats.polls, stats.timeouts), (2, 1))
+
+    def test_error_keeps_last_good(self):
+        class Broken:
+            async def read(self, values, dt=None):
+                raise OSError('unplugged')
+        chan = acquisition.Channel('fuelL', Broken(), initVal=7.0)
+        sample = asyncio.run(chan.poll({}))
+        self.assertEqual((sample.value, sample.misses, chan.errors), (7.0, 1, 1))
+
+
+class TestSimSource(unittest.TestCase):
+    ''' Tests reading the simulators off the event loop'''
+
+    def test_dt_is_passed(self):
+        class Timed(Sensors):
+            def read_sensor(self, values, dt=None):
+                seen.append(dt)
+                return 1.0
+        seen = []
+        chan = acquisition.Channel('tach1', acquisition.SimSource(Timed(None), threading.Lock()))
+        async def run():
+            await chan.poll({})
+            await asyncio.sleep(0.05)
+            await chan.poll({})
+        asyncio.run(run())
+        self.assertIsNone(seen[0])
+        self.assertGreaterEqual(seen[1], 50)
+
+    def test_read_waits_for_the_lock(self):
+        lock = threading.Lock()
+        chan = acquisition.Channel('tach1', acquisition.SimSource(fixed(3.0), lock), initVal=1.0, timeout=0.05)
+        async def run():
+            # the loop is not blocked, so the read can time out
+            held = await chan.poll({})
+            lock.release()
+            return held
+        lock.acquire()
+        held = asyncio.run(run())
+        self.assertEqual((held.value, chan.timeouts), (1.0, 1))
+        self.assertEqual(asyncio.run(chan.poll({})).value, 3.0)
+
+
+class TestAcquisition(unittest.TestCase):
+    ''' Tests reading many slow devices at once'''
+
+    def test_latencies_do_not_add(self):
+        async def serve(ready, stop, latency):
+            devices = acquisition.StandInDevices({f'dev{i}': fixed(i) for i in range(9)}, latency)
+            ready.append(await devices.start())
+            while not stop:
+                await asyncio.sleep(0.01)
+            devices.close()
+        ready, stop = [], []
+        latency = {f'dev{i}': 0.03 for i in range(9)}
+        server = threading.Thread(target=asyncio.run, args=(serve(ready, stop, latency),))
+        server.start()
+        while not ready:
+            time.sleep(0.01)
+        channels = [acquisition.Channel(f'dev{i}', acquisition.UdpSource(f'dev{i}', ready[0]), timeout=0.2)
+                    for i in range(9)]
+        acq = acquisition.Acquisition(channels, {'-THR1-': 0, '-THR2-': 0}, 50)
+        start = time.monotonic()
+        acq.start()
+        first = time.monotonic() - start
+        self.assertEqual(acq.latest(), tuple(float(i) for i in range(9)))
+        time.sleep(0.3)
+        acq.stop()
+        stop.append(True)
+        server.join()
+        # nine 30 ms devices read one after the other would take 270 ms
+        self.assertLess(first, 0.2)
+        self.assertFalse(acq.running)
+        self.assertEqual(acq.stale(), [])
+        for stats in acq.stats():
+            self.assertGreater(stats.polls, 3)
+            self.assertEqual(stats.timeouts, 0)
+
+    def test_acquire_cockpit(self):
+        from flightcontrolsystem import cockpit
+        pit = cockpit.headless(sims=cockpit.simulations.build())
+        tach = pit.dash[0][0].sim
+        get_data, seen = tach.get_data, []
+        def timed(values, dt=None):
+            seen.append(dt)
+            return get_data(values, dt)
+        tach.get_data = timed
+        acq = acquisition.acquire(pit, period=20, rates={'compass': 100})
+        start = time.monotonic()
+        acq.start()
+        readings = pit.step([('-THR1-', 90), ('-THR2-', 90)])
+        self.assertEqual(readings, acq.latest())
+        self.assertTrue(all(isinstance(sen, acquisition.AcquiredSensor) for sen, _ in pit.dash))
+        time.sleep(0.3)
+        acq.stop()
+        flown = (time.monotonic() - start) * 1000
+        polls = {stats.name: stats.polls for stats in acq.stats()}
+        # every poll steps the simulator by the time since the one before,
+        # so together they cover no more than the time flown and at least
+        # the slots polled, whatever each poll's lateness
+        self.assertEqual(len(seen), polls['tach1'])
+        self.assertIsNone(seen[0])
+        self.assertTrue(all(dt > 0 for dt in seen[1:]), seen)
+        self.assertLess(sum(seen[1:]), flown)
+        self.assertGreater(sum(seen[1:]), (len(seen) - 2) * 20)
+        self.assertLess(polls['compass'] * 3, polls['tach1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
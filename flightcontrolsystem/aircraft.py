@@ -0,0 +1,488 @@
+""" Aircraft profiles.
+A profile is a JSON file, see profiles/, declaring the simulators, the
+instruments (sensor, simulator, scale factors or calibration table,
+display, thresholds, trend range and how often they are read), the
+calibration tables, see calibration.py, the simulators the REFUEL and
+NORTH buttons act on and the frames the instruments are drawn in, so a variant
+cockpit is a new file rather than new code.  load() checks a profile
+and compiles it once into plain tuples laid out the way the
+constructors take them, and keeps that in CACHE_DIR under a hash of the
+file.  Later launches only hash the file and unpickle the result
+
+    python aircraft.py [profile ...]    checks profiles and times loading them
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Callable
+import simulations
+from simulations import DelaySim, AirSpeed, Fuel, Compass
+from sensors import Sensors, Tach_sensor, Tempr_sensor, Fuel_sensor, Compass_sensor, Airspeed_sensor
+from displays import TachBar, Bar, Fuel_Level, CompassDisp, AirspeedDisp
+from noise import NoiseSource, BiasedWalk, Gaussian, Jitter, seed_for
+from cockpit import Cockpit, THROTTLES, CONTROLS, CONTROL_SIMULATORS
+from alerts import AlertBus
+from calibration import compile_tables
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(HERE, 'profiles')
+DEFAULT = os.path.join(PROFILE_DIR, 'default.json')
+CACHE_DIR = os.path.join(HERE, '.aircraft_cache')
+COMPILER_VERSION = 4 #bump when compile_profile() changes what it produces
+
+#simulator kind -> class and the fields it takes, in constructor order.
+#input2 may be null, noisy kinds also take an optional noise
+SIMULATORS = {'DelaySim': (DelaySim, ('input', 'initial', 'low', 'high', 'delay'), True),
+              'AirSpeed': (AirSpeed, ('input', 'initial', 'low', 'high', 'delay', 'input2'), True),
+              'Fuel': (Fuel, ('input', 'initial', 'input2'), False),
+              'Compass': (Compass, ('input', 'initial'), True)}
+
+#noise model -> class and the optional fields it takes
+NOISE = {'BiasedWalk': (BiasedWalk, ('width', 'bias')),
+         'Gaussian': (Gaussian, ('sigma', 'mean')),
+         'Jitter': (Jitter, ('amplitude',))}
+
+#sensor kind -> class, the optional scale factors it takes and whether
+#it takes a calibration table instead
+SENSORS = {'Sensors': (Sensors, (), False),
+           'Tach_sensor': (Tach_sensor, ('scale',), True),
+           'Tempr_sensor': (Tempr_sensor, ('scale', 'offset'), True),
+           'Fuel_sensor': (Fuel_sensor, (), True),
+           'Compass_sensor': (Compass_sensor, (), False),
+           'Airspeed_sensor': (Airspeed_sensor, ('scale',), True)}
+
+#display kind -> class, how many elements it updates and whether it
+#takes limits (and with them messages and hysteresis)
+DISPLAYS = {'TachBar': (TachBar, 1, True),
+            'Bar': (Bar, 1, True),
+            'AirspeedDisp': (AirspeedDisp, 1, True),
+            'Fuel_Level': (Fuel_Level, 1, False),
+            'CompassDisp': (CompassDisp, 2, False)}
+
+#widget kind -> the optional fields it takes, see instrument_frames()
+#in flightcontrol.py
+WIDGETS = {'vbar': (),
+           'hbar': ('label',),
+           'text': ('text', 'size', 'font', 'justification')}
+
+#control button -> the simulator kind it acts on.  A profile names the
+#simulator in controls, CONTROL_SIMULATORS in cockpit.py by default
+CONTROL_KINDS = {'-REFUEL-': 'Fuel', '-NORTH-': 'Compass'}
+
+#keys the rest of the window already uses
+RESERVED_KEYS = THROTTLES + CONTROLS + ('-COMPUTER-', '-LG_DISP-', '-TREND-', '-DIAG-')
+
+
+def _number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Checker:
+    """collects every problem with a profile so they are reported at once"""
+
+    def __init__(self, path:str) -> None:
+        self.path = path
+        self.problems = []
+
+    def fail(self, where:str, message:str) -> None:
+        self.problems.append(f'{where}: {message}')
+
+    def fields(self, where:str, spec:dict, required:tuple, optional:tuple=()) -> bool:
+        """checks spec has every required field and nothing unknown"""
+        ok = True
+        for field in required:
+            if field not in spec:
+                self.fail(where, f'missing {field}')
+                ok = False
+        for field in spec.keys() - set(required) - set(optional):
+            self.fail(where, f'unknown field {field}')
+            ok = False
+        return ok
+
+    def numbers(self, where:str, spec:dict, fields:tuple) -> None:
+        for field in fields:
+            if field in spec and not _number(spec[field]):
+                self.fail(where, f'{field} must be a number')
+
+    def kind(self, where:str, spec, field:str, table:dict) -> bool:
+        """checks spec is an object whose field names an entry of table"""
+        if not isinstance(spec, dict):
+            self.fail(where, 'must be an object')
+            return False
+        value = spec.get(field)
+        if not isinstance(value, str) or value not in table:
+            self.fail(where, f'{field} {value!r} is not one of {", ".join(table)}')
+            return False
+        return True
+
+    def named(self, where:str, value, field:str, table) -> bool:
+        """checks value is a string naming an entry of table, anything
+        else would not even look up"""
+        if not isinstance(value, str):
+            self.fail(where, f'{field} must be a name')
+            return False
+        if value not in table:
+            self.fail(where, f'no {field} called {value!r}')
+            return False
+        return True
+
+    def done(self) -> None:
+        if self.problems:
+            raise ValueError(f'{self.path} is not a valid aircraft profile:\n  ' + '\n  '.join(self.problems))
+
+
+def _compile_noise(check:_Checker, where:str, spec) -> tuple:
+    if not check.kind(where, spec, 'model', NOISE):
+        return None
+    fields = NOISE[spec['model']][1]
+    check.fields(where, spec, ('model',), fields)
+    check.numbers(where, spec, fields)
+    return (spec['model'], {field: spec[field] for field in fields if field in spec})
+
+
+def _compile_simulator(check:_Checker, name:str, spec) -> tuple:
+    where = f'simulators.{name}'
+    if not check.kind(where, spec, 'kind', SIMULATORS):
+        return None
+    _, fields, noisy = SIMULATORS[spec['kind']]
+    if not check.fields(where, spec, ('kind',) + fields, ('noise',) if noisy else ()):
+        return None
+    for field in fields:
+        value = spec[field]
+        if field.startswith('input'):
+            if not (isinstance(value, str) or (field == 'input2' and value is None)):
+                check.fail(where, f'{field} must be a GUI key')
+        elif not _number(value):
+            check.fail(where, f'{field} must be a number')
+    if 'low' in spec and _number(spec['low']) and _number(spec['high']) and spec['low'] >= spec['high']:
+        check.fail(where, 'low must be below high')
+    if 'delay' in spec and _number(spec['delay']) and spec['delay'] <= 0:
+        check.fail(where, 'delay must be positive')
+    noise = _compile_noise(check, f'{where}.noise', spec['noise']) if 'noise' in spec else None
+    return (name, spec['kind'], tuple(spec[field] for field in fields), noise)
+
+
+def _compile_element(check:_Checker, where:str, spec) -> tuple:
+    if not check.kind(where, spec, 'widget', WIDGETS):
+        return None
+    fields = WIDGETS[spec['widget']]
+    if not check.fields(where, spec, ('key', 'widget'), fields):
+        return None
+    if not isinstance(spec['key'], str):
+        check.fail(where, 'key must be a string')
+        return None
+    options = {field: spec[field] for field in fields if field in spec}
+    if 'size' in options:
+        if isinstance(options['size'], list) and len(options['size']) == 2:
+            options['size'] = tuple(options['size'])
+        else:
+            check.fail(where, 'size must be [width, height]')
+    return (spec['key'], spec['widget'], options)
+
+
+def _compile_instrument(check:_Checker, index:int, spec, simulators:dict, frames:set,
+                        calibrations:dict) -> tuple:
+    where = f'instruments[{index}]'
+    if not isinstance(spec, dict):
+        check.fail(where, 'must be an object')
+        return None
+    where = f'instruments.{spec.get("name", index)}'
+    optional = ('scale', 'offset', 'calibration', 'limits', 'messages', 'hysteresis', 'trend', 'rate')
+    if not check.fields(where, spec, ('name', 'sensor', 'simulator', 'display', 'frame', 'elements'), optional):
+        return None
+    name = spec['name']
+    ok = check.kind(where, spec, 'sensor', SENSORS) & check.kind(where, spec, 'display', DISPLAYS)
+    if not isinstance(name, str):
+        check.fail(where, 'name must be a string')
+        ok = False
+    check.named(where, spec['simulator'], 'simulator', simulators)
+    check.named(where, spec['frame'], 'frame', frames)
+    if not ok:
+        return None
+    _, scales, calibrated = SENSORS[spec['sensor']]
+    for field in ('scale', 'offset'):
+        if field in spec and field not in scales:
+            check.fail(where, f'{spec["sensor"]} takes no {field}')
+    table = spec.get('calibration')
+    if table is not None:
+        if not calibrated:
+            check.fail(where, f'{spec["sensor"]} takes no calibration')
+        else:
+            check.named(where, table, 'calibration', calibrations)
+        if 'scale' in spec or 'offset' in spec:
+            check.fail(where, 'a calibration replaces the scale and offset, give one or the other')
+    check.numbers(where, spec, ('scale', 'offset', 'hysteresis', 'rate'))
+    _, keys, limited = DISPLAYS[spec['display']]
+    elements = spec['elements']
+    if not isinstance(elements, list) or len(elements) != keys:
+        check.fail(where, f'{spec["display"]} needs {keys} element{"s" if keys > 1 else ""}')
+        elements = []
+    elements = tuple(_compile_element(check, f'{where}.elements[{i}]', element)
+                     for i, element in enumerate(elements))
+    args = ()
+    kwargs = {}
+    if limited:
+        limits = spec.get('limits')
+        if not (isinstance(limits, list) and len(limits) == 3 and _number(limits[0]) and _number(limits[1])
+                and (limits[2] is None or _number(limits[2]))):
+            check.fail(where, 'limits must be [caution, warn, limit or null]')
+        else:
+            set_limits = [limit for limit in limits if limit is not None]
+            if set_limits != sorted(set_limits):
+                check.fail(where, 'limits must go up')
+            args = tuple(limits)
+            messages = spec.get('messages')
+            if messages is not None:
+                if (not isinstance(messages, list) or len(messages) < len(set_limits) + 1
+                        or not all(isinstance(m, str) for m in messages)):
+                    check.fail(where, f'messages must be {len(set_limits) + 1} strings, one for each band')
+                kwargs['messages'] = tuple(messages)
+            if 'hysteresis' in spec:
+                kwargs['hysteresis'] = spec['hysteresis']
+    else:
+        for field in ('limits', 'messages', 'hysteresis'):
+            if field in spec:
+                check.fail(where, f'{spec["display"]} takes no {field}')
+    trend = spec.get('trend')
+    if trend is not None:
+        if not (isinstance(trend, list) and len(trend) == 2 and all(_number(v) for v in trend)
+                and trend[0] < trend[1]):
+            check.fail(where, 'trend must be [low, high]')
+        trend = tuple(trend)
+    rate = spec.get('rate')
+    if _number(rate) and rate <= 0:
+        check.fail(where, 'rate must be more than 0 miliseconds')
+    sensor_kwargs = {field: spec[field] for field in scales if field in spec}
+    if isinstance(table, str) and table in calibrations:
+        sensor_kwargs['calibration'] = calibrations[table]
+    return (name, spec['sensor'], sensor_kwargs, spec['simulator'], spec['display'], elements,
+            args, kwargs, trend, spec['frame'], rate)
+
+
+def _compile_controls(check:_Checker, spec, simulators:dict) -> dict:
+    """the simulator each of CONTROL_KINDS acts on, every one of them
+    has to have one since the buttons are always in the window"""
+    if not isinstance(spec, dict):
+        check.fail('controls', 'must be an object')
+        spec = {}
+    for key in spec.keys() - CONTROL_KINDS.keys():
+        check.fail('controls', f'{key} is not one of {", ".join(CONTROL_KINDS)}')
+    controls = {}
+    for key, kind in CONTROL_KINDS.items():
+        name = spec.get(key, CONTROL_SIMULATORS[key])
+        sim = simulators.get(name) if isinstance(name, str) else None
+        if sim is None or sim[1] != kind:
+            check.fail('controls', f'{key} needs a {kind} simulator, {name!r} is not one')
+        controls[key] = name
+    return controls
+
+
+def compile_profile(profile:dict, path:str='<profile>') -> tuple:
+    """checks a parsed profile and returns it compiled, raises ValueError
+    listing every problem found"""
+    check = _Checker(path)
+    if not isinstance(profile, dict):
+        check.fail('profile', 'must be an object')
+        check.done()
+    check.fields('profile', profile, ('name', 'frames', 'simulators', 'instruments'),
+                 ('title', 'calibrations', 'controls'))
+    for field in ('name', 'title'):
+        if field in profile and not isinstance(profile[field], str):
+            check.fail('profile', f'{field} must be a string')
+    for field, kind in (('frames', list), ('simulators', dict), ('instruments', list)):
+        if field in profile and not isinstance(profile[field], kind):
+            check.fail(field, f'must be {"a list" if kind is list else "an object"}')
+    check.done()
+
+    frames = {}
+    for index, frame in enumerate(profile['frames']):
+        where = f'frames[{index}]'
+        if not isinstance(frame, dict) or not check.fields(where, frame, ('title',), ('size',)):
+            continue
+        size = frame.get('size')
+        if size is not None and not (isinstance(size, list) and len(size) == 2):
+            check.fail(where, 'size must be [width, height]')
+        if not isinstance(frame['title'], str):
+            check.fail(where, 'title must be a string')
+        elif frame['title'] in frames:
+            check.fail(where, f'a second frame called {frame["title"]!r}')
+        else:
+            frames[frame['title']] = tuple(size) if size else None
+
+    simulators = {name: _compile_simulator(check, name, spec) for name, spec in profile['simulators'].items()}
+    controls = _compile_controls(check, profile.get('controls', {}), simulators)
+
+    try:
+        calibrations = compile_tables(profile.get('calibrations', {}))
+    except ValueError as e:
+        check.fail('calibrations', str(e))
+        calibrations = {}
+
+    instruments = []
+    for index, spec in enumerate(profile['instruments']):
+        instruments.append(_compile_instrument(check, index, spec, simulators, frames, calibrations))
+    names = [inst[0] for inst in instruments if inst is not None]
+    for name in set(names):
+        if names.count(name) > 1:
+            check.fail('instruments', f'{name!r} is used twice')
+    keys = [element[0] for inst in instruments if inst is not None for element in inst[5] if element]
+    for key in set(keys):
+        if keys.count(key) > 1:
+            check.fail('instruments', f'element key {key} is used twice')
+        if key in RESERVED_KEYS:
+            check.fail('instruments', f'element key {key} is used by the window')
+    check.done()
+
+    # each frame holds the elements of its instruments, in instrument order
+    layout = tuple((title, size, tuple(element for inst in instruments if inst[9] == title
+                                       for element in inst[5]))
+                   for title, size in frames.items())
+    return (profile['name'], profile.get('title', profile['name']), tuple(simulators.values()),
+            tuple(instruments), layout, controls)
+
+
+class Aircraft:
+    """A compiled profile.  Nothing in here is checked again, the tuples
+    go straight to the constructors"""
+
+    def __init__(self, digest:str, name:str, title:str, simulators:tuple, instruments:tuple,
+                 frames:tuple, controls:dict) -> None:
+        self.digest = digest
+        self.name = name
+        self.title = title
+        self.simulators = simulators
+        self.instruments = instruments
+        self.frames = frames # (title, size, ((key, widget, options), ...))
+        self.controls = controls # control key -> simulator name, see Cockpit
+        self.names = tuple(inst[0] for inst in instruments)
+        self.trends = {inst[0]: inst[8] for inst in instruments if inst[8] is not None}
+        self.rates = {inst[0]: inst[10] for inst in instruments if inst[10] is not None} # see Cockpit.set_rates
+
+    def factories(self, seed:int=None) -> dict:
+        """a factory for every simulator, see simulations.factories()"""
+        return {spec[0]: _factory(*spec, seed) for spec in self.simulators}
+
+    def build_simulators(self, seed:int=None) -> dict:
+        """a fresh set of this aircraft's simulators that nothing else
+        shares, the globals in simulations.py are left alone.  seed gives
+        their noise a stream of its own"""
+        return simulations.build(self.factories(seed))
+
+    def build_dash(self, update_for:Callable[[str], Callable], alerts:AlertBus=None, sims:dict=None) -> list:
+        """the dash pairs, like cockpit.build_dash, attached to sims, a
+        fresh set from build_simulators() when it is None"""
+        sims = self.build_simulators() if sims is None else sims
+        sensors = [SENSORS[sensor][0](sims[sim], **sensor_kwargs)
+                   for _, sensor, sensor_kwargs, sim, *_ in self.instruments]
+        return list(zip(sensors, self.build_displays(update_for, alerts)))
+
+    def build_displays(self, update_for:Callable[[str], Callable], alerts:AlertBus=None) -> list:
+        """just the displays, in dash order, for a window that is handed
+        the readings rather than reading the sensors, see framebus.py"""
+        displays = []
+        for name, _, _, _, display, elements, args, kwargs, *_ in self.instruments:
+            disp = DISPLAYS[display][0](*[update_for(element[0]) for element in elements], *args, **kwargs)
+            if alerts is not None:
+                disp.connect(alerts, name)
+            displays.append(disp)
+        return displays
+
+    def cockpit(self, update_for:Callable[[str], Callable]=None, alerts:AlertBus=None,
+                seed:int=None) -> Cockpit:
+        """a Cockpit for this aircraft flying its own simulators,
+        headless when update_for is None.  seed is for build_simulators()"""
+        alerts = alerts if alerts is not None else AlertBus()
+        sims = self.build_simulators(seed)
+        return Cockpit(self.build_dash(update_for or (lambda key: _no_update), alerts, sims), alerts,
+                       self.names, sims, self.controls)
+
+
+def _factory(name:str, kind:str, args:tuple, noise:tuple, seed:int=None) -> Callable:
+    cls = SIMULATORS[kind][0]
+    if noise is None and cls is Compass:
+        # the compass walks on noise of its own, seeded the same way
+        return lambda: cls(*args, name=name, run=seed)
+    if noise is None:
+        return lambda: cls(*args)
+    model, params = noise
+    model = NOISE[model][0]
+    return lambda: cls(*args, noise=NoiseSource(model(**params), seed_for(name, seed)))
+
+
+def _no_update(value) -> None:
+    pass
+
+
+_loaded = {} # digest -> Aircraft, a process compiles or unpickles a profile once
+
+
+def digest(data:bytes) -> str:
+    """the cache key of a profile file"""
+    return hashlib.sha256(b'%d\n' % COMPILER_VERSION + data).hexdigest()
+
+
+def load(path:str=DEFAULT, cache_dir:str=CACHE_DIR) -> Aircraft:
+    """the compiled profile at path.  A profile already compiled is
+    taken from memory or from cache_dir, None turns the disk cache off"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    name = digest(data)
+    aircraft = _loaded.get(name)
+    if aircraft is not None:
+        return aircraft
+    compiled = _read_cache(cache_dir, name) if cache_dir else None
+    if compiled is None:
+        try:
+            profile = json.loads(data)
+        except ValueError as e:
+            raise ValueError(f'{path} is not JSON: {e}') from None
+        compiled = compile_profile(profile, path)
+        if cache_dir:
+            _write_cache(cache_dir, name, compiled)
+    aircraft = _loaded[name] = Aircraft(name, *compiled)
+    return aircraft
+
+
+def _read_cache(cache_dir:str, name:str) -> tuple:
+    try:
+        with open(os.path.join(cache_dir, name + '.pickle'), 'rb') as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _write_cache(cache_dir:str, name:str, compiled:tuple) -> None:
+    # written beside the entry then renamed, like the sweep cache, so two
+    # launches at once never read half a file
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, name + '.pickle')
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as file:
+        pickle.dump(compiled, file, pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+
+
+if __name__ == '__main__':
+    paths = sys.argv[1:] or sorted(os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)
+                                   if name.endswith('.json'))
+    for path in paths:
+        clock = time.perf_counter
+        start = clock()
+        with open(path, 'rb') as file:
+            compiled = compile_profile(json.loads(file.read()), path)
+        compiled_ms = (clock() - start) * 1000
+        _loaded.clear()
+        load(path)
+        _loaded.clear()
+        start = clock()
+        aircraft = load(path)
+        cached_ms = (clock() - start) * 1000
+        start = clock()
+        cockpit = aircraft.cockpit()
+        cockpit.show(cockpit.step())
+        built_ms = (clock() - start) * 1000
+        print(f'{aircraft.name:<28} {len(aircraft.instruments)} instruments   compile {compiled_ms:6.2f} ms'
+              f'   cached load {cached_ms:6.2f} ms   build + first tick {built_ms:6.2f} ms')
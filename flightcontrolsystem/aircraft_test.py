@@ -0,0 +1,180 @@
+import copy
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from flightcontrolsystem import aircraft, cockpit, flightcontrol
+
+simulations = aircraft.simulations # the module holding the global simulators
+
+throttles_t = [('-THR1-', 95), ('-THR2-', 40)]
+
+
+def profile_t():
+    with open(aircraft.DEFAULT) as file:
+        return json.load(file)
+
+
+class TestProfiles(unittest.TestCase):
+    ''' Tests loading and flying aircraft profiles'''
+
+    def test_default_matches_built_in_dash(self):
+        plane = aircraft.load(aircraft.DEFAULT, None)
+        self.assertEqual(plane.names, cockpit.DASH_NAMES)
+        self.assertEqual(plane.trends, cockpit.TRENDS)
+        self.assertEqual(plane.rates, cockpit.RATES)
+        built_in = cockpit.headless(sims=simulations.build())
+        expected = [built_in.step(throttles_t) for _ in range(300)]
+        profiled = plane.cockpit()
+        self.assertEqual([profiled.step(throttles_t) for _ in range(300)], expected)
+        for readings in expected:
+            profiled.show(readings)
+            built_in.show(readings)
+        self.assertEqual([(a.severity, a.source, a.message) for a in profiled.alerts.drain()],
+                         [(a.severity, a.source, a.message) for a in built_in.alerts.drain()])
+
+    def test_variant(self):
+        plane = aircraft.load(os.path.join(aircraft.PROFILE_DIR, 'trainer.json'), None)
+        pit = plane.cockpit()
+        self.assertEqual(pit.names, ('tach1', 'engTemp1', 'fuelC', 'compass', 'airspeed'))
+        self.assertEqual(pit.dash[0][0].scale, 0.037)
+        self.assertEqual(pit.dash[1][0].calibration.convert(1.3), 95.0) # held at the end of its table
+        readings = [pit.step(throttles_t) for _ in range(100)]
+        self.assertEqual(len(readings[-1]), 5)
+        self.assertIs(pit.sims['fuelC_'], pit.dash[2][0].sim)
+        self.assertEqual([title for title, _, _ in plane.frames], ['Air Speed', 'Engine', 'Fuel', 'Compass'])
+
+    def test_trainer_controls(self):
+        pit = aircraft.load(os.path.join(aircraft.PROFILE_DIR, 'trainer.json'), None).cockpit()
+        pit.step(throttles_t)
+        self.assertEqual(list(pit.endurance()), ['fuelC'])
+        self.assertGreater(pit.endurance()['fuelC'], 0)
+        before = pit.sims['fuelC_'].total
+        pit.step([('-REFUEL-', None)])
+        self.assertGreater(pit.sims['fuelC_'].total, before + 700)
+        pit.apply('-NORTH-')
+        self.assertEqual(pit.sims['compass_'].initVal, 0)
+        self.assertIn('North is set', [alert.message for alert in pit.alerts.drain()])
+
+    def test_controls_are_named(self):
+        renamed = profile_t()
+        renamed['simulators']['main_'] = renamed['simulators'].pop('fuelC_')
+        renamed['instruments'][5]['simulator'] = 'main_'
+        with self.assertRaises(ValueError) as raised:
+            aircraft.compile_profile(copy.deepcopy(renamed))
+        self.assertIn("-REFUEL- needs a Fuel simulator, 'fuelC_'", str(raised.exception))
+        renamed['controls'] = {'-REFUEL-': 'main_'}
+        plane = aircraft.Aircraft('', *aircraft.compile_profile(renamed))
+        pit = plane.cockpit()
+        self.assertIs(pit.tank, pit.sims['main_'])
+        self.assertEqual(list(pit.endurance()), ['fuelL', 'fuelC', 'fuelR'])
+        renamed['controls'] = {'-NORTH-': 'tach1_', '-GEAR-': 'main_'}
+        with self.assertRaises(ValueError) as raised:
+            aircraft.compile_profile(renamed)
+        self.assertIn("-NORTH- needs a Compass simulator, 'tach1_'", str(raised.exception))
+        self.assertIn('-GEAR- is not one of', str(raised.exception))
+
+    def test_refuel_alert_names_the_tank(self):
+        profile = profile_t()
+        profile['controls'] = {'-REFUEL-': 'fuelL_'}
+        pit = aircraft.Aircraft('', *aircraft.compile_profile(profile)).cockpit()
+        pit.tank.total = 9900
+        pit.step([('-REFUEL-', None)])
+        self.assertIn(('fuelL', 'Fuel Overflow'), [(alert.source, alert.message) for alert in pit.alerts.drain()])
+
+    def test_globals_left_alone(self):
+        factories = dict(simulations.FACTORIES)
+        airspeed = simulations.get('airspeed_')
+        pit = aircraft.load(os.path.join(aircraft.PROFILE_DIR, 'trainer.json'), None).cockpit()
+        self.assertEqual(simulations.FACTORIES, factories)
+        self.assertIs(simulations.get('airspeed_'), airspeed)
+        self.assertIsNot(pit.sims['airspeed_'], airspeed)
+        self.assertEqual(simulations.get('airspeed_').delay, simulations.DELAY_SPD)
+        other = aircraft.load(aircraft.DEFAULT, None).cockpit()
+        self.assertIsNot(other.sims['fuelC_'], pit.sims['fuelC_'])
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'plane.json')
+            cache = os.path.join(folder, 'cache')
+            with open(path, 'w') as file:
+                json.dump(profile_t(), file)
+            first = aircraft.load(path, cache)
+            self.assertEqual(os.listdir(cache), [first.digest + '.pickle'])
+            self.assertIs(aircraft.load(path, cache), first)
+            aircraft._loaded.pop(first.digest)
+            again = aircraft.load(path, cache)
+            self.assertIsNot(again, first)
+            self.assertEqual(again.instruments, first.instruments)
+            changed = profile_t()
+            changed['instruments'][-1]['limits'] = [300, 350, 400]
+            with open(path, 'w') as file:
+                json.dump(changed, file)
+            self.assertNotEqual(aircraft.load(path, cache).digest, first.digest)
+            self.assertEqual(len(os.listdir(cache)), 2)
+
+    def test_problems_are_listed(self):
+        bad = profile_t()
+        bad['instruments'][0]['display'] = 'Dial'
+        bad['instruments'][1]['simulator'] = 'nothing_'
+        bad['instruments'][2]['elements'][0]['key'] = '-ET2-'
+        bad['instruments'][-1]['limits'] = [400, 300, None]
+        bad['simulators']['tach1_']['delay'] = 'slow'
+        bad['instruments'][3]['rate'] = 0
+        bad['instruments'][4]['calibration'] = 'sender'
+        with self.assertRaises(ValueError) as raised:
+            aircraft.compile_profile(bad)
+        message = str(raised.exception)
+        for text in ("'Dial'", "'nothing_'", '-ET2- is used twice', 'limits must go up', 'delay must be a number',
+                     'rate must be more than 0', "no calibration called 'sender'"):
+            self.assertIn(text, message)
+
+    def test_lists_for_names(self):
+        bad = profile_t()
+        bad['instruments'][0]['display'] = ['TachBar']
+        bad['instruments'][1]['simulator'] = ['tach2_']
+        bad['instruments'][2]['frame'] = ['Engine Temp']
+        bad['instruments'][3]['elements'][0]['key'] = ['-ET2-']
+        bad['instruments'][4]['name'] = ['fuelL']
+        bad['instruments'][5]['calibration'] = ['egt']
+        bad['frames'][0]['title'] = ['Air Speed']
+        bad['simulators']['tach1_']['kind'] = ['DelaySim']
+        bad['controls'] = {'-NORTH-': ['compass_']}
+        with self.assertRaises(ValueError) as raised:
+            aircraft.compile_profile(bad)
+        message = str(raised.exception)
+        for text in ("display ['TachBar'] is not one of", 'simulator must be a name', 'frame must be a name',
+                     'key must be a string', 'name must be a string', 'calibration must be a name',
+                     'title must be a string', "kind ['DelaySim'] is not one of",
+                     "-NORTH- needs a Compass simulator, ['compass_']"):
+            self.assertIn(text, message)
+
+    def test_no_trends(self):
+        flat = profile_t()
+        for instrument in flat['instruments']:
+            instrument.pop('trend', None)
+        plane = aircraft.Aircraft('', *aircraft.compile_profile(flat))
+        self.assertEqual(plane.trends, {})
+        self.assertIsNone(flightcontrol.FlightSim.trend_default(SimpleNamespace(aircraft=plane)))
+
+    def test_reserved_and_unknown(self):
+        bad = profile_t()
+        bad['instruments'][0]['elements'][0]['key'] = '-THR1-'
+        bad['instruments'][1]['colour'] = 'red'
+        with self.assertRaises(ValueError) as raised:
+            aircraft.compile_profile(copy.deepcopy(bad))
+        self.assertIn('used by the window', str(raised.exception))
+        self.assertIn('unknown field colour', str(raised.exception))
+
+    def test_bring_up_is_quick(self):
+        start = time.perf_counter()
+        aircraft._loaded.clear()
+        pit = aircraft.load().cockpit()
+        pit.show(pit.step(throttles_t))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+""" Alert bus for the flight computer.
+Displays and controls publish Alert events instead of raising
+FlightSimException, so a state change never cuts a tick short.  The
+flight computer drains the bus in batches """
+import time
+from collections import deque
+from enum import IntEnum
+from typing import NamedTuple
+
+ALERT_QUEUE_SIZE = 256 #oldest alerts are dropped past this
+
+
+class Severity(IntEnum):
+    INFO = 0
+    CAUTION = 1
+    WARNING = 2
+    CRITICAL = 3
+
+
+class Alert(NamedTuple):
+    """one event for the flight computer, timestamp is time.time()"""
+    severity: Severity
+    source: str
+    timestamp: float
+    message: str
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class AlertBus:
+    """Bounded queue of alerts.  Publishing never blocks, when the queue
+    is full the oldest alert is dropped and counted.  deque.append and
+    deque.popleft are atomic so either thread may publish"""
+
+    def __init__(self, maxlen:int=ALERT_QUEUE_SIZE) -> None:
+        self._queue = deque(maxlen=maxlen)
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, severity:Severity, source:str, message:str) -> Alert:
+        alert = Alert(severity, source, time.time(), message)
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(alert)
+        self.published += 1
+        return alert
+
+    def drain(self, limit:int=None) -> list:
+        """removes and returns up to limit alerts, oldest first"""
+        alerts = []
+        popleft = self._queue.popleft
+        while limit is None or len(alerts) < limit:
+            try:
+                alerts.append(popleft())
+            except IndexError:
+                break
+        return alerts
+
+    def __len__(self) -> int:
+        return len(self._queue)
@@ -0,0 +1,49 @@
+import unittest
+from collections import Counter
+from flightcontrolsystem import cockpit
+
+#readings that push every display with a state machine across its
+#limits on every tick
+calm_t = (10, 10, 30, 30, 50, 50, 50, 90, 0)
+storm_t = (100, 100, 95, 95, 0, 0, 0, 270, 500)
+
+
+class TestAlertBus(unittest.TestCase):
+    ''' Tests the alert bus'''
+
+    def test_bounded(self):
+        bus = cockpit.AlertBus(maxlen=4)
+        for i in range(6):
+            bus.publish(cockpit.Severity.INFO, 'test', str(i))
+        self.assertEqual(bus.dropped, 2)
+        self.assertEqual([str(a) for a in bus.drain(3)], ['2', '3', '4'])
+        self.assertEqual(len(bus), 1)
+
+
+class TestAlertStorm(unittest.TestCase):
+    ''' Every dash pair updates every tick, even while alerting'''
+
+    def setUp(self):
+        self.calls = Counter()
+        def update_for(key):
+            return lambda value: self.calls.update([key])
+        self.bus = cockpit.AlertBus()
+        self.cockpit = cockpit.Cockpit(cockpit.build_dash(update_for, self.bus), self.bus)
+
+    def test_storm(self):
+        ticks = 40
+        for tick in range(ticks):
+            self.cockpit.show(storm_t if tick % 2 else calm_t)
+            self.assertTrue(all(count == tick + 1 for count in self.calls.values()))
+        self.assertEqual(len(self.calls), 10) # nine pairs, the compass has two elements
+        sources = {alert.source for alert in self.bus.drain()}
+        self.assertTrue({'tach1', 'tach2', 'fuelL', 'fuelC', 'fuelR', 'airspeed'} <= sources)
+
+    def test_simulated_ticks(self):
+        for tick in range(30):
+            self.cockpit.apply('-THR1-', 100 if tick % 3 else 0)
+            self.cockpit.apply('-NORTH-')
+            self.cockpit.show(self.cockpit.read())
+        self.assertEqual(set(self.calls.values()), {30})
+        north = [alert for alert in self.bus.drain() if alert.source == 'compass']
+        self.assertEqual(len(north), 30)
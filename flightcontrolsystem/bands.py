@@ -0,0 +1,109 @@
+""" Threshold bands for the caution/warning/redline state machines.
+A BandTable is a sorted list of thresholds with a band between each
+pair.  Every threshold can have its own hysteresis, a value has to drop
+that far below the threshold before the band above it is left.  The
+band for a value is found with one bisect, so a jump from safe straight
+past redline is reported as one transition.  As the displays always
+had it, a band is entered above its threshold and left below it, a
+value right on a threshold keeps whichever band it is in """
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, TYPE_CHECKING
+from alerts import Severity
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class Band(NamedTuple):
+    """name is the display state, message is what the flight computer
+    is told on entering the band (None for nothing)"""
+    name: str
+    severity: Severity
+    message: str = None
+
+
+class BandTable:
+    """bands are listed low to high, thresholds[i] is where bands[i+1]
+    starts (a value equal to the threshold is not in it yet).
+    hysteresis is one number for every threshold or one per threshold"""
+
+    def __init__(self, bands:list, thresholds:list, hysteresis=0.0) -> None:
+        if len(bands) != len(thresholds) + 1:
+            raise ValueError('a band table needs one more band than thresholds')
+        if any(low >= high for low, high in zip(thresholds, thresholds[1:])):
+            raise ValueError(f'thresholds must be strictly increasing: {thresholds}')
+        if isinstance(hysteresis, (int, float)):
+            hysteresis = [hysteresis] * len(thresholds)
+        if len(hysteresis) != len(thresholds) or any(h < 0 for h in hysteresis):
+            raise ValueError('hysteresis must be one number of 0 or more per threshold')
+        lowered = [t - h for t, h in zip(thresholds, hysteresis)]
+        if any(low < high for low, high in zip(lowered[1:], thresholds)):
+            raise ValueError('hysteresis can not reach below the threshold under it')
+        self.bands = tuple(bands)
+        self.thresholds = tuple(thresholds)
+        self.hysteresis = tuple(hysteresis)
+        self.lowered = tuple(lowered) # where each band is left going down
+
+    def index(self, value:float) -> int:
+        """band of value ignoring hysteresis"""
+        return bisect_left(self.thresholds, value)
+
+    def classify(self, values) -> 'np.ndarray':
+        """band of every value in an array, ignoring hysteresis"""
+        import numpy as np # only the offline scoring needs NumPy
+        return np.searchsorted(self.thresholds, values, side='left')
+
+    def replay(self, values, state:int=0) -> 'np.ndarray':
+        """band of every value in an array with hysteresis, the same as
+        stepping a BandMonitor that starts in state through them"""
+        import numpy as np
+        up = np.searchsorted(self.thresholds, values, side='left')
+        down = np.searchsorted(self.lowered, values, side='right')
+        states = up.copy()
+        # only values inside a hysteresis gap depend on the band before them
+        for i in np.flatnonzero(up != down):
+            prev = states[i - 1] if i else state
+            states[i] = min(max(prev, up[i]), down[i])
+        return states
+
+    def transitions(self, values, state:int=0) -> tuple:
+        """re-scores a recorded flight, returns the sample indices where
+        the band changed and the band entered at each one"""
+        import numpy as np
+        states = self.replay(values, state)
+        changed = np.flatnonzero(np.diff(states, prepend=state))
+        return changed, states[changed]
+
+
+def limit_table(caution:float, warn:float, limit_switch:float, messages:tuple=None,
+                names:tuple=('safe', 'caution', 'warning', 'redline'), hysteresis=0.0) -> BandTable:
+    """table for the usual caution/warn/limit_switch instrument, a limit of
+    None leaves that band out.  messages are listed low to high like names"""
+    severities = (Severity.INFO, Severity.CAUTION, Severity.WARNING, Severity.CRITICAL)
+    limits = [limit for limit in (caution, warn, limit_switch) if limit is not None]
+    count = len(limits) + 1
+    messages = messages or (None,) * count
+    bands = [Band(names[i], severities[i], messages[i]) for i in range(count)]
+    return BandTable(bands, limits, hysteresis)
+
+
+class BandMonitor:
+    """The state machine for one instrument, update() is O(log n)"""
+
+    def __init__(self, table:BandTable, state:int=0) -> None:
+        self.table = table
+        self.state = state
+
+    @property
+    def band(self) -> Band:
+        return self.table.bands[self.state]
+
+    def update(self, value:float) -> Band:
+        """returns the band entered, or None if the band did not change"""
+        state = self.state
+        new = bisect_left(self.table.thresholds, value)
+        if new <= state:
+            new = bisect_right(self.table.lowered, value)
+            if new >= state:
+                return None
+        self.state = new
+        return self.table.bands[new]
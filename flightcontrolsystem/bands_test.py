@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+from flightcontrolsystem import cockpit
+
+from flightcontrolsystem import bands
+Severity = bands.Severity
+
+
+def airspeed_table_t(hysteresis=0.0):
+    return bands.limit_table(310, 375, 450, ('normal', 'caution', 'warning', 'redline'),
+                             hysteresis=hysteresis)
+
+
+class TestBandTable(unittest.TestCase):
+    ''' Tests the threshold table'''
+
+    def test_index(self):
+        table = airspeed_table_t()
+        self.assertEqual([table.index(v) for v in (0, 310, 311, 375, 400, 451)], [0, 0, 1, 1, 2, 3])
+
+    def test_bad_tables(self):
+        with self.assertRaises(ValueError):
+            bands.limit_table(375, 310, 450)
+        with self.assertRaises(ValueError):
+            bands.limit_table(310, 320, 450, hysteresis=20)
+
+
+class TestBandMonitor(unittest.TestCase):
+    ''' Tests the state machine built on the table'''
+
+    def test_jump_is_one_transition(self):
+        monitor = bands.BandMonitor(airspeed_table_t())
+        self.assertEqual(monitor.update(500).name, 'redline')
+        self.assertEqual(monitor.update(0).name, 'safe')
+        self.assertIsNone(monitor.update(10))
+
+    def test_on_the_threshold(self):
+        # entered above a threshold and left below it, like the displays
+        # always did
+        monitor = bands.BandMonitor(airspeed_table_t())
+        self.assertIsNone(monitor.update(310))
+        self.assertEqual(monitor.update(310.5).name, 'caution')
+        self.assertIsNone(monitor.update(310))
+        self.assertEqual(monitor.update(309.5).name, 'safe')
+        tach = bands.BandMonitor(bands.limit_table(80, 90, None))
+        self.assertEqual(tach.update(85).name, 'caution')
+        self.assertIsNone(tach.update(90))
+        self.assertEqual(tach.update(91).name, 'warning')
+        values = np.array([310, 310.5, 310, 309.5, 375, 376, 375])
+        np.testing.assert_array_equal(airspeed_table_t().replay(values), [0, 1, 1, 0, 1, 2, 2])
+
+    def test_hysteresis(self):
+        monitor = bands.BandMonitor(airspeed_table_t(hysteresis=5))
+        self.assertEqual(monitor.update(312).name, 'caution')
+        self.assertIsNone(monitor.update(307))
+        self.assertEqual(monitor.update(304).name, 'safe')
+
+    def test_replay_matches_monitor(self):
+        table = airspeed_table_t(hysteresis=[4, 6, 8])
+        values = np.random.default_rng(3).uniform(250, 500, 2000)
+        monitor = bands.BandMonitor(table)
+        stepped = []
+        for value in values:
+            monitor.update(value)
+            stepped.append(monitor.state)
+        np.testing.assert_array_equal(table.replay(values), stepped)
+        ticks, states = table.transitions(values)
+        self.assertEqual(len(ticks), sum(1 for a, b in zip([0] + stepped, stepped) if a != b))
+
+
+class TestBandDisplays(unittest.TestCase):
+    ''' Tests the displays use their constructor limits'''
+
+    def test_tach_limits(self):
+        bus = cockpit.AlertBus()
+        tach = cockpit.TachBar(lambda value: None, 50, 60)
+        tach.connect(bus, 'tach1')
+        tach.update(70)
+        self.assertEqual(tach.state, 'redline')
+        alert, = bus.drain()
+        self.assertEqual((alert.severity, alert.message), (Severity.WARNING, 'Engine RPM is REDLINE'))
@@ -0,0 +1,180 @@
+""" Calibration tables for the sensors.
+A Calibration turns a raw reading into engineering units by straight
+line interpolation between breakpoints, so a thermocouple, a pitot or a
+fuel sender can have whatever curve its data sheet gives.  Each table is
+compiled once into the breakpoints and the slope of every segment, and a
+table with evenly spaced breakpoints finds its segment with one multiply
+rather than a search.  convert() does one sample, convert_array() a whole
+NumPy array of them.  Calibration.linear() is the scale and offset the
+sensors always had, as a one segment table.
+
+A calibration file is JSON, a table per name
+    {"egt": {"points": [[0.0, -20.0], [0.5, 41.0], [1.3, 95.0]], "extrapolate": false}}
+points are [raw, value] with the raw values going up.  Past the ends a
+table carries on along its end segments, or with extrapolate false holds
+the end values
+
+    python calibration.py [file]    checks a file and times the tables in it
+"""
+import json
+import sys
+from bisect import bisect_right
+from typing import Callable
+
+
+class Calibration:
+    """A compiled breakpoint table.  points is a sequence of (raw, value)
+    pairs, raw strictly increasing.  slopes is only given by linear(),
+    which wants the scale exactly rather than worked out again from the
+    points"""
+
+    def __init__(self, points, extrapolate:bool=True, slopes:tuple=None) -> None:
+        points = [(float(raw), float(value)) for raw, value in points]
+        if len(points) < 2:
+            raise ValueError('needs at least two points')
+        xs = tuple(raw for raw, _ in points)
+        if any(b <= a for a, b in zip(xs, xs[1:])):
+            raise ValueError('raw values must go up')
+        ys = tuple(value for _, value in points)
+        self.xs = xs
+        self.ys = ys
+        self.extrapolate = extrapolate
+        if slopes is None:
+            slopes = tuple((y1 - y0) / (x1 - x0) for x0, x1, y0, y1 in zip(xs, xs[1:], ys, ys[1:]))
+        self.slopes = tuple(slopes)
+        step = xs[1] - xs[0]
+        self.uniform = all(abs((b - a) - step) <= 1e-9 * step for a, b in zip(xs, xs[1:]))
+        self.inverse_step = 1.0 / step
+        self.convert = self._compile()
+        self._arrays = None # xs, ys and slopes for convert_array(), made on first use
+
+    @classmethod
+    def linear(cls, scale:float, offset:float=0.0) -> 'Calibration':
+        """raw * scale - offset, to the last bit, the way the sensors
+        convert without a table"""
+        return cls(((0.0, -offset), (1.0, scale - offset)), slopes=(scale,))
+
+    def __reduce__(self):
+        # convert is a closure, the table is rebuilt rather than pickled
+        return (Calibration, (tuple(zip(self.xs, self.ys)), self.extrapolate, self.slopes))
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Calibration) and (self.xs, self.ys, self.slopes, self.extrapolate)
+                == (other.xs, other.ys, other.slopes, other.extrapolate))
+
+    def __repr__(self) -> str:
+        return f'Calibration({len(self.xs)} points, {self.xs[0]:g} to {self.xs[-1]:g})'
+
+    def _compile(self) -> Callable[[float], float]:
+        """convert() for this table, the cheapest lookup that finds its
+        segments with everything it needs bound as locals"""
+        xs, ys, slopes = self.xs, self.ys, self.slopes
+        x0, y0, slope0 = xs[0], ys[0], slopes[0]
+        low, high = xs[0], xs[-1]
+        last = len(xs) - 2
+        inverse_step = self.inverse_step
+        if not self.extrapolate:
+            if not last:
+                def convert(raw:float) -> float:
+                    raw = low if raw < low else high if raw > high else raw
+                    return y0 + slope0 * (raw - x0)
+            elif self.uniform:
+                def convert(raw:float) -> float:
+                    raw = low if raw < low else high if raw > high else raw
+                    i = int((raw - x0) * inverse_step)
+                    if i > last:
+                        i = last
+                    return ys[i] + slopes[i] * (raw - xs[i])
+            else:
+                def convert(raw:float) -> float:
+                    raw = low if raw < low else high if raw > high else raw
+                    i = bisect_right(xs, raw, 1, last + 1) - 1
+                    return ys[i] + slopes[i] * (raw - xs[i])
+        elif not last:
+            def convert(raw:float) -> float:
+                return y0 + slope0 * (raw - x0)
+        elif self.uniform:
+            def convert(raw:float) -> float:
+                i = int((raw - x0) * inverse_step)
+                i = 0 if i < 0 else last if i > last else i
+                return ys[i] + slopes[i] * (raw - xs[i])
+        else:
+            def convert(raw:float) -> float:
+                i = bisect_right(xs, raw, 1, last + 1) - 1
+                return ys[i] + slopes[i] * (raw - xs[i])
+        return convert
+
+    def convert_array(self, raw):
+        """convert() of every element of raw, as a float NumPy array.  The
+        results are the same as convert() gives one at a time"""
+        import numpy as np
+        if self._arrays is None:
+            self._arrays = (np.array(self.xs), np.array(self.ys), np.array(self.slopes))
+        xs, ys, slopes = self._arrays
+        raw = np.asarray(raw, dtype=float)
+        if not self.extrapolate:
+            raw = np.clip(raw, xs[0], xs[-1])
+        if len(xs) == 2:
+            return ys[0] + slopes[0] * (raw - xs[0])
+        if self.uniform:
+            index = ((raw - xs[0]) * self.inverse_step).astype(np.int64)
+        else:
+            index = np.searchsorted(xs, raw, side='right') - 1
+        np.clip(index, 0, len(xs) - 2, out=index)
+        return ys[index] + slopes[index] * (raw - xs[index])
+
+
+def compile_tables(spec:dict) -> dict:
+    """name -> Calibration from the parsed JSON of a calibration file,
+    raises ValueError naming the table that is wrong"""
+    if not isinstance(spec, dict):
+        raise ValueError('calibrations must be an object of tables')
+    tables = {}
+    for name, table in spec.items():
+        if not isinstance(table, dict) or not isinstance(table.get('points'), list):
+            raise ValueError(f'calibration {name} needs a list of points')
+        unknown = set(table) - {'points', 'extrapolate'}
+        if unknown:
+            raise ValueError(f'calibration {name} has unknown field {", ".join(sorted(unknown))}')
+        points = table['points']
+        if not all(isinstance(point, list) and len(point) == 2 and all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in point) for point in points):
+            raise ValueError(f'calibration {name} points must be [raw, value] numbers')
+        try:
+            tables[name] = Calibration(points, bool(table.get('extrapolate', True)))
+        except ValueError as e:
+            raise ValueError(f'calibration {name} {e}') from None
+    return tables
+
+
+def load(path:str) -> dict:
+    """the tables in a calibration file"""
+    with open(path) as file:
+        try:
+            spec = json.load(file)
+        except ValueError as e:
+            raise ValueError(f'{path} is not JSON: {e}') from None
+    return compile_tables(spec)
+
+
+if __name__ == '__main__':
+    import time
+    import numpy as np
+    if len(sys.argv) > 1:
+        tables = load(sys.argv[1])
+    else:
+        tables = {'linear': Calibration.linear(75.0 / 1.3, -20.0),
+                  'even': Calibration([(x / 16, (x / 16) ** 1.5 * 100) for x in range(17)]),
+                  'uneven': Calibration([(x * x / 256, x * 6.0) for x in range(17)])}
+    raw = np.random.default_rng(1).random(100000) * 1.3
+    values = raw.tolist()
+    for name, table in tables.items():
+        convert = table.convert
+        start = time.perf_counter()
+        for value in values:
+            convert(value)
+        each = (time.perf_counter() - start) / len(values) * 1e9
+        start = time.perf_counter()
+        table.convert_array(raw)
+        whole = (time.perf_counter() - start) / len(values) * 1e9
+        print(f'{name:<12} {table!r:<36} convert {each:6.0f} ns   convert_array {whole:6.1f} ns per sample')
@@ -0,0 +1,64 @@
+import pickle
+import random
+import unittest
+import numpy as np
+from flightcontrolsystem import calibration
+
+even_t = [(x / 8, (x / 8) ** 2 * 100) for x in range(9)]
+uneven_t = [(0.0, 0.0), (0.1, 5.0), (0.15, 12.0), (0.6, 40.0), (1.0, 41.0)]
+
+
+class TestCalibration(unittest.TestCase):
+    ''' Tests the breakpoint tables'''
+
+    def test_linear_is_the_old_math(self):
+        rng = random.Random(1)
+        for scale, offset in ((0.025, 0.0), (75.0 / 1.3, -20.0), (550.0 / 2.79, 0.0)):
+            table = calibration.Calibration.linear(scale, offset)
+            for _ in range(1000):
+                raw = rng.uniform(-1, 5000)
+                self.assertEqual(table.convert(raw), raw * scale - offset)
+
+    def test_interpolates(self):
+        for points in (even_t, uneven_t):
+            table = calibration.Calibration(points)
+            for (x0, y0), (x1, y1) in zip(points, points[1:]):
+                self.assertAlmostEqual(table.convert(x0), y0)
+                self.assertAlmostEqual(table.convert((x0 + x1) / 2), (y0 + y1) / 2)
+            self.assertAlmostEqual(table.convert(points[-1][0]), points[-1][1])
+        self.assertTrue(calibration.Calibration(even_t).uniform)
+        self.assertFalse(calibration.Calibration(uneven_t).uniform)
+
+    def test_ends(self):
+        carried = calibration.Calibration(uneven_t)
+        held = calibration.Calibration(uneven_t, extrapolate=False)
+        self.assertAlmostEqual(carried.convert(2.0), 41.0 + 2.5)
+        self.assertAlmostEqual(carried.convert(-0.1), -5.0)
+        self.assertEqual(held.convert(2.0), 41.0)
+        self.assertEqual(held.convert(-0.1), 0.0)
+
+    def test_array_matches_one_at_a_time(self):
+        raw = np.random.default_rng(2).uniform(-0.5, 1.5, 5000)
+        for points in (even_t, uneven_t, [(0.0, 3.0), (2.0, 7.0)]):
+            for extrapolate in (True, False):
+                table = calibration.Calibration(points, extrapolate)
+                expected = [table.convert(value) for value in raw.tolist()]
+                self.assertEqual(table.convert_array(raw).tolist(), expected)
+
+    def test_files(self):
+        tables = calibration.compile_tables({'egt': {'points': [[0, 20], [1, 80]], 'extrapolate': False}})
+        self.assertEqual(tables['egt'].convert(0.5), 50.0)
+        again = pickle.loads(pickle.dumps(tables['egt']))
+        self.assertEqual(again, tables['egt'])
+        self.assertEqual(again.convert(2.0), 80.0)
+        for bad, message in (({'a': {'points': [[0, 1]]}}, 'at least two'),
+                             ({'a': {'points': [[1, 1], [0, 2]]}}, 'must go up'),
+                             ({'a': {'points': [[0, 'x'], [1, 2]]}}, 'numbers'),
+                             ({'a': {'points': [[0, 1], [1, 2]], 'clamp': True}}, 'unknown field clamp')):
+            with self.assertRaises(ValueError) as raised:
+                calibration.compile_tables(bad)
+            self.assertIn(message, str(raised.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,314 @@
+""" The cockpit without the GUI.
+build_dash() attaches the sensors to the displays and Cockpit runs the
+simulation side of a tick, so it can be driven from any thread or from
+a test without a window """
+import threading
+from typing import Callable     #used for a parameter
+import simulations
+from simulations import Fuel
+from sensors import Sensors, Tach_sensor, Tempr_sensor, Fuel_sensor, Compass_sensor, Airspeed_sensor
+from displays import TachBar, Bar, Fuel_Level, CompassDisp, AirspeedDisp, TrendDisplay
+from flightsimexception import FlightSimException
+from alerts import AlertBus, Severity
+from scheduler import RateSchedule
+
+#the GUI keys of the controls, these double as the command names
+THROTTLES = ('-THR1-', '-THR2-')
+CONTROLS = ('-REFUEL-', '-NORTH-', '-UP-', '-DN-')
+THROTTLE_DEFAULT = 10 #matches the slider default_value
+
+#caution, warn and limit_switch for each kind of instrument
+TACH_LIMITS = (80, 90, None) #percent of max RPM
+TEMPR_LIMITS = (80, 90, None) #percent of the bar
+AIRSPEED_LIMITS = (310, 375, 450) #mph
+TEMPR_MESSAGES = ('Engine temp normal', 'Caution: Engine temp high', 'Warning: Engine temp HIGH')
+
+#the name of each dash pair, in dash order.  Used as the alert source
+DASH_NAMES = ('tach1', 'tach2', 'engTemp1', 'engTemp2',
+              'fuelL', 'fuelC', 'fuelR', 'compass', 'airspeed')
+
+FUEL_TANKS = ('fuelL', 'fuelC', 'fuelR')
+
+#the simulator each control button acts on, an aircraft profile may name
+#its own, see aircraft.py
+CONTROL_SIMULATORS = {'-REFUEL-': 'fuelC_', '-NORTH-': 'compass_'}
+
+#the miliseconds between reads of the dash pairs that do not need every
+#tick, see Cockpit.set_rates.  The temperatures lag by 10 s and the tanks
+#drain slowly, the compass walks one step per UPDATE_PERIOD of simulated
+#time so it can be read at its step rate whatever the tick
+RATES = {'engTemp1': 1000, 'engTemp2': 1000,
+         'fuelL': 1000, 'fuelC': 1000, 'fuelR': 1000,
+         'compass': 200}
+
+#the dash pairs that keep a trend and the range each is drawn over
+TRENDS = {'tach1': (0, 100), 'tach2': (0, 100),
+          'engTemp1': (0, 100), 'engTemp2': (0, 100),
+          'fuelL': (0, 100), 'fuelC': (0, 100), 'fuelR': (0, 100),
+          'airspeed': (0, 550)}
+
+#the sensor class for each dash pair and the simulator it reads
+SENSORS = {'tach1': (Tach_sensor, 'tach1_'),
+           'tach2': (Tach_sensor, 'tach2_'),
+           'engTemp1': (Tempr_sensor, 'engTemp1_'),
+           'engTemp2': (Tempr_sensor, 'engTemp2_'),
+           'fuelL': (Fuel_sensor, 'fuelL_'),
+           'fuelC': (Fuel_sensor, 'fuelC_'),
+           'fuelR': (Fuel_sensor, 'fuelR_'),
+           'compass': (Compass_sensor, 'compass_'),
+           'airspeed': (Airspeed_sensor, 'airspeed_')}
+
+
+def make_sensor(name:str, sims:dict=None) -> Sensors:
+    """builds the sensor for a dash pair, attached to its simulator in
+    sims or to the global one in simulations.py"""
+    sensor, sim = SENSORS[name]
+    return sensor(simulations.get(sim) if sims is None else sims[sim])
+
+
+def build_dash(update_for:Callable[[str], Callable], alerts:AlertBus=None, sims:dict=None) -> list:
+    """attach either hardware or a simulator to the sensor
+    and configure the display for the sensor.
+    update_for takes the GUI key of an element and returns the callable
+    the display uses to update that element, alerts is the bus the
+    displays publish to.  sims is the simulators to read, the globals
+    in simulations.py when it is None"""
+
+    tach1_sens = make_sensor('tach1', sims)
+    tach1_disp = TachBar(update_for('-TACH1-'),*TACH_LIMITS)
+    tach2_sens = make_sensor('tach2', sims)
+    tach2_disp = TachBar(update_for('-TACH2-'),*TACH_LIMITS)
+
+    comp_sens = make_sensor('compass', sims)
+    comp_disp = CompassDisp(update_for('-COMPASS-'), update_for('-DIR-'))
+
+    engTemp1_sens = make_sensor('engTemp1', sims)
+    engTemp1_disp = Bar(update_for('-ET1-'),*TEMPR_LIMITS,TEMPR_MESSAGES)
+    engTemp2_sens = make_sensor('engTemp2', sims)
+    engTemp2_disp = Bar(update_for('-ET2-'),*TEMPR_LIMITS,TEMPR_MESSAGES)
+
+    fuelL_sens = make_sensor('fuelL', sims)
+    fuelL_disp = Fuel_Level(update_for('-FUELLEFT-'))
+    fuelC_sens = make_sensor('fuelC', sims)
+    fuelC_disp = Fuel_Level(update_for('-FUELCENTER-'))
+    fuelR_sens = make_sensor('fuelR', sims)
+    fuelR_disp = Fuel_Level(update_for('-FUELRIGHT-'))
+
+    airspeed_sens = make_sensor('airspeed', sims)
+    airspeed_disp = AirspeedDisp(update_for('-AIRSPEED-'),*AIRSPEED_LIMITS)
+
+    # the entire dashboard pairs the sensor to the display and stores
+    # the respective methods as a list of tuples
+    dash = [(tach1_sens,tach1_disp),
+            (tach2_sens,tach2_disp),
+            (engTemp1_sens,engTemp1_disp),
+            (engTemp2_sens,engTemp2_disp),
+            (fuelL_sens,fuelL_disp),
+            (fuelC_sens,fuelC_disp),
+            (fuelR_sens,fuelR_disp),
+            (comp_sens,comp_disp),
+            (airspeed_sens,airspeed_disp)]
+    if alerts is not None:
+        for name,(_,disp) in zip(DASH_NAMES, dash):
+            disp.connect(alerts, name)
+    return dash
+
+
+def build_trends(update_for:Callable[[str], Callable], span:int, points:int=200,
+                 trends:dict=TRENDS) -> dict:
+    """a TrendDisplay for each of trends, keyed by dash name.  update_for
+    takes the dash name and returns the callable that draws its columns"""
+    return {name: TrendDisplay(update_for(name), low, high, span, points)
+            for name, (low, high) in trends.items()}
+
+
+class Cockpit:
+    """Holds the dash and the current control inputs.  The simulation
+    side calls apply() and read(), the display side calls show().
+    Anything for the flight computer goes on the alerts bus.  names are
+    the dash pairs in order, an aircraft profile may bring its own.  sims
+    is every simulator the dash reads by name, the globals in
+    simulations.py when it is None, and controls names the one in sims
+    each of CONTROL_SIMULATORS acts on"""
+
+    def __init__(self, dash:list, alerts:AlertBus, names:tuple=DASH_NAMES, sims:dict=None,
+                 controls:dict=CONTROL_SIMULATORS) -> None:
+        self.dash = dash
+        self.alerts = alerts
+        self.names = names
+        self.sims = simulations.simulators() if sims is None else sims
+        self.tank = self.sims[controls['-REFUEL-']] # the tank REFUEL fills
+        # the pair reading it, which its alerts come from
+        self.tank_source = next((name for name, (sen, _) in zip(names, dash)
+                                 if getattr(sen, 'sim', None) is self.tank), controls['-REFUEL-'])
+        self.compass = self.sims[controls['-NORTH-']]
+        # every pair reading a fuel tank, for endurance()
+        self.tanks = {name: sen.sim for name, (sen, _) in zip(names, dash)
+                      if isinstance(getattr(sen, 'sim', None), Fuel)}
+        self.values = {key: THROTTLE_DEFAULT for key in THROTTLES}
+        self.ticks = 0
+        self.pressed = 0 # CONTROLS applied in the last step, one bit each
+        self.dt = None # ms the last step covered, None is one UPDATE_PERIOD
+        self.validator = None # checks the readings before they are shown, see validation.py
+        self.schedule = None # RateSchedule, None reads every pair every tick
+        self.all_fresh = (1 << len(dash)) - 1
+        self.fresh = self.all_fresh # pairs read in the last step, one bit each
+        # held while the simulators change, acquisition.SimSource reads
+        # them from another thread under it
+        self.lock = threading.Lock()
+        self._readings = None # the last reading of every pair
+        self._clock = 0.0 # miliseconds simulated, and when each pair was last read
+        self._read_at = [0.0] * len(dash)
+
+    def set_rates(self, rates:dict, tick_period:float) -> RateSchedule:
+        """reads the pairs named in rates every rates[name] miliseconds
+        rather than every tick, the rest still every tick.  A pair read
+        less often integrates over everything since it was last read.
+        Pairs the validator compares are read on the same ticks, so set
+        the validator first"""
+        together = self.validator.together() if self.validator is not None else ()
+        schedule = RateSchedule.from_rates(self.names, rates, tick_period, together)
+        self.schedule = schedule if schedule.cycle > 1 else None
+        return schedule
+
+    def apply(self, key:str, arg:float=None) -> None:
+        """applies one control input, key is the GUI key of the control"""
+        with self.lock:
+            self._apply(key, arg)
+
+    def _apply(self, key:str, arg:float) -> None:
+        if key in THROTTLES:
+            self.values[key] = arg
+        elif key == '-REFUEL-':
+            try:
+                self.tank.total += 750
+            except FlightSimException as e:
+                self.alerts.publish(Severity.CAUTION, self.tank_source, str(e))
+        elif key == '-NORTH-':
+            self.compass.setCompass(0) #sets compass to North
+            self.alerts.publish(Severity.INFO, 'compass', 'North is set')
+        elif key == '-UP-':
+            Fuel.burnRate(0.001) #changes Fuel BURN_RATE when UP is pressed
+            self.alerts.publish(Severity.INFO, 'gear', 'Landing Gear Up')
+        elif key == '-DN-':
+            Fuel.burnRate(0.002) #changes Fuel BURN_RATE when DN is pressed
+            self.alerts.publish(Severity.INFO, 'gear', 'Landing Gear Down')
+
+    def step(self, commands=(), dt:float=None) -> tuple:
+        """applies the (key, arg) commands then reads the sensors, dt is
+        the miliseconds since the last step"""
+        with self.lock:
+            pressed = 0
+            for key, arg in commands:
+                self._apply(key, arg)
+                if key in CONTROLS:
+                    pressed |= 1 << CONTROLS.index(key)
+            self.pressed = pressed
+            return self.read(dt)
+
+    def read(self, dt:float=None) -> tuple:
+        """reads the sensors due this tick, every one of them without a
+        schedule.  This is one simulation tick covering dt miliseconds"""
+        values = self.values
+        if self.schedule is None:
+            readings = tuple(sen.read_sensor(values, dt) for sen,_ in self.dash)
+            elapsed = None
+        else:
+            readings, elapsed = self._read_due(values, simulations.UPDATE_PERIOD if dt is None else dt)
+        self.ticks += 1
+        self.dt = dt
+        if self.validator is not None:
+            readings = self.validator.check(readings, values, dt, self.ticks, self.fresh, elapsed)
+        return readings
+
+    def _read_due(self, values:dict, dt:float) -> tuple:
+        """the readings with only the pairs due this tick read again, and
+        the miliseconds each of those covered"""
+        dash = self.dash
+        schedule = self.schedule
+        clock = self._clock = self._clock + dt
+        read_at = self._read_at
+        if self._readings is None:
+            # nothing to hold over yet, the first tick reads everything
+            self._readings = [sen.read_sensor(values, dt) for sen,_ in dash]
+            read_at[:] = [clock] * len(dash)
+            self.fresh = self.all_fresh
+            return tuple(self._readings), [dt] * len(dash)
+        current = self._readings
+        elapsed = [0.0] * len(dash)
+        slot = self.ticks % schedule.cycle
+        divisors = schedule.divisors
+        for i in schedule.slots[slot]:
+            # a pair read every tick covers exactly dt
+            since = dt if divisors[i] == 1 else clock - read_at[i]
+            current[i] = dash[i][0].read_sensor(values, since)
+            read_at[i] = clock
+            elapsed[i] = since
+        self.fresh = schedule.masks[slot]
+        return tuple(current), elapsed
+
+    def get_state(self) -> tuple:
+        """everything the cockpit keeps between ticks apart from the
+        simulators, the displays' bands, the validator and where the rate
+        groups are, see snapshot.TimeWarp"""
+        readings = None if self._readings is None else list(self._readings)
+        validator = None if self.validator is None else self.validator.get_state()
+        return (dict(self.values), self.ticks, self.pressed, self.dt, self.fresh, self._clock,
+                list(self._read_at), readings, [disp.get_state() for _, disp in self.dash], validator)
+
+    def set_state(self, state:tuple) -> None:
+        (values, self.ticks, self.pressed, self.dt, self.fresh, self._clock,
+         read_at, readings, displays, validator) = state
+        self.values.update(values)
+        self._read_at = list(read_at)
+        self._readings = None if readings is None else list(readings)
+        for (_, disp), disp_state in zip(self.dash, displays):
+            disp.set_state(disp_state)
+        if self.validator is not None and validator is not None:
+            self.validator.set_state(validator)
+
+    def endurance(self) -> dict:
+        """seconds until each tank is empty at the current throttles, by
+        the name of the pair that reads it"""
+        return {name: tank.time_to_empty(self.values) for name, tank in self.tanks.items()}
+
+    def show(self, readings:tuple) -> None:
+        """hands the readings from read() to the displays, every display
+        is updated even when some of them publish alerts"""
+        for (_,disp),value in zip(self.dash, readings):
+            disp.update(value)
+
+
+class StubElement:
+    """Stands in for a PySimpleGUI element, it remembers the last value
+    and how many times it was updated"""
+
+    def __init__(self) -> None:
+        self.value = None
+        self.updates = 0
+
+    def update(self, value) -> None:
+        self.value = value
+        self.updates += 1
+
+
+class StubWindow(dict):
+    """Stands in for the PySimpleGUI window, window[key] makes the
+    element the first time it is asked for"""
+
+    def __missing__(self, key:str) -> StubElement:
+        element = self[key] = StubElement()
+        return element
+
+
+def headless(alerts:AlertBus=None, window:StubWindow=None, sims:dict=None) -> Cockpit:
+    """a Cockpit whose displays are not attached to any window, or to
+    the stub window if one is given.  sims as for Cockpit"""
+    alerts = alerts if alerts is not None else AlertBus()
+    if window is None:
+        return Cockpit(build_dash(lambda key: _no_update, alerts, sims), alerts, sims=sims)
+    return Cockpit(build_dash(lambda key: window[key].update, alerts, sims), alerts, sims=sims)
+
+
+def _no_update(value) -> None:
+    pass
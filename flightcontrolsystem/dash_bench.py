@@ -0,0 +1,241 @@
+""" Per tick benchmarks for the sensor -> display pipeline.
+Runs the real dash from cockpit.build_dash against a stub window, so no
+display is needed, and measures
+    pair.<name>         read_sensor + update for each dash pair
+    tick                one whole tick, every pair plus the widget flush
+    window.<samples>    DelaySim.get_data against the lag window length
+    rate.<ms>           one whole tick against the tick period
+    groups.<ms>         the same with the slow pairs read in rate groups,
+                        see Cockpit.set_rates
+    noise.<model>       one NoiseSource.next(), noise.random is the old
+                        per call random.random() walk step for comparison
+    validate            Validator.check of one tick's readings, every rule
+    bus                 FrameBus.publish of one tick's readings, see
+                        python framebus.py bench for it against viewers
+    convert.<table>     one sensor conversion, convert.inline is the
+                        raw * scale - offset the sensors used to do,
+                        convert.array is convert_array() per sample
+All results are nanoseconds per call.  They are compared against the
+baseline file and any metric slower than its threshold fails the run
+
+    python dash_bench.py            compare with the baseline
+    python dash_bench.py --save     write the results as the new baseline
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import simulations
+from simulations import DelaySim, AirSpeed
+from cockpit import Cockpit, StubWindow, build_dash, DASH_NAMES, RATES as DASH_RATES
+from alerts import AlertBus
+from widgets import UpdateBatch
+from noise import NoiseSource, BiasedWalk, Gaussian, Jitter
+from validation import Validator, default_rules
+from framebus import FrameBus
+from calibration import Calibration
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dash_bench_baseline.json')
+TOLERANCE = 0.5 # a metric fails when it is this much slower than baseline
+REPEATS = 5 # best of
+LOOPS = 2000 # calls per repeat
+WINDOWS = (5, 50, 500, 5000) # DelaySim window lengths in samples
+RATES = (200, 100, 50, 20) # tick periods in ms
+VALUES = {'-THR1-': 75, '-THR2-': 60}
+
+
+def best(run, loops:int=LOOPS) -> float:
+    """best time of REPEATS runs of loops calls, in ns per call"""
+    clock = time.perf_counter_ns
+    times = []
+    for _ in range(REPEATS):
+        start = clock()
+        run(loops)
+        times.append((clock() - start) / loops)
+    return min(times)
+
+
+def bench_pairs(cockpit) -> dict:
+    results = {}
+    values = VALUES
+    for name, (sen, disp) in zip(DASH_NAMES, cockpit.dash):
+        def run(loops, sen=sen, disp=disp):
+            for _ in range(loops):
+                disp.update(sen.read_sensor(values))
+        results[f'pair.{name}'] = best(run)
+    return results
+
+
+def bench_tick(cockpit, batch:UpdateBatch) -> float:
+    commands = list(VALUES.items())
+    def run(loops):
+        for _ in range(loops):
+            cockpit.show(cockpit.step(commands))
+            batch.flush()
+    return best(run)
+
+
+def batched_cockpit() -> tuple:
+    """the dash the way FlightSim wires it, displays -> widget batch -> window"""
+    window = StubWindow()
+    batch = UpdateBatch()
+    alerts = AlertBus()
+    dash = build_dash(lambda key: batch.channel(window[key].update), alerts)
+    return Cockpit(dash, alerts), batch, window
+
+
+def bench_windows() -> dict:
+    results = {}
+    for samples in WINDOWS:
+        sim = AirSpeed('-THR1-', 0, 0.31, 3.1, samples * simulations.UPDATE_PERIOD, '-THR2-')
+        def run(loops, sim=sim):
+            for _ in range(loops):
+                sim.get_data(VALUES)
+        results[f'window.{samples}'] = best(run)
+    return results
+
+
+def bench_rates() -> dict:
+    """the simulators size their windows from UPDATE_PERIOD when they are
+    built, so the dash is rebuilt for each rate"""
+    results = {}
+    saved = simulations.UPDATE_PERIOD
+    try:
+        for period in RATES:
+            simulations.UPDATE_PERIOD = period
+            results[f'rate.{period}'] = bench_tick(*rebuilt_cockpit())
+            cockpit, batch = rebuilt_cockpit()
+            cockpit.set_rates(DASH_RATES, period)
+            results[f'groups.{period}'] = bench_tick(cockpit, batch)
+    finally:
+        simulations.UPDATE_PERIOD = saved
+    return results
+
+
+def rebuilt_cockpit() -> tuple:
+    """batched_cockpit() with fresh lagged simulators for the current
+    UPDATE_PERIOD, the global ones are left alone"""
+    sim = simulations
+    fresh = [DelaySim('-THR1-', sim.TACH_INITIAL, sim.TACH_LOW_RANGE, sim.TACH_HIGH_RANGE, sim.TACH_DELAY),
+             DelaySim('-THR2-', sim.TACH_INITIAL, sim.TACH_LOW_RANGE, sim.TACH_HIGH_RANGE, sim.TACH_DELAY),
+             DelaySim('-THR1-', sim.TEMPR_INITIAL, sim.TEMPR_LOW_RANGE, sim.TEMPR_HIGH_RANGE, sim.TEMPR_DELAY),
+             DelaySim('-THR2-', sim.TEMPR_INITIAL, sim.TEMPR_LOW_RANGE, sim.TEMPR_HIGH_RANGE, sim.TEMPR_DELAY)]
+    cockpit, batch, _ = batched_cockpit()
+    for (sen, _), new in zip(cockpit.dash, fresh):
+        sen.sim = new
+    cockpit.dash[-1][0].sim = AirSpeed('-THR1-', sim.INITIAL_SPD, sim.LOW_RANGE_SPD, sim.HIGH_RANGE_SPD,
+                                       sim.DELAY_SPD, '-THR2-')
+    return cockpit, batch
+
+
+def bench_noise() -> dict:
+    results = {}
+    models = {'walk': BiasedWalk(1.0, 0.1), 'gauss': Gaussian(), 'jitter': Jitter()}
+    for name, model in models.items():
+        nxt = NoiseSource(model, 1).next
+        def run(loops, nxt=nxt):
+            for _ in range(loops):
+                nxt()
+        results[f'noise.{name}'] = best(run)
+    uniform = random.random
+    def run(loops):
+        for _ in range(loops):
+            uniform() - 0.5 + 0.1
+    results['noise.random'] = best(run)
+    return results
+
+
+def bench_validate(cockpit) -> float:
+    validator = Validator(default_rules(), DASH_NAMES)
+    readings = cockpit.read()
+    values = cockpit.values
+    check = validator.check
+    def run(loops):
+        for _ in range(loops):
+            check(readings, values)
+    return best(run)
+
+
+def bench_bus(cockpit) -> float:
+    readings = cockpit.read()
+    with FrameBus(DASH_NAMES, '') as bus:
+        publish = bus.publish
+        def run(loops):
+            for tick in range(loops):
+                publish(tick, readings)
+        return best(run)
+
+
+def bench_calibration() -> dict:
+    scale, offset = 75.0 / 1.3, -20.0
+    tables = {'linear': Calibration.linear(scale, offset),
+              'even': Calibration([(x / 16, (x / 16) ** 1.5 * 100) for x in range(17)]),
+              'uneven': Calibration([(x * x / 256, x * 6.0) for x in range(17)])}
+    raw = [random.Random(1).random() for _ in range(LOOPS)]
+    results = {}
+    def run(loops):
+        for value in raw[:loops]:
+            value * scale - offset
+    results['convert.inline'] = best(run)
+    for name, table in tables.items():
+        convert = table.convert
+        def run(loops, convert=convert):
+            for value in raw[:loops]:
+                convert(value)
+        results[f'convert.{name}'] = best(run)
+    table = tables['even']
+    def run(loops):
+        table.convert_array(raw[:loops])
+    results['convert.array'] = best(run)
+    return results
+
+
+def run_all() -> dict:
+    cockpit, batch, _ = batched_cockpit()
+    results = bench_pairs(cockpit)
+    results['tick'] = bench_tick(cockpit, batch)
+    results.update(bench_windows())
+    results.update(bench_rates())
+    results.update(bench_noise())
+    results['validate'] = bench_validate(cockpit)
+    results['bus'] = bench_bus(cockpit)
+    results.update(bench_calibration())
+    return results
+
+
+def compare(results:dict, baseline:dict) -> list:
+    """returns a line for every metric slower than its threshold"""
+    failures = []
+    thresholds = baseline.get('thresholds', {})
+    for name, base in baseline['results'].items():
+        if name not in results:
+            continue
+        limit = base * (1 + thresholds.get(name, baseline.get('tolerance', TOLERANCE)))
+        if results[name] > limit:
+            failures.append(f'{name}: {results[name]:.0f} ns > {limit:.0f} ns (baseline {base:.0f} ns)')
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='sensor -> display pipeline benchmarks')
+    parser.add_argument('--save', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file to compare with')
+    args = parser.parse_args()
+
+    results = run_all()
+    for name, ns in results.items():
+        print(f'{name:<18} {ns:>10.0f} ns')
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump({'tolerance': TOLERANCE, 'thresholds': {}, 'results': results}, file, indent=2)
+        print(f'baseline saved to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            failures = compare(results, json.load(file))
+        for line in failures:
+            print('REGRESSION', line)
+        sys.exit(1 if failures else 0)
+    else:
+        print(f'no baseline at {args.baseline}, run with --save to make one')
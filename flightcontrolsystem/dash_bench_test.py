@@ -0,0 +1,23 @@
+import json
+import unittest
+from flightcontrolsystem import dash_bench
+
+
+class TestCompare(unittest.TestCase):
+    ''' Tests comparing results with the baseline'''
+
+    def test_over_threshold(self):
+        baseline = {'tolerance': 0.5, 'thresholds': {'bus': 0.1}, 'results': {'tick': 1000.0, 'bus': 100.0}}
+        self.assertEqual(dash_bench.compare({'tick': 1400.0, 'bus': 105.0}, baseline), [])
+        failures = dash_bench.compare({'tick': 1600.0, 'bus': 120.0}, baseline)
+        self.assertEqual([line.split(':')[0] for line in failures], ['tick', 'bus'])
+
+    def test_baseline_is_committed(self):
+        with open(dash_bench.BASELINE) as file:
+            baseline = json.load(file)
+        self.assertIn('tick', baseline['results'])
+        self.assertEqual(dash_bench.compare(baseline['results'], baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
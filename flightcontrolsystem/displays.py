@@ -1,11 +1,15 @@
 """ Displays for the Cockpit Simulation System """
 from typing import Callable     #used for a parameter
 from flightsimexception import FlightSimException
-from sensors import *
+from alerts import AlertBus, Severity
+from bands import BandTable, BandMonitor, limit_table
+from history import TrendHistory
 
 
 class Display:
     """This is the base class from which all of our displays will be derived."""
+    alerts = None # AlertBus the display publishes to, see connect()
+    source = None # name of the display on the alert bus
 
     def __init__(self, guiUpdate:Callable) -> None:
         self.gui = guiUpdate
@@ -13,45 +17,76 @@ class Display:
     def update(self,value:float):
         self.gui(value)
 
+    def connect(self, alerts:AlertBus, source:str) -> None:
+        """sends this display's alerts to the bus"""
+        self.alerts = alerts
+        self.source = source
+
+    def get_state(self) -> tuple:
+        """whatever decides the display's next alert, see snapshot.py"""
+        return ()
+
+    def set_state(self, state:tuple) -> None:
+        pass
+
+    def alert(self, severity:Severity, message:str) -> None:
+        """reports a state change to the flight computer.  A display that
+        is not connected to a bus raises FlightSimException instead"""
+        if self.alerts is None:
+            raise FlightSimException(message)
+        self.alerts.publish(severity, self.source, message)
+
     @staticmethod
     def validate_range(value:int) -> bool:
         return 1 <= value <= 100
 
 
-class Bar(Display):
-    """yeah, this does the things where data is displayed on the progress bar 
-    of the GUI GUI"""
-    def __init__(self, guiUpdate:Callable, caution:int, warn:int, limit_switch:int) -> None:
+class BandDisplay(Display):
+    """Display whose caution/warning states come from a BandTable, see
+    bands.py.  Entering a band publishes the band's message"""
+    def __init__(self, guiUpdate:Callable, table:BandTable) -> None:
         super().__init__(guiUpdate)
+        self.bands = BandMonitor(table)
+
+    @property
+    def state(self) -> str:
+        return self.bands.band.name
+
+    def get_state(self) -> tuple:
+        return (self.bands.state,)
+
+    def set_state(self, state:tuple) -> None:
+        self.bands.state = state[0]
+
+    def update(self, value:float):
+        self.gui(value)
+        band = self.bands.update(value)
+        if band is not None and band.message is not None:
+            self.alert(band.severity, band.message)
+
+
+class Bar(BandDisplay):
+    """yeah, this does the things where data is displayed on the progress bar 
+    of the GUI GUI.  A Bar without messages tracks its state but stays quiet,
+    messages and hysteresis can be given per instrument"""
+    NAMES = ('safe', 'caution', 'warning', 'redline')
+    MESSAGES = None
+
+    def __init__(self, guiUpdate:Callable, caution:int, warn:int, limit_switch:int=None,
+                 messages:tuple=None, hysteresis:float=0.0) -> None:
+        super().__init__(guiUpdate, limit_table(caution, warn, limit_switch, messages or self.MESSAGES,
+                                                self.NAMES, hysteresis))
         self.caution = caution
         self.warn = warn
         self.limit_switch = limit_switch
-        self.state = 'safe'
-
-    def update(self, value:int):
-        self.gui(value)
 
 
 class TachBar(Bar):
     """yeah, this does the things where data is displayed on the progress bar 
     of the GUI GUI"""
-    def update(self, value:int):
-        self.gui(value)
-        match self.state:
-            case 'safe':
-                if value >= 80:
-                    self.state = 'yellow'
-                    raise FlightSimException('Engine RPM is YELLOW')
-            case 'yellow':
-                if value > 90:
-                    self.state = 'redline'
-                    raise FlightSimException('Engine RPM is REDLINE')
-            case 'redline':
-                if value < 80:
-                    self.state = 'safe'
-                    raise FlightSimException('Engine RPM good chief!')
-            case _:
-                raise FlightSimException('Flight computer error 828abc')
+    NAMES = ('safe', 'yellow', 'redline', 'limit')
+    MESSAGES = ('Engine RPM good chief!', 'Engine RPM is YELLOW',
+                'Engine RPM is REDLINE', 'ENGINE RPM AT LIMIT')
 
 
 class Fuel_Level(Display):
@@ -61,23 +96,30 @@ class Fuel_Level(Display):
         super().__init__(guiUpdate)
         self.state = 'safe'
 
+    def get_state(self) -> tuple:
+        return (self.state,)
+
+    def set_state(self, state:tuple) -> None:
+        self.state = state[0]
+
     def update(self,value:float):
         self.gui(value)
         match self.state:
             case 'safe':
                 if not Display.validate_range(value):
                     self.state = 'caution'
-                    raise FlightSimException('It aint got no gas')
+                    self.alert(Severity.WARNING, 'It aint got no gas')
             case 'caution':
                 if Display.validate_range(value):
                     self.state = 'safe'
-                    raise FlightSimException('Fuel Tank Low')
+                    self.alert(Severity.CAUTION, 'Fuel Tank Low')
             case _:
-                raise FlightSimException('Flight computer error 223')
+                self.alert(Severity.CRITICAL, 'Flight computer error 223')
                 
 
 class CompassDisp(Display):
     """This is where the the display gets updated to the gui"""
+    comp_points = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
 
     def __init__(self, guiUpdate:Callable, guiUpdate2:Callable) -> None:
         """constructor for compass disp"""
@@ -88,60 +130,74 @@ class CompassDisp(Display):
         """checks compass values to update compass
         direction and comapass cardinal"""
         self.guiUpdate(value)
-        comp_points = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-        if value >= 337.5 or value < 22.5:
-            self.guiUpdate2(comp_points[0])
-        elif value < 67.5:
-            self.guiUpdate2(comp_points[1])
-        elif value < 112.5:
-            self.guiUpdate2(comp_points[2])
-        elif value < 157.5:
-            self.guiUpdate2(comp_points[3])
-        elif value < 202.5:
-            self.guiUpdate2(comp_points[4])
-        elif value < 247.5:
-            self.guiUpdate2(comp_points[5])
-        elif value < 292.5:
-            self.guiUpdate2(comp_points[6])
-        else:
-            self.guiUpdate2(comp_points[7])
-
-
-class AirspeedDisp(Display):
+        #each point covers 45 degrees centered on its heading
+        self.guiUpdate2(CompassDisp.comp_points[int(((value + 22.5) % 360) // 45)])
+
+
+class AirspeedDisp(BandDisplay):
     """Updates the airspeed GUI and sends errors to the 
     flight computer.  Depending on the speed errors are displayed
     to reflect."""
-    def __init__(self, guiUpdate:Callable, caution:int, warn:int, limit_switch:int) -> None:
-        super().__init__(guiUpdate)
+    MESSAGES = ('Airspeed is normal', 'Caution: Airspeed too high',
+                'Warning: Airspeed WAY too high', 'AIRSPEED IS BEYOND REDLINE')
+
+    def __init__(self, guiUpdate:Callable, caution:int, warn:int, limit_switch:int,
+                 messages:tuple=None, hysteresis:float=0.0) -> None:
+        super().__init__(guiUpdate, limit_table(caution, warn, limit_switch, messages or self.MESSAGES,
+                                                hysteresis=hysteresis))
         self.caution = caution
         self.warn = warn
         self.limit_switch = limit_switch
-        self.state = 'safe'
 
-    def update(self, value:int):
-        self.gui(value)
-        match self.state:
-            case 'safe':
-                if value > 310:
-                    self.state = 'caution'
-                    raise FlightSimException('Caution: Airspeed too high')
-            case 'caution':
-                if value < 310:
-                    self.state = 'safe'
-                    raise FlightSimException('Airspeed is normal')
-                elif value > 375:
-                    self.state = 'warning'
-                    raise FlightSimException('Warning: Airspeed WAY too high')
-            case 'warning':
-                if value < 375:
-                    self.state = 'caution'
-                    raise FlightSimException('Caution: Airspeed too high')
-                elif value > 450:
-                    self.state = 'redline'
-                    raise FlightSimException('AIRSPEED IS BEYOND REDLINE')
-            case 'redline':
-                if value < 450:
-                    self.state = 'warning'
-                    raise FlightSimException('Warning: Airspeed way too high')
-            case _:
-                raise FlightSimException('Flight computer error 550')
\ No newline at end of file
+
+class TrendDisplay(Display):
+    """Keeps a TrendHistory of the values and, while visible, hands the
+    last span samples to guiUpdate as at most points (low, high) columns,
+    oldest first.  low and high are the range the trend is drawn over"""
+
+    def __init__(self, guiUpdate:Callable, low:float, high:float, span:int, points:int=200,
+                 history:TrendHistory=None) -> None:
+        super().__init__(guiUpdate)
+        self.low = low
+        self.high = high
+        self.span = span # samples shown
+        self.points = points
+        self.history = history if history is not None else TrendHistory()
+        self.visible = True
+
+    def update(self, value:float):
+        self.history.add(value)
+        if self.visible:
+            self.draw()
+
+    def draw(self) -> None:
+        self.gui(self.history.window(self.span, self.points))
+
+
+class TrendPlot:
+    """Draws the columns of a TrendDisplay on an sg.Graph of size pixels.
+    The graph coordinates are the canvas pixels and one vertical line per
+    column is drawn once, after that a redraw only moves the lines, so no
+    figure is ever deleted or created while flying"""
+
+    def __init__(self, graph, size:tuple) -> None:
+        self.width, self.height = size
+        self.coords = graph.TKCanvas.coords
+        self.lines = [graph.draw_line((x, -1), (x, -1), color='lime') for x in range(self.width)]
+        self.low, self.high = 0.0, 100.0
+
+    def show(self, trend) -> None:
+        """draws over the range of trend from now on"""
+        self.low, self.high = trend.low, trend.high
+
+    def __call__(self, columns:list) -> None:
+        height, low = self.height, self.low
+        scale = (height - 1) / (self.high - low)
+        coords = self.coords
+        start = self.width - len(columns) # the newest column is on the right
+        for line in self.lines[:start]:
+            coords(line, -1, -1, -1, -1)
+        for x, (line, (bottom, top)) in enumerate(zip(self.lines[start:], columns), start):
+            y_top = height - 1 - (top - low) * scale
+            y_bottom = height - 1 - (bottom - low) * scale
+            coords(line, x, y_top, x, y_bottom + 1)
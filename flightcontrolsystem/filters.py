@@ -0,0 +1,189 @@
+""" Filter engine shared by all of the lagged simulators.
+A filter is a kernel that is stepped once per sample and keeps its
+history in an array backed ring buffer, so every step is O(1) no matter
+how long the lag window is """
+from array import array
+
+
+class RingBuffer:
+    """Fixed size ring buffer of floats that keeps a running sum.
+    Samples are stored oldest to newest starting at head"""
+
+    def __init__(self, size:int, fill:float=0.0) -> None:
+        size = max(1, int(size))
+        self._data = array('d', [fill]) * size
+        self._head = 0 # index of the oldest sample
+        self._sum = sum(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def push(self, value:float) -> float:
+        """overwrites the oldest sample with value and returns the sample
+        that fell off the end of the buffer"""
+        data = self._data
+        head = self._head
+        old = data[head]
+        data[head] = value
+        head += 1
+        if head == len(data):
+            # once per wrap the sum is rebuilt from scratch so rounding
+            # error cannot build up, this keeps the step amortized O(1)
+            head = 0
+            self._sum = sum(data)
+        else:
+            self._sum += value - old
+        self._head = head
+        return old
+
+    def fill(self, value:float, count:int) -> float:
+        """pushes value count times, the same as count calls to push() but
+        never more than one pass over the buffer.  Returns the last sample
+        that fell off the end, or None when count is 0"""
+        data = self._data
+        size = len(data)
+        if count < size:
+            old = None
+            for _ in range(count):
+                old = self.push(value)
+            return old
+        # every old sample is gone, the newest of them fell off last
+        old = value if count > size else data[self._head - 1]
+        self._data = array('d', [value]) * size
+        self._head = (self._head + count) % size
+        self._sum = sum(self._data)
+        return old
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def oldest(self) -> float:
+        return self._data[self._head]
+
+    def values(self) -> list:
+        """returns the samples in order, oldest first"""
+        return list(self._data[self._head:]) + list(self._data[:self._head])
+
+    def get_state(self) -> tuple:
+        """(head, sum, *samples), everything needed to rebuild the buffer"""
+        return (self._head, self._sum, *self._data)
+
+    def set_state(self, state:tuple) -> None:
+        self._head = int(state[0])
+        self._sum = state[1]
+        self._data = array('d', state[2:])
+
+    def resize(self, size:int, fill:float) -> None:
+        """changes the buffer length in place, the newest samples are kept
+        and any new slots are filled with fill as the oldest samples"""
+        size = max(1, int(size))
+        ordered = self.values()[-size:]
+        self._data = array('d', [fill]) * (size - len(ordered)) + array('d', ordered)
+        self._head = 0
+        self._sum = sum(self._data)
+
+
+class Kernel:
+    """Base class for the filter kernels.  size is the length of the
+    window in samples and initVal is the output before any samples"""
+
+    def __init__(self, size:int, initVal:float) -> None:
+        self.buffer = RingBuffer(size, initVal)
+        self.value = initVal
+
+    def step(self, sample:float) -> float:
+        """Base Class just passes the sample straight through"""
+        self.buffer.push(sample)
+        self.value = sample
+        return self.value
+
+    def advance(self, sample:float, count:int) -> float:
+        """count steps holding the same sample, in closed form so a long
+        interval costs no more than one pass over the window"""
+        self.buffer.fill(sample, count)
+        if count:
+            self.value = sample
+        return self.value
+
+    def resize(self, size:int) -> None:
+        self.buffer.resize(size, self.buffer.oldest)
+
+    def history(self) -> list:
+        return self.buffer.values()
+
+    def get_state(self) -> tuple:
+        return (self.value, *self.buffer.get_state())
+
+    def set_state(self, state:tuple) -> None:
+        self.value = state[0]
+        self.buffer.set_state(state[1:])
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+
+class MovingAverage(Kernel):
+    """Boxcar average over the window, this is what DelaySim has
+    always done"""
+
+    def step(self, sample:float) -> float:
+        buffer = self.buffer
+        buffer.push(sample)
+        self.value = buffer.sum / len(buffer)
+        return self.value
+
+    def advance(self, sample:float, count:int) -> float:
+        buffer = self.buffer
+        if count:
+            buffer.fill(sample, count)
+            self.value = buffer.sum / len(buffer)
+        return self.value
+
+    def resize(self, size:int) -> None:
+        # padding with the current output keeps the average where it is
+        self.buffer.resize(size, self.value)
+
+
+class FirstOrderLag(Kernel):
+    """First order lag (exponential moving average) with a time constant
+    of size samples"""
+
+    def __init__(self, size:int, initVal:float) -> None:
+        super().__init__(size, initVal)
+        self.alpha = 1.0 / len(self.buffer)
+
+    def step(self, sample:float) -> float:
+        self.buffer.push(sample)
+        self.value += self.alpha * (sample - self.value)
+        return self.value
+
+    def advance(self, sample:float, count:int) -> float:
+        if count == 1:
+            return self.step(sample)
+        self.buffer.fill(sample, count)
+        if count:
+            self.value = sample + (self.value - sample) * (1.0 - self.alpha) ** count
+        return self.value
+
+    def set_state(self, state:tuple) -> None:
+        super().set_state(state)
+        self.alpha = 1.0 / len(self.buffer)
+
+    def resize(self, size:int) -> None:
+        super().resize(size)
+        self.alpha = 1.0 / len(self.buffer)
+
+
+class TransportDelay(Kernel):
+    """Pure dead time, the output is the input from size samples ago"""
+
+    def step(self, sample:float) -> float:
+        self.value = self.buffer.push(sample)
+        return self.value
+
+    def advance(self, sample:float, count:int) -> float:
+        if count:
+            self.value = self.buffer.fill(sample, count)
+        return self.value
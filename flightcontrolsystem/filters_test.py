@@ -0,0 +1,99 @@
+import unittest
+from flightcontrolsystem import filters
+from flightcontrolsystem import simulations as sim
+
+inputs_t = [10, 10, 40, 75, 100, 100, 100, 55, 20, 0, 0, 35, 90] * 20
+
+
+def moving_average_t(initVal, numback, samples):
+    '''the list based moving average DelaySim used to have'''
+    backvalues = [initVal] * numback
+    out = []
+    for val in samples:
+        backvalues.pop(0)
+        backvalues.append(val)
+        out.append(sum(backvalues)/len(backvalues))
+    return out
+
+
+class TestRingBuffer(unittest.TestCase):
+    ''' Tests the ring buffer behind every filter'''
+
+    def test_push(self):
+        ring = filters.RingBuffer(3, 1.0)
+        self.assertEqual(ring.push(2.0), 1.0)
+        self.assertEqual(ring.values(), [1.0, 1.0, 2.0])
+        self.assertEqual(ring.sum, 4.0)
+
+    def test_resize_keeps_newest(self):
+        ring = filters.RingBuffer(4, 0.0)
+        for val in (1.0, 2.0, 3.0, 4.0, 5.0):
+            ring.push(val)
+        ring.resize(2, 0.0)
+        self.assertEqual(ring.values(), [4.0, 5.0])
+        ring.resize(4, 9.0)
+        self.assertEqual(ring.values(), [9.0, 9.0, 4.0, 5.0])
+        self.assertEqual(ring.sum, 27.0)
+
+
+class TestKernels(unittest.TestCase):
+    ''' Tests the filter kernels'''
+
+    def test_moving_average_matches_list(self):
+        avg = filters.MovingAverage(7, 600)
+        out = [avg.step(val) for val in inputs_t]
+        for got, want in zip(out, moving_average_t(600, 7, inputs_t)):
+            self.assertAlmostEqual(got, want, places=9)
+
+    def test_transport_delay(self):
+        dead = filters.TransportDelay(3, 0.0)
+        out = [dead.step(val) for val in (1.0, 2.0, 3.0, 4.0)]
+        self.assertEqual(out, [0.0, 0.0, 0.0, 1.0])
+
+    def test_advance_matches_steps(self):
+        for kernel in (filters.MovingAverage, filters.FirstOrderLag, filters.TransportDelay):
+            for count in (0, 1, 3, 7, 8, 20):
+                stepped = kernel(7, 600.0)
+                jumped = kernel(7, 600.0)
+                for val in inputs_t[:10]:
+                    stepped.step(val)
+                    jumped.step(val)
+                for _ in range(count):
+                    stepped.step(42.0)
+                self.assertAlmostEqual(jumped.advance(42.0, count), stepped.value, places=9)
+                self.assertEqual(jumped.history(), stepped.history())
+
+    def test_first_order_lag(self):
+        lag = filters.FirstOrderLag(4, 0.0)
+        for _ in range(200):
+            lag.step(100.0)
+        self.assertAlmostEqual(lag.value, 100.0, places=6)
+
+
+class TestDelaySim(unittest.TestCase):
+    ''' Tests DelaySim against the old moving average'''
+
+    def test_long_step_matches_short_ones(self):
+        short = sim.DelaySim('-THR1-', 600, 0, 3850.0, 1500)
+        long = sim.DelaySim('-THR1-', 600, 0, 3850.0, 1500)
+        for val in inputs_t[:40]:
+            for _ in range(8):
+                short.get_data({'-THR1-': val}, sim.UPDATE_PERIOD / 4)
+            self.assertAlmostEqual(long.get_data({'-THR1-': val}, 2 * sim.UPDATE_PERIOD),
+                                   short.value, places=9)
+
+    def test_get_data(self):
+        tach = sim.DelaySim('-THR1-', 600, 0, 3850.0, 1500)
+        numback = 1500 // sim.UPDATE_PERIOD
+        want = moving_average_t(600, numback, [val * tach.slope for val in inputs_t])
+        for val, expected in zip(inputs_t, want):
+            self.assertAlmostEqual(tach.get_data({'-THR1-': val}), expected, places=9)
+
+    def test_delay_setter_keeps_history(self):
+        tach = sim.DelaySim('-THR1-', 600, 0, 3850.0, 1500)
+        for val in inputs_t[:10]:
+            tach.get_data({'-THR1-': val})
+        newest = tach.backvalues[-3:]
+        tach.delay = 600
+        self.assertEqual(tach.backvalues, newest)
+        self.assertEqual(len(tach.backvalues), 600 // sim.UPDATE_PERIOD)
@@ -0,0 +1,123 @@
+""" Headless fleet simulator.
+Steps N aircraft at once with NumPy arrays.  The physics are the same as
+the scalar classes in simulations.py and the outputs are scaled the same
+way the sensors in sensors.py scale them, so one row of a Fleet reads
+exactly like one cockpit.  Calibration tables convert the whole fleet's
+readings in one convert_array() each """
+import numpy as np
+import simulations as sim
+from sensors import (TACH_SCALE_FACTOR, TEMPR_SCALE_FACTOR, TEMPR_OFFSET,
+                     NO_SPEED, AIRSPEED_SCALE_FACTOR)
+from calibration import Calibration
+from cockpit import DASH_NAMES
+
+#names of the readings returned by Fleet.step, in dash order
+READINGS = DASH_NAMES
+
+
+class FleetAverage:
+    """Moving average for a whole fleet, this is filters.MovingAverage with
+    one column per aircraft.  Every aircraft ticks together so they all
+    share the same head"""
+
+    def __init__(self, size:int, window:int, initVal:float) -> None:
+        window = max(1, int(window))
+        self.data = np.full((window, size), initVal, dtype=float)
+        self.head = 0
+        self.sum = self.data.sum(axis=0)
+        self.value = np.full(size, initVal, dtype=float)
+
+    def step(self, sample:np.ndarray) -> np.ndarray:
+        data = self.data
+        self.sum += sample - data[self.head]
+        data[self.head] = sample
+        self.head += 1
+        if self.head == len(data):
+            # same resync as filters.RingBuffer so rounding can't build up
+            self.head = 0
+            data.sum(axis=0, out=self.sum)
+        np.divide(self.sum, len(data), out=self.value)
+        return self.value
+
+
+class Fleet:
+    """N aircraft built from the constants in simulations.py.
+    Call step() once per tick with the throttle arrays.  calibrations
+    maps 'tach', 'engTemp' or 'airspeed' to a Calibration, the sensors'
+    own scale factors are used for any left out"""
+
+    def __init__(self, size:int, seed:int=None, calibrations:dict=None) -> None:
+        self.size = size
+        calibrations = calibrations or {}
+        self.tach_cal = calibrations.get('tach') or Calibration.linear(TACH_SCALE_FACTOR)
+        self.tempr_cal = calibrations.get('engTemp') or Calibration.linear(TEMPR_SCALE_FACTOR, TEMPR_OFFSET)
+        self.spd_cal = calibrations.get('airspeed') or Calibration.linear(AIRSPEED_SCALE_FACTOR)
+        self.rng = np.random.default_rng(seed)
+        period = sim.UPDATE_PERIOD
+
+        self.tach_slope = (sim.TACH_HIGH_RANGE - sim.TACH_LOW_RANGE) / 100.0
+        self.tach_offset = sim.TACH_LOW_RANGE / self.tach_slope
+        self.tach = FleetAverage(2 * size, sim.TACH_DELAY // period, sim.TACH_INITIAL)
+
+        self.tempr_slope = (sim.TEMPR_HIGH_RANGE - sim.TEMPR_LOW_RANGE) / 100.0
+        self.tempr_offset = sim.TEMPR_LOW_RANGE / self.tempr_slope
+        self.tempr = FleetAverage(2 * size, sim.TEMPR_DELAY // period, sim.TEMPR_INITIAL)
+
+        self.spd_slope = (sim.HIGH_RANGE_SPD - sim.LOW_RANGE_SPD) / 100.0
+        self.spd_offset = sim.LOW_RANGE_SPD / self.spd_slope
+        self.airspeed = FleetAverage(size, sim.DELAY_SPD // period, sim.INITIAL_SPD)
+
+        #rows are the left, center and right tanks, scaled like Fuel.__total
+        self.fuel = np.empty((3, size))
+        self.fuel[0] = sim.INIT_WING / 100
+        self.fuel[1] = sim.INIT_CENTER / 100
+        self.fuel[2] = sim.INIT_WING / 100
+        self.burn_rate = np.full(size, sim.Fuel.BURN_RATE)
+        self.burn_scale = period / sim.Fuel.BURN_PERIOD
+
+        self.heading = np.full(size, float(sim.INIT_DIRECTION))
+
+    def step(self, thr1:np.ndarray, thr2:np.ndarray) -> dict:
+        """advances every aircraft one tick and returns the sensor readings
+        as a dict of arrays keyed by the names in READINGS"""
+        size = self.size
+        thr1 = np.asarray(thr1, dtype=float)
+        thr2 = np.asarray(thr2, dtype=float)
+        both = np.concatenate((thr1, thr2))
+
+        tach = self.tach.step((both - self.tach_offset) * self.tach_slope)
+        tempr = self.tempr.step((both - self.tempr_offset) * self.tempr_slope)
+        spd = self.airspeed.step(((thr1 + thr2) / 2 - self.spd_offset) * self.spd_slope)
+
+        # Fuel.get_data burns the average throttle for one period
+        burn = self.burn_rate * ((thr1 + thr2) / 2) * self.burn_scale
+        fuel = self.fuel
+        fuel -= burn
+        np.maximum(fuel, 0, out=fuel)
+
+        delta = self.rng.random(size) - 0.5 + 0.1
+        self.heading = (self.heading + delta + 360) % 360
+
+        tach = self.tach_cal.convert_array(tach)
+        tempr = self.tempr_cal.convert_array(tempr)
+        speed = np.maximum(np.trunc(self.spd_cal.convert_array(spd)), NO_SPEED)
+        return {'tach1': tach[:size], 'tach2': tach[size:],
+                'engTemp1': tempr[:size], 'engTemp2': tempr[size:],
+                'fuelL': fuel[0].copy(), 'fuelC': fuel[1].copy(), 'fuelR': fuel[2].copy(),
+                'compass': np.floor(self.heading),
+                'airspeed': speed}
+
+    def refuel(self, pounds:float, which:np.ndarray=None) -> None:
+        """adds pounds to the center tank, like the Refuel button.  which
+        is an optional mask or index array of the aircraft to refuel"""
+        which = slice(None) if which is None else which
+        self.fuel[1, which] = np.minimum(self.fuel[1, which] + pounds / 100, 10000 / 100)
+
+    def set_burn_rate(self, rate:float, which:np.ndarray=None) -> None:
+        """same as Fuel.burnRate but per aircraft (landing gear up/down)"""
+        which = slice(None) if which is None else which
+        self.burn_rate[which] = rate
+
+    def set_north(self, which:np.ndarray=None) -> None:
+        which = slice(None) if which is None else which
+        self.heading[which] = 0.0
@@ -0,0 +1,72 @@
+""" Benchmark for the headless fleet simulator.
+Prints ticks per second against fleet size for fleet.Fleet and for a
+plain loop over the scalar simulator and sensor classes.
+
+    python fleet_bench.py [max fleet size]
+"""
+import sys
+import time
+import numpy as np
+import simulations as sim
+from sensors import Tach_sensor, Tempr_sensor, Fuel_sensor, Compass_sensor, Airspeed_sensor
+import fleet
+
+BENCH_SECONDS = 1.0 # time spent on each measurement
+FLEET_SIZES = (1, 10, 100, 1000, 10000, 100000)
+SCALAR_LIMIT = 1000 # the scalar loop gets too slow to measure past this
+
+
+def scalar_aircraft() -> list:
+    """one cockpit worth of sensors, built the way simulations.py builds them"""
+    return [Tach_sensor(sim.DelaySim('-THR1-', sim.TACH_INITIAL, sim.TACH_LOW_RANGE, sim.TACH_HIGH_RANGE, sim.TACH_DELAY)),
+            Tach_sensor(sim.DelaySim('-THR2-', sim.TACH_INITIAL, sim.TACH_LOW_RANGE, sim.TACH_HIGH_RANGE, sim.TACH_DELAY)),
+            Tempr_sensor(sim.DelaySim('-THR1-', sim.TEMPR_INITIAL, sim.TEMPR_LOW_RANGE, sim.TEMPR_HIGH_RANGE, sim.TEMPR_DELAY)),
+            Tempr_sensor(sim.DelaySim('-THR2-', sim.TEMPR_INITIAL, sim.TEMPR_LOW_RANGE, sim.TEMPR_HIGH_RANGE, sim.TEMPR_DELAY)),
+            Fuel_sensor(sim.Fuel('-THR1-', sim.INIT_WING, '-THR2-')),
+            Fuel_sensor(sim.Fuel('-THR1-', sim.INIT_CENTER, '-THR2-')),
+            Fuel_sensor(sim.Fuel('-THR1-', sim.INIT_WING, '-THR2-')),
+            Compass_sensor(sim.Compass('-COMPASS-', sim.INIT_DIRECTION)),
+            Airspeed_sensor(sim.AirSpeed('-THR1-', sim.INITIAL_SPD, sim.LOW_RANGE_SPD, sim.HIGH_RANGE_SPD, sim.DELAY_SPD, '-THR2-'))]
+
+
+def rate(tick) -> float:
+    """calls tick until BENCH_SECONDS has passed and returns ticks/second"""
+    ticks = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < BENCH_SECONDS:
+        tick()
+        ticks += 1
+        elapsed = time.perf_counter() - start
+    return ticks / elapsed
+
+
+def bench_fleet(size:int) -> float:
+    cockpits = fleet.Fleet(size, seed=1)
+    thr1 = np.full(size, 60.0)
+    thr2 = np.full(size, 40.0)
+    return rate(lambda: cockpits.step(thr1, thr2))
+
+
+def bench_scalar(size:int) -> float:
+    aircraft = [scalar_aircraft() for _ in range(size)]
+    values = {'-THR1-': 60.0, '-THR2-': 40.0}
+    def tick():
+        for sensors in aircraft:
+            for sen in sensors:
+                sen.read_sensor(values)
+    return rate(tick)
+
+
+if __name__ == '__main__':
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else FLEET_SIZES[-1]
+    print(f'{"aircraft":>9} {"fleet ticks/s":>14} {"scalar ticks/s":>15} {"speedup":>8}')
+    for size in FLEET_SIZES:
+        if size > max_size:
+            break
+        vector = bench_fleet(size)
+        if size <= SCALAR_LIMIT:
+            scalar = bench_scalar(size)
+            print(f'{size:>9} {vector:>14.1f} {scalar:>15.1f} {vector/scalar:>7.1f}x')
+        else:
+            print(f'{size:>9} {vector:>14.1f} {"-":>15} {"-":>8}')
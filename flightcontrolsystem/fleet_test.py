@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from flightcontrolsystem import fleet_bench
+
+throttles_t = [(10, 10), (60, 40), (100, 100), (100, 0), (35, 80), (0, 0)] * 30
+
+
+class TestFleet(unittest.TestCase):
+    ''' Tests the fleet against the scalar sensors and simulators'''
+
+    def test_matches_scalar(self):
+        size = 3
+        aircraft = fleet_bench.scalar_aircraft()
+        fleet = fleet_bench.fleet.Fleet(size, seed=7)
+        for thr1, thr2 in throttles_t:
+            values = {'-THR1-': thr1, '-THR2-': thr2}
+            got = fleet.step(np.full(size, thr1), np.full(size, thr2))
+            for name, sen in zip(fleet_bench.fleet.READINGS, aircraft):
+                if name == 'compass':
+                    continue
+                want = sen.read_sensor(values)
+                np.testing.assert_allclose(got[name], want, rtol=1e-9, atol=1e-9)
+
+    def test_compass_range(self):
+        fleet = fleet_bench.fleet.Fleet(500, seed=7)
+        for _ in range(50):
+            heading = fleet.step(np.zeros(500), np.zeros(500))['compass']
+        self.assertTrue(((heading >= 0) & (heading < 360)).all())
+
+    def test_refuel(self):
+        fleet = fleet_bench.fleet.Fleet(4)
+        fleet.refuel(750, np.array([True, False, False, True]))
+        self.assertEqual(list(fleet.fuel[1] * 100), [9750, 9000, 9000, 9750])
@@ -1,13 +1,141 @@
 #!python3
 # """ OOP demo/exercise project for 1D731Z class """
-import PySimpleGUI as sg
+import argparse
+import os
+import time
 import simulations
-from simulations import *
-from sensors import *
-from displays import *
-from flightsimexception import FlightSimException
+from cockpit import build_trends, THROTTLES, CONTROLS
+from displays import TrendPlot
+from alerts import AlertBus, Severity
+from scheduler import CommandQueue, FixedRateScheduler, Snapshot
+from widgets import UpdateBatch, bar_quantizer, text_quantizer
+from instrument import Probes
+from flightlog import FlightLog, LogView, parse_filter
+import aircraft
+from validation import Validator, default_rules
 
-class FlightSim():
+#PySimpleGUI (and with it Tk) is only imported once a window is asked
+#for, see load_gui()
+sg = None
+
+FRAME_PERIOD = 50 #ms between redraws of the window
+ALERT_BATCH = 32 #most alerts the flight computer takes in one frame
+LOG_ROWS = 16 #rows of the flight computer log on screen
+TREND_SIZE = (400, 120) #pixels, one column of the trend per pixel across
+TREND_SPANS = {'10 s': 10, '1 min': 60, '10 min': 600, '1 h': 3600} #seconds
+DIAGNOSTICS_PERIOD = 1.0 #seconds between refreshes of the diagnostics panel
+BAR_MAX = 100 #every progress bar reads 0 to BAR_MAX
+
+
+def trend_span(label:str, sample_period:float) -> int:
+    """the samples in one of TREND_SPANS for trends fed every
+    sample_period miliseconds"""
+    return max(1, round(TREND_SPANS[label] * 1000 / sample_period))
+
+
+def instrument_frames(plane:aircraft.Aircraft) -> list:
+    """an sg.Frame for each frame of the profile.  The vertical bars of a
+    frame sit side by side, every other element gets a row of its own"""
+    frames = []
+    for title, size, elements in plane.frames:
+        bars = [sg.ProgressBar(BAR_MAX,'v',(11,10),key=key) for key, widget, _ in elements if widget == 'vbar']
+        rows = [[sg.Push(), *bars, sg.Push()]] if bars else []
+        for key, widget, options in elements:
+            if widget == 'hbar':
+                rows.append([sg.Push(),sg.Text(options.get('label', '')),sg.ProgressBar(BAR_MAX,'h',(10,5),key=key)])
+            elif widget == 'text':
+                rows.append([sg.Push(),sg.Text(options.get('text', ''), size=options.get('size', (3,1)),
+                    font=options.get('font'), justification=options.get('justification', 'center'),
+                    key=key),sg.Push()])
+        frames.append(sg.Frame(title, rows, size=size))
+    return frames
+
+
+def widget_kinds(plane:aircraft.Aircraft) -> dict:
+    """the widget of each element key in the frames of the profile"""
+    return {key: widget for _, _, elements in plane.frames for key, widget, _ in elements}
+
+
+def widget_channel(batch:UpdateBatch, update, widget:str=None):
+    """update callable through batch, quantized to what that kind of
+    widget from instrument_frames() can show"""
+    if widget in ('vbar', 'hbar'):
+        return batch.channel(update, bar_quantizer(BAR_MAX))
+    if widget == 'text':
+        return batch.channel(update, text_quantizer)
+    return batch.channel(update)
+
+
+def load_gui():
+    """imports PySimpleGUI the first time it is needed"""
+    global sg
+    if sg is None:
+        import PySimpleGUI
+        sg = PySimpleGUI
+    return sg
+
+
+class Flight:
+    """Everything FlightSim flies apart from the window and its threads,
+    the aircraft's cockpit with its validator and rate groups, the trends,
+    the flight computer log and the widget batch.  window is the
+    PySimpleGUI window or a StubWindow, trend_draw the callable the
+    visible trend is drawn with, window['-TREND-'].update when None, and
+    log a folder for the flight computer log"""
+
+    def __init__(self, plane:aircraft.Aircraft, window, tick_period:float=simulations.UPDATE_PERIOD,
+                 frame_period:float=FRAME_PERIOD, trend_draw=None, log:str=None) -> None:
+        self.aircraft = plane
+        self.window = window
+        self.tick_period = tick_period
+        self.frame_period = frame_period
+
+        #the sensors and displays, the cockpit flies its own simulators
+        #the displays update the elements through the batch, see widgets.py
+        self.widgets = UpdateBatch()
+        self.kinds = widget_kinds(plane)
+        self.alerts = AlertBus()
+        self.cockpit = plane.cockpit(self.widget_channel, self.alerts)
+        self.dash = self.cockpit.dash
+        names = self.cockpit.names
+        #bad readings are reported and held before they reach the displays
+        self.cockpit.validator = Validator(default_rules(), names, self.alerts)
+        #the slow instruments are read in turns, a few every tick, so the
+        #tick can be fast without reading everything that often
+        self.cockpit.set_rates(plane.rates, tick_period)
+
+        #every trend keeps its history but only the one picked is drawn
+        draw_for = (lambda name: trend_draw) if trend_draw is not None else (lambda name: window['-TREND-'].update)
+        self.trends = build_trends(draw_for, self.trend_span('1 min'), TREND_SIZE[0], plane.trends)
+        self.trend_index = [(names.index(name), trend) for name, trend in self.trends.items()]
+
+        #the flight computer keeps every alert in the log and only draws
+        #the rows that fit, see flightlog.py
+        self.log = FlightLog(folder=log)
+        self.log_view = LogView(self.log, LOG_ROWS)
+
+    def widget_channel(self, key:str):
+        """update callable for the element with this key"""
+        return widget_channel(self.widgets, self.window[key].update, self.kinds.get(key))
+
+    def trend_span(self, label:str) -> int:
+        """the samples in one of TREND_SPANS.  The trends are fed once for
+        each snapshot drawn, so at most once a frame and once a tick"""
+        return trend_span(label, max(self.tick_period, self.frame_period))
+
+    def trend_default(self) -> str:
+        """the trend shown first, airspeed when the aircraft has one and
+        None when it has no trends at all"""
+        trends = self.aircraft.trends
+        return 'airspeed' if 'airspeed' in trends else next(iter(trends), None)
+
+    def show_trend(self, name:str) -> None:
+        for other, trend in self.trends.items():
+            trend.visible = other == name
+        self.trends[name].draw()
+
+
+class FlightSim(Flight):
     """This class encapsulates the GUI for the application"""
    
     #The landing gear display is not a standard element within PySimpleGUI
@@ -18,33 +146,34 @@ class FlightSim():
     lg_left = None
     lg_right = None
 
-    def __init__(self) -> None:
-        
+    def __init__(self, tick_period:float=simulations.UPDATE_PERIOD, frame_period:float=FRAME_PERIOD,
+                 record:str=None, replay:str=None, profile:str=None, diagnostics:bool=False,
+                 devices:str=None, telemetry:str=None, log:str=None, plane:str=aircraft.DEFAULT,
+                 bus:str=None) -> None:
+        """tick_period is the simulation rate and frame_period the redraw
+        rate of the window, both in miliseconds.  record is a file to save
+        the flight to and replay a recorded flight to fly instead of the
+        controls.  profile is a file the stage timings are saved to on exit
+        and diagnostics shows them live in the window, with neither of them
+        the timing hooks are left out entirely.  devices moves the sensors
+        onto the asyncio acquisition, 'sim' polls the simulators and
+        host:port polls the stand-in devices, see acquisition.py.
+        telemetry is the host:port or Unix socket path to stream the
+        readings and alerts to the ground station on, see telemetry.py.
+        log is a folder the flight computer log is also written to.
+        plane is the aircraft profile to fly, see aircraft.py.  bus is the
+        name of a shared memory frame bus for viewer windows, see
+        framebus.py"""
+
         #GUI Definition and Layout
+        load_gui()
         sg.theme('DarkAmber')
 
         # our instance variables
         self.window = None
-        self.dash = []        
-
-        airspeed_frame = sg.Frame('Air Speed',
-                [[sg.Push(),sg.Text('0', size = (3,2),font='Calibri 36 bold',justification='right',
-                key='-AIRSPEED-'),sg.Push()]],size=(100,150))
-
-        engine_temp_frame = sg.Frame('Engine Temp',
-                [[sg.Push(), sg.ProgressBar(100,'v',(11,10), key='-ET1-'),
-                sg.ProgressBar(100,'v',(11,10), key='-ET2-'), sg.Push()]],size=(90,150))
-
-        compass_frame = sg.Frame('Compass',
-                [[sg.Push(),sg.Text('359', size = (3,1),font='Calibri 36 bold',
-                    justification='center', key='-COMPASS-'),sg.Push()],
-                [sg.Push(),sg.Text('N', size = (3,1),font='Calibri 24 bold',
-                    justification='center', key='-DIR-'),sg.Push()]],
-                size=(100,150))
-
-        tachometer_frame = sg.Frame('Tachometer',
-                [[sg.Push(), sg.ProgressBar(100,'v',(11,10), key='-TACH1-'),
-                sg.ProgressBar(100,'v',(11,10), key='-TACH2-'), sg.Push()]],size=(90,150))
+        #the instruments, their frames and their simulators come from the
+        #compiled aircraft profile
+        self.aircraft = aircraft.load(plane)
 
         throttle_frame = sg.Frame('Throttle',
                 [[sg.Slider(range=(0,100),default_value=10,orientation='v',size=(7,12),key='-THR1-'),
@@ -56,23 +185,38 @@ class FlightSim():
                     background_color='gray', key='-LG_DISP-')],
                 [sg.Push(),sg.Button('DN',key='-DN-'),sg.Push()]])
 
-        fuel_guage_frame = sg.Frame('Fuel',
-                [[sg.Push(),sg.Text('Left'),sg.ProgressBar(100,'h',(10,5),key=('-FUELLEFT-'))],
-                [sg.Push(),sg.Text('Center'),sg.ProgressBar(100,'h',(10,5),key=('-FUELCENTER-'))],
-                [sg.Push(),sg.Text('Right'),sg.ProgressBar(100,'h',(10,5),key=('-FUELRIGHT-'))]],size=(200,110))
-
         flight_computer_frame = sg.Frame('Flight Computer',
-                [[sg.Multiline('Status: Power up normal\n',size=(25,20),key='-COMPUTER-')]],size=(200,200))
+                [[sg.Multiline('',size=(25,LOG_ROWS),key='-COMPUTER-')],
+                [sg.Input('',size=(14,1),key='-LOGFILTER-',enable_events=True),
+                 sg.Button('\u25b2',key='-LOGUP-'),sg.Button('\u25bc',key='-LOGDN-')]],size=(200,200))
 
-        layout = [[sg.Text('Air Force POOP Drone Flight Simulator')],
+        #an aircraft without any trends gets no trend frame
+        trend_rows = []
+        if self.trend_default() is not None:
+            trend_frame = sg.Frame('Trend',
+                    [[sg.Graph(canvas_size=TREND_SIZE, graph_bottom_left=(0,TREND_SIZE[1]),
+                        graph_top_right=(TREND_SIZE[0],0), background_color='black', key='-TREND-'),
+                    sg.Column([[sg.Combo(tuple(self.aircraft.trends),default_value=self.trend_default(),readonly=True,
+                                         enable_events=True,key='-TRENDSRC-')],
+                               [sg.Combo(tuple(TREND_SPANS),default_value='1 min',readonly=True,
+                                         enable_events=True,key='-TRENDSPAN-')]])]])
+            trend_rows.append([sg.Push(),trend_frame,sg.Push()])
+
+        layout = [[sg.Text(self.aircraft.title)],
                 [sg.HorizontalSeparator()],
-                [sg.Push(),airspeed_frame,engine_temp_frame,tachometer_frame,fuel_guage_frame,compass_frame,sg.Push()],
+                [sg.Push(),*instrument_frames(self.aircraft),sg.Push()],
                 [sg.HorizontalSeparator()],
                 [sg.Push(),throttle_frame,flight_computer_frame,landing_gear_frame,sg.Push()],
+                *trend_rows,
                 [sg.Exit(),sg.Button('Refuel',key='-REFUEL-'),sg.Button('Set North',key='-NORTH-')]]
+        size = (650,620)
+        if diagnostics:
+            layout.append([sg.Frame('Diagnostics',
+                [[sg.Multiline('',size=(60,12),font='Courier 9',disabled=True,key='-DIAG-')]])])
+            size = (650,850)
 
         #create the main window
-        self.window = sg.Window('AF POOP Drone Simulator', layout, size=(650,450),finalize=True)
+        self.window = sg.Window(self.aircraft.name, layout, size=size,finalize=True)
         #get the canvas and give it an identifier which can be used by graphing tools
         #to create a custom landing gear display
         FlightSim.lg_disp = self.window['-LG_DISP-']
@@ -80,83 +224,202 @@ class FlightSim():
         FlightSim.lg_nose = FlightSim.lg_disp.DrawCircle((40,25),8, fill_color='green',line_color='green')
         FlightSim.lg_right = FlightSim.lg_disp.DrawCircle((62,25),8, fill_color='green',line_color='green')
 
-        '''attach either hardware or a simulator to the sensor
-        and configure the display for the sensor
-        note, this requires the simulators to be defined as global
-        V     V     V     V     V     V     V     V     V     V     V'''
-
-        tach1_sens = Tach_sensor(simulations.tach1_)
-        tach1_disp = TachBar(self.window['-TACH1-'].update,875,850,990)
-        tach2_sens = Tach_sensor(simulations.tach2_)
-        tach2_disp = TachBar(self.window['-TACH2-'].update,875,850,990)
-
-        comp_sens = Compass_sensor(simulations.compass_)
-        comp_disp = CompassDisp(self.window['-COMPASS-'].update, self.window['-DIR-'].update)
-
-        engTemp1_sens = Tempr_sensor(simulations.engTemp1_)
-        engTemp1_disp = Bar(self.window['-ET1-'].update,875,850,990)
-        engTemp2_sens = Tempr_sensor(simulations.engTemp2_)
-        engTemp2_disp = Bar(self.window['-ET2-'].update,875,850,990)
-
-        fuelL_sens = Fuel_sensor(simulations.fuelL_)
-        fuelL_disp = Fuel_Level(self.window['-FUELLEFT-'].update)
-        fuelC_sens = Fuel_sensor(simulations.fuelC_)
-        fuelC_disp = Fuel_Level(self.window['-FUELCENTER-'].update)
-        fuelR_sens = Fuel_sensor(simulations.fuelR_)
-        fuelR_disp = Fuel_Level(self.window['-FUELRIGHT-'].update)
+        #the cockpit, trends and flight computer log, see Flight
+        self.trend_plot = TrendPlot(self.window['-TREND-'], TREND_SIZE) if trend_rows else None
+        super().__init__(self.aircraft, self.window, tick_period, frame_period, self.trend_plot, log)
+        names = self.cockpit.names
+        if self.trend_plot is not None:
+            self.show_trend(self.trend_default())
+        self.alerts.publish(Severity.INFO, 'computer', 'Status: Power up normal')
 
-        airspeed_sens = Airspeed_sensor(simulations.airspeed_)
-        airspeed_disp = AirspeedDisp(self.window['-AIRSPEED-'].update,875,850,990)
+        #timing hooks, see instrument.py
+        self.profile = profile
+        self.diagnostics = diagnostics
+        self.probes = Probes(enabled=bool(profile or diagnostics))
+        self.probes.wrap_dash(self.dash, names)
+        self._step = self.probes.wrap('step', self.cockpit.step)
+        validator = self.cockpit.validator
+        validator.check = self.probes.wrap('validate', validator.check)
+        self._print = self.probes.wrap('print', print)
 
-        #appends values to dash list to be displayed
-        self.dash.append((tach1_sens,tach1_disp))
-        self.dash.append((tach2_sens,tach2_disp))
+        #the simulation ticks on its own thread, controls go to it through
+        #the command queue and it publishes a snapshot every tick
+        self.commands = CommandQueue()
+        self.throttles = {} #last throttle positions sent to the simulation
+        self.snapshot = None
+        self.last_tick = None #perf_counter of the last tick, for its dt
+        self.scheduler = FixedRateScheduler(self.probes.wrap('tick', self.tick), tick_period, self.alerts)
+        self.acquisition = None
+        if devices:
+            import acquisition
+            sources = None
+            if devices != 'sim':
+                host, _, port = devices.rpartition(':')
+                sources = acquisition.stand_in_sources((host or '127.0.0.1', int(port)))
+            self.acquisition = acquisition.acquire(self.cockpit, sources, period=tick_period,
+                                                   rates=self.aircraft.rates)
+        self.telemetry = None
+        if telemetry:
+            from telemetry import Publisher, parse_address
+            self.telemetry = Publisher(parse_address(telemetry), names)
+        self.bus = None
+        if bus:
+            from framebus import FrameBus
+            #a viewer may be started from another folder
+            self.bus = FrameBus(names, os.path.abspath(plane), bus)
+            self.bus.publish = self.probes.wrap('bus', self.bus.publish)
+            print(f'viewers: python framebus.py view {self.bus.name}')
+        self.recorder = None
+        self.replay = None
+        if record or replay:
+            from recorder import Recorder, Recording, Replay, TICK_COLUMNS
+            if record:
+                self.recorder = Recorder(record, TICK_COLUMNS + THROTTLES + names, self.cockpit.sims)
+                self.recorder.record = self.probes.wrap('record', self.recorder.record)
+            if replay:
+                self.replay = Replay(Recording(replay), self.cockpit)
 
-        self.dash.append((engTemp1_sens,engTemp1_disp))
-        self.dash.append((engTemp2_sens,engTemp2_disp))
+    def show_trend(self, name:str) -> None:
+        self.trend_plot.show(self.trends[name])
+        super().show_trend(name)
 
-        self.dash.append((fuelL_sens,fuelL_disp))
-        self.dash.append((fuelC_sens,fuelC_disp))
-        self.dash.append((fuelR_sens,fuelR_disp))
-
-        self.dash.append((comp_sens,comp_disp))
-
-        self.dash.append((airspeed_sens,airspeed_disp))
-
-        # the entire dashboard pairs the sensor to the display and stores
-        # the respective methods as a list of tuples
+    def tick(self):
+        """one simulation tick, this runs on the scheduler thread"""
+        #the simulation integrates over the time that really passed, so a
+        #late or skipped tick does not change the physics
+        now = time.perf_counter()
+        dt = self.tick_period if self.last_tick is None else (now - self.last_tick) * 1000
+        self.last_tick = now
+        if self.replay is None:
+            readings = self._step(self.commands.drain(), dt)
+        elif not self.replay.done:
+            readings = self.replay.step()
+        else:
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.cockpit.ticks, self.cockpit.pressed, self.cockpit.values, readings,
+                                 self.cockpit.dt, self.cockpit.fresh)
+        if self.telemetry is not None:
+            self.telemetry.readings(self.cockpit.ticks, readings)
+        if self.bus is not None:
+            self.bus.publish(self.cockpit.ticks, readings)
+        self.snapshot = Snapshot(self.cockpit.ticks, readings)
+        self._print(self.cockpit.tank)#prints fuel level
 
+    def send_controls(self, event, values:dict):
+        """queues the throttles that moved and any control button"""
+        for key in THROTTLES:
+            if values[key] != self.throttles.get(key):
+                self.throttles[key] = values[key]
+                self.commands.put(key, values[key])
+        if event in CONTROLS:
+            self.commands.put(event)
 
     def run(self):
 
-        #Event loop to run the program
-        while True:
-            try:
-                # the event loop frequency is set in the simulation
-                event, values = self.window.read(timeout=simulations.UPDATE_PERIOD)
+        shown = None
+        refreshed = 0.0
+        #each stage is timed when the probes are on, otherwise these are
+        #the plain methods
+        wrap = self.probes.wrap
+        read = wrap('window.read', self.window.read)
+        send_controls = wrap('controls', self.send_controls)
+        show = wrap('show', self.cockpit.show)
+        log = wrap('alerts', self.log.extend)
+        render = wrap('log', self.log_view.render)
+        computer = self.window['-COMPUTER-']
+        flush = wrap('flush', self.widgets.flush)
+        try:
+            if self.acquisition is not None:
+                self.acquisition.start()
+            if self.telemetry is not None:
+                self.telemetry.start()
+            self.scheduler.start()
+            #Event loop to run the program, this only draws the latest snapshot
+            while True:
+                event, values = read(timeout=self.frame_period)
                 #print(event,'====', values)
                 if event == sg.WIN_CLOSED or event == 'Exit':
                     break
-                if event == '-REFUEL-':
-                    simulations.fuelC_.total += 750
-                if event == '-NORTH-':
-                    simulations.compass_.initVal = 0 #sets compass to North
-                    raise FlightSimException('North is set')
-                if event == '-UP-':
-                    Fuel.burnRate(0.001) #changes Fuel BURN_RATE when UP is pressed
-                    raise FlightSimException('Landing Gear Up')
-                if event == '-DN-':
-                    Fuel.burnRate(0.002) #changes Fuel BURN_RATE when DN is pressed
-                    raise FlightSimException('Landing Gear Down')
-                #read the sensors and update the displays
-                for sen,disp in self.dash:
-                    disp.update(sen.read_sensor(values))
-            except FlightSimException as e:
-                self.window['-COMPUTER-'].print(e)
-            print(simulations.fuelC_)#prints fuel level
+                send_controls(event, values)
+                if event == '-LOGFILTER-':
+                    self.log_view.set_filter(parse_filter(values['-LOGFILTER-'], self.log.source_names))
+                elif event == '-LOGUP-':
+                    self.log_view.scroll(LOG_ROWS)
+                elif event == '-LOGDN-':
+                    self.log_view.scroll(-LOG_ROWS)
+                elif event == '-TRENDSRC-':
+                    self.show_trend(values['-TRENDSRC-'])
+                elif event == '-TRENDSPAN-':
+                    span = self.trend_span(values['-TRENDSPAN-'])
+                    for trend in self.trends.values():
+                        trend.span = span
+                    self.show_trend(values['-TRENDSRC-'])
+                snapshot = self.snapshot
+                if snapshot is not None and snapshot is not shown:
+                    shown = snapshot
+                    #update the displays
+                    show(snapshot.readings)
+                    for index, trend in self.trend_index:
+                        trend.update(snapshot.readings[index])
+                #the flight computer takes the alerts in batches
+                batch = self.alerts.drain(ALERT_BATCH)
+                if batch:
+                    log(batch)
+                    if self.telemetry is not None:
+                        self.telemetry.alerts(self.cockpit.ticks, batch)
+                    if self.bus is not None:
+                        self.bus.alerts(batch)
+                text = render()
+                if text is not None:
+                    computer.update(text)
+                #whatever changed this frame goes to Tk in one pass
+                flush()
+                if self.diagnostics and time.monotonic() - refreshed > DIAGNOSTICS_PERIOD:
+                    refreshed = time.monotonic()
+                    self.window['-DIAG-'].update(self.probes.text())
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """stops everything run() started, it runs however run() ends"""
+        self.scheduler.stop()
+        if self.acquisition is not None:
+            self.acquisition.stop()
+            for stats in self.acquisition.stats():
+                print(stats)
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        if self.bus is not None:
+            self.bus.close()
+        self.log.close()
+        if self.profile:
+            self.probes.export(self.profile)
+        print(self.scheduler.stats())
+        print(self.widgets.stats())
+        if self.recorder is not None:
+            self.recorder.close()
+            print(self.recorder.overhead())
         self.window.close()
 
 if __name__ == "__main__":
     """Creates the primary GUI display and runs the event loop"""
-    fs = FlightSim()
+    parser = argparse.ArgumentParser(description='AF POOP Drone Simulator')
+    parser.add_argument('--record', help='save the flight to this file')
+    parser.add_argument('--replay', help='fly a recorded flight')
+    parser.add_argument('--profile', help='save the stage timings to this file on exit')
+    parser.add_argument('--diagnostics', action='store_true', help='show the stage timings live')
+    parser.add_argument('--devices', help="read the sensors asynchronously, 'sim' or the host:port "
+                        'of the stand-in devices (python acquisition.py)')
+    parser.add_argument('--telemetry', help='stream to ground stations on this host:port or Unix socket path')
+    parser.add_argument('--log', help='also write the flight computer log to this folder')
+    parser.add_argument('--aircraft', default=aircraft.DEFAULT, help='the aircraft profile to fly, see profiles/')
+    parser.add_argument('--bus', help='share the flight on a frame bus of this name for viewer windows, '
+                        'python framebus.py view <name>')
+    parser.add_argument('--tick', type=float, default=simulations.UPDATE_PERIOD,
+                        help='miliseconds between simulation ticks, 20 reads the fast instruments at 50 Hz')
+    args = parser.parse_args()
+    fs = FlightSim(tick_period=args.tick, record=args.record, replay=args.replay, profile=args.profile,
+                   diagnostics=args.diagnostics, devices=args.devices, telemetry=args.telemetry,
+                   log=args.log, plane=args.aircraft, bus=args.bus)
     fs.run()
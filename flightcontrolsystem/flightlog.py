@@ -0,0 +1,278 @@
+""" Flight computer log.
+Every alert goes into a fixed size ring, indexed by time, severity and
+source, and optionally out to numbered segment files on disk so nothing
+is lost once the ring wraps.  A LogView renders only the rows that fit
+in the -COMPUTER- element, with an optional filter, so the widget text
+stays the same size however long the flight is and filtering hours of
+alerts only ever touches the entries that match """
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+from alerts import Alert, Severity
+
+LOG_SIZE = 50000 #entries kept in memory
+SEGMENT_SIZE = 10000 #entries per file on disk
+VIEW_ROWS = 20 #rows the flight computer shows
+
+
+class _Index:
+    """ascending sequence numbers of the entries with one key, old ones
+    are trimmed off the front as the ring wraps"""
+    __slots__ = ('seqs', 'head')
+
+    def __init__(self) -> None:
+        self.seqs = array('q')
+        self.head = 0
+
+    def append(self, seq:int) -> None:
+        self.seqs.append(seq)
+
+    def trim(self, first:int) -> None:
+        seqs = self.seqs
+        self.head = bisect_left(seqs, first, self.head)
+        if self.head > 1024 and self.head * 2 > len(seqs):
+            del seqs[:self.head]
+            self.head = 0
+
+    def between(self, lo:int, hi:int) -> array:
+        """the seqs from lo up to but not including hi"""
+        seqs = self.seqs
+        return seqs[bisect_left(seqs, lo, self.head):bisect_left(seqs, hi, self.head)]
+
+
+class Filter(NamedTuple):
+    """what a LogView shows, an entry must match everything that is set"""
+    severity: Severity = None # this severity or worse
+    source: str = None
+    text: str = None # found anywhere in the message, ignoring case
+    since: float = None # time.time() bounds
+    until: float = None
+
+
+def parse_filter(text:str, sources=()) -> Filter:
+    """a Filter from what was typed in the filter box.  A severity name
+    sets the severity, a known source sets the source and any other
+    words are searched for in the messages"""
+    severity = source = None
+    words = []
+    for word in text.split():
+        if word.upper() in Severity.__members__:
+            severity = Severity[word.upper()]
+        elif word in sources:
+            source = word
+        else:
+            words.append(word)
+    return Filter(severity, source, ' '.join(words) or None)
+
+
+class FlightLog:
+    """Ring of the last size alerts.  Entries are numbered from 0 in the
+    order they arrive, the ring holds seq first up to count.  With a
+    folder every entry is also written to segment files there"""
+
+    def __init__(self, size:int=LOG_SIZE, folder:str=None, segment_size:int=SEGMENT_SIZE) -> None:
+        self.size = size
+        self.times = array('d', [0.0]) * size
+        self.severities = bytearray(size)
+        self.sources = array('H', [0]) * size
+        self.messages = [None] * size
+        self.source_names = [] # source id -> name
+        self._source_ids = {}
+        self.by_severity = [_Index() for _ in Severity]
+        self.by_source = []
+        self.count = 0
+        self.folder = folder
+        self.segment_size = segment_size
+        self._segment = None
+        self._segments = 0 # number of this log's first segment file
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+            # a folder used before keeps its flights, this one carries on
+            # after the last segment on disk rather than writing into it
+            numbers = [int(name[4:-4]) for name in os.listdir(folder)
+                       if name.startswith('log-') and name.endswith('.tsv') and name[4:-4].isdigit()]
+            self._segments = max(numbers, default=-1) + 1
+
+    @property
+    def first(self) -> int:
+        return max(0, self.count - self.size)
+
+    def __len__(self) -> int:
+        return self.count - self.first
+
+    def append(self, alert:Alert) -> int:
+        """adds one alert and returns its seq"""
+        seq = self.count
+        slot = seq % self.size
+        source = self._source_ids.get(alert.source)
+        if source is None:
+            source = self._source_ids[alert.source] = len(self.source_names)
+            self.source_names.append(alert.source)
+            self.by_source.append(_Index())
+        self.times[slot] = alert.timestamp
+        self.severities[slot] = alert.severity
+        self.sources[slot] = source
+        self.messages[slot] = alert.message
+        self.by_severity[alert.severity].append(seq)
+        self.by_source[source].append(seq)
+        self.count = seq + 1
+        if self.folder:
+            self._write(seq, alert)
+        if seq >= self.size and seq % self.size == 0:
+            # once per lap is enough to keep the indexes from growing
+            first = self.first
+            for index in self.by_severity + self.by_source:
+                index.trim(first)
+        return seq
+
+    def extend(self, alerts) -> None:
+        for alert in alerts:
+            self.append(alert)
+
+    def entry(self, seq:int) -> Alert:
+        if not self.first <= seq < self.count:
+            raise IndexError(f'entry {seq} is not in the ring')
+        slot = seq % self.size
+        return Alert(Severity(self.severities[slot]), self.source_names[self.sources[slot]],
+                     self.times[slot], self.messages[slot])
+
+    def seq_at(self, stamp:float, after:bool=False) -> int:
+        """the first seq at time stamp or later, or with after strictly
+        later.  The alerts arrive in time order so this is a binary search
+        of the ring"""
+        lo, hi = self.first, self.count
+        times, size = self.times, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[mid % size] < stamp or (after and times[mid % size] == stamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def select(self, filt:Filter, lo:int=None, hi:int=None) -> list:
+        """the seqs from lo to hi that match filt, oldest first.  The time
+        bounds and the indexes narrow the search before any message is
+        looked at"""
+        lo = self.first if lo is None else max(lo, self.first)
+        hi = self.count if hi is None else min(hi, self.count)
+        if filt.since is not None:
+            lo = max(lo, self.seq_at(filt.since))
+        if filt.until is not None:
+            hi = min(hi, self.seq_at(filt.until, after=True))
+        if lo >= hi:
+            return []
+        if filt.source is not None:
+            source = self._source_ids.get(filt.source)
+            if source is None:
+                return []
+            seqs = self.by_source[source].between(lo, hi)
+            if filt.severity is not None:
+                severities, size, least = self.severities, self.size, filt.severity
+                seqs = [seq for seq in seqs if severities[seq % size] >= least]
+        elif filt.severity is not None:
+            seqs = []
+            for index in self.by_severity[filt.severity:]:
+                seqs.extend(index.between(lo, hi))
+            seqs.sort()
+        else:
+            seqs = range(lo, hi)
+        if filt.text:
+            text = filt.text.lower()
+            messages, size = self.messages, self.size
+            seqs = [seq for seq in seqs if text in messages[seq % size].lower()]
+        return list(seqs)
+
+    def _write(self, seq:int, alert:Alert) -> None:
+        if seq % self.segment_size == 0 or self._segment is None:
+            if self._segment is not None:
+                self._segment.close()
+            path = os.path.join(self.folder, f'log-{self._segments + seq // self.segment_size:06d}.tsv')
+            self._segment = open(path, 'x', encoding='utf-8')
+        message = alert.message.replace('\t', ' ').replace('\n', ' ')
+        self._segment.write(f'{alert.timestamp!r}\t{alert.severity.name}\t{alert.source}\t{message}\n')
+
+    def flush(self) -> None:
+        if self._segment is not None:
+            self._segment.flush()
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    @staticmethod
+    def read_segments(folder:str):
+        """every alert written to the segment files in folder, oldest first"""
+        for name in sorted(os.listdir(folder)):
+            if not (name.startswith('log-') and name.endswith('.tsv')):
+                continue
+            with open(os.path.join(folder, name), encoding='utf-8') as file:
+                for line in file:
+                    stamp, severity, source, message = line.rstrip('\n').split('\t', 3)
+                    yield Alert(Severity[severity], source, float(stamp), message)
+
+
+def format_entry(alert:Alert) -> str:
+    """one row of the flight computer"""
+    clock = time.strftime('%H:%M:%S', time.localtime(alert.timestamp))
+    if alert.severity == Severity.INFO:
+        return f'{clock} {alert.message}'
+    return f'{clock} {alert.severity.name[0]} {alert.message}'
+
+
+class LogView:
+    """The rows of a FlightLog that fit in the widget.  The matches of the
+    filter are kept and only the entries added since the last render are
+    checked, so a steady filter costs nothing per frame.  offset is how
+    many matches back from the newest the bottom row is, 0 follows the
+    tail and anything else stays put as new entries arrive"""
+
+    def __init__(self, log:FlightLog, rows:int=VIEW_ROWS) -> None:
+        self.log = log
+        self.rows = rows
+        self.filter = Filter()
+        self.offset = 0
+        self._matches = []
+        self._scanned = log.first # matches are up to date below this seq
+        self._shown = None
+
+    def set_filter(self, filt:Filter) -> None:
+        if filt != self.filter:
+            self.filter = filt
+            self.offset = 0
+            self._matches = []
+            self._scanned = self.log.first
+
+    def scroll(self, rows:int) -> None:
+        """positive rows moves back in time"""
+        self.offset = max(0, min(self.offset + rows, len(self._matches) - self.rows))
+
+    def matches(self) -> list:
+        log = self.log
+        if self._scanned < log.count:
+            new = log.select(self.filter, self._scanned, log.count)
+            self._matches.extend(new)
+            self._scanned = log.count
+            if self.offset:
+                # a view scrolled back stays on the same rows
+                self.offset += len(new)
+        first = log.first
+        if self._matches and self._matches[0] < first:
+            del self._matches[:bisect_right(self._matches, first - 1)]
+        return self._matches
+
+    def render(self) -> str:
+        """the visible rows as text, or None when they have not changed
+        since the last render"""
+        matches = self.matches()
+        end = len(matches) - self.offset
+        visible = matches[max(0, end - self.rows):end]
+        key = (visible[0] if visible else None, visible[-1] if visible else None, len(visible))
+        if key == self._shown:
+            return None
+        self._shown = key
+        entry = self.log.entry
+        return '\n'.join(format_entry(entry(seq)) for seq in visible)
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+from flightcontrolsystem import flightlog
+from flightcontrolsystem.alerts import Alert, Severity
+
+sources_t = ('tach1', 'fuelC', 'airspeed')
+
+
+def alerts_t(count, start=1000.0):
+    '''one alert a second cycling through the sources and severities'''
+    return [Alert(Severity(i % 4), sources_t[i % 3], start + i, f'message {i}') for i in range(count)]
+
+
+class TestFlightLog(unittest.TestCase):
+    ''' Tests the ring and its indexes'''
+
+    def test_ring_wraps(self):
+        log = flightlog.FlightLog(size=100)
+        log.extend(alerts_t(250))
+        self.assertEqual((log.first, log.count, len(log)), (150, 250, 100))
+        self.assertEqual(log.entry(249).message, 'message 249')
+        with self.assertRaises(IndexError):
+            log.entry(149)
+
+    def test_select_matches_scan(self):
+        log = flightlog.FlightLog(size=100)
+        entries = alerts_t(250)
+        log.extend(entries)
+        filters = [flightlog.Filter(),
+                   flightlog.Filter(severity=Severity.WARNING),
+                   flightlog.Filter(source='fuelC'),
+                   flightlog.Filter(Severity.CAUTION, 'airspeed', '2'),
+                   flightlog.Filter(text='MESSAGE 20', since=1190.0, until=1220.0)]
+        for filt in filters:
+            want = [seq for seq in range(150, 250)
+                    if (filt.severity is None or entries[seq].severity >= filt.severity)
+                    and (filt.source is None or entries[seq].source == filt.source)
+                    and (filt.text is None or filt.text.lower() in entries[seq].message)
+                    and (filt.since is None or entries[seq].timestamp >= filt.since)
+                    and (filt.until is None or entries[seq].timestamp <= filt.until)]
+            self.assertEqual(log.select(filt), want, filt)
+
+    def test_parse_filter(self):
+        filt = flightlog.parse_filter('warning fuelC low', sources_t)
+        self.assertEqual(filt, flightlog.Filter(Severity.WARNING, 'fuelC', 'low'))
+
+    def test_segments(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = flightlog.FlightLog(size=10, folder=folder, segment_size=7)
+            log.extend(alerts_t(30))
+            log.close()
+            self.assertEqual(list(flightlog.FlightLog.read_segments(folder)), alerts_t(30))
+            # a second flight in the same folder follows the first one
+            again = flightlog.FlightLog(size=10, folder=folder, segment_size=7)
+            again.extend(alerts_t(10))
+            again.close()
+            self.assertEqual(list(flightlog.FlightLog.read_segments(folder)), alerts_t(30) + alerts_t(10))
+            self.assertEqual(len(os.listdir(folder)), 5 + 2)
+
+
+class TestLogView(unittest.TestCase):
+    ''' Tests rendering the visible rows'''
+
+    def test_follows_tail(self):
+        log = flightlog.FlightLog(size=1000)
+        view = flightlog.LogView(log, rows=5)
+        log.extend(alerts_t(50, time.time()))
+        rows = view.render().splitlines()
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(rows[-1].endswith('message 49'))
+        self.assertIsNone(view.render()) # nothing new
+        view.scroll(10)
+        self.assertTrue(view.render().splitlines()[-1].endswith('message 39'))
+
+    def test_filter_is_incremental(self):
+        log = flightlog.FlightLog(size=1000)
+        view = flightlog.LogView(log, rows=5)
+        view.set_filter(flightlog.Filter(source='fuelC'))
+        log.extend(alerts_t(30))
+        self.assertEqual(view.matches(), list(range(1, 30, 3)))
+        log.extend(alerts_t(30, 2000.0))
+        self.assertEqual(view.matches(), list(range(1, 60, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
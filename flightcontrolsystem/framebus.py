@@ -0,0 +1,356 @@
+""" Shared memory frame bus for cockpit viewers.
+The simulation writes every tick's readings, and the alerts the flight
+computer takes, into one multiprocessing.shared_memory block.  Viewer
+processes attach to it by name and draw the same displays from the same
+aircraft profile, so the pilot, instructor and maintenance windows can
+all fly off one simulation.  Nothing is sent to a viewer and viewers
+never write, so the simulation costs the same with none or with ten.
+
+The block is the header, the aircraft and column names as JSON, the
+frame and the alert ring, each 8 byte aligned
+    frame   seq, tick, time.time() and one double per column
+    alerts  seq, alerts written so far and ALERT_SLOTS fixed size slots
+
+Each of the frame and the alerts has one writer, the tick thread and the
+window thread, and is guarded by its own sequence counter: odd while it
+is being written, even once it is whole.  A reader copies what it wants
+and keeps it only when the counter was even and did not move meanwhile,
+so it never sees a torn frame and never holds up the writer
+
+    python framebus.py view <name> [--raw]    a viewer window on a bus
+    python framebus.py bench                  publish cost against viewers
+"""
+import json
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import NamedTuple
+from alerts import Alert, AlertBus, Severity
+
+MAGIC = b'FSFB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII') # magic, version, columns, alert slots, length of names
+SEQ = struct.Struct('<Q')
+ALERT_SLOT = struct.Struct('<dB32p87p') # time, severity, source, message, 128 bytes
+ALERT_SLOTS = 64 #alerts a viewer may fall behind before the oldest are lost
+CLOSED = 2**64 - 1 #seq of a bus the simulation has closed, odd so no read succeeds
+RETRIES = 100 #attempts at a frame that keeps changing before giving up until the next read
+
+
+def _aligned(size:int) -> int:
+    return size + (-size % 8)
+
+
+def _attach(name:str) -> shared_memory.SharedMemory:
+    """an existing block, kept from the resource tracker.  The tracker
+    would unlink it when this process exits, but it is the simulation's,
+    and unregistering afterwards would also drop the simulation's entry
+    when both share a tracker"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class BusFrame(NamedTuple):
+    """one tick as a viewer sees it, number counts the frames published"""
+    number: int
+    tick: int
+    stamp: float
+    readings: tuple
+
+
+class _Layout:
+    """where everything is in a block with these columns"""
+
+    def __init__(self, columns:int, slots:int, names:int) -> None:
+        self.columns = columns
+        self.slots = slots
+        self.frame = _aligned(HEADER.size + names)
+        self.body = struct.Struct(f'<Qd{columns}d') # tick, time, readings
+        self.alerts = self.frame + SEQ.size + self.body.size
+        self.ring = self.alerts + 2 * SEQ.size
+        self.size = self.ring + slots * ALERT_SLOT.size
+
+
+class FrameBus:
+    """The simulation side.  publish() goes on the tick thread and
+    alerts() on the thread that drains the AlertBus.  aircraft is the
+    profile the viewers build their displays from.  name None lets the
+    system pick one, viewers attach with bus.name"""
+
+    def __init__(self, names:tuple, aircraft:str, name:str=None, alert_slots:int=ALERT_SLOTS) -> None:
+        meta = json.dumps({'names': list(names), 'aircraft': aircraft}).encode()
+        self.layout = layout = _Layout(len(names), alert_slots, len(meta))
+        self.shm = shared_memory.SharedMemory(name, create=True, size=layout.size)
+        self.name = self.shm.name
+        buf = self.shm.buf
+        buf[:layout.size] = bytes(layout.size)
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, len(names), alert_slots, len(meta))
+        buf[HEADER.size:HEADER.size + len(meta)] = meta
+        self.frames = 0
+        self.written = 0 # alerts
+        self._seq = 0
+        self._alert_seq = 0
+
+    def publish(self, tick:int, readings:tuple) -> None:
+        """one tick, the viewers see it once the second seq is written"""
+        buf = self.shm.buf
+        frame = self.layout.frame
+        seq = self._seq + 1
+        SEQ.pack_into(buf, frame, seq)
+        self.layout.body.pack_into(buf, frame + SEQ.size, tick, time.time(), *readings)
+        self._seq = seq + 1
+        SEQ.pack_into(buf, frame, self._seq)
+        self.frames += 1
+
+    def alerts(self, alerts:list) -> None:
+        """adds alerts to the ring, past ALERT_SLOTS the oldest are overwritten"""
+        if not alerts:
+            return
+        buf = self.shm.buf
+        layout = self.layout
+        seq = self._alert_seq + 1
+        SEQ.pack_into(buf, layout.alerts, seq)
+        # alerts that would be overwritten in this same batch are skipped
+        written = self.written + max(0, len(alerts) - layout.slots)
+        for alert in alerts[-layout.slots:]:
+            ALERT_SLOT.pack_into(buf, layout.ring + written % layout.slots * ALERT_SLOT.size,
+                                 alert.timestamp, alert.severity, alert.source.encode(), alert.message.encode())
+            written += 1
+        self.written = written
+        SEQ.pack_into(buf, layout.alerts + SEQ.size, self.written)
+        self._alert_seq = seq + 1
+        SEQ.pack_into(buf, layout.alerts, self._alert_seq)
+
+    def close(self) -> None:
+        """tells the viewers the flight is over and removes the block,
+        viewers still attached keep their mapping until they close"""
+        SEQ.pack_into(self.shm.buf, self.layout.frame, CLOSED)
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BusReader:
+    """A viewer's side of a bus.  read() and alerts() never wait, they
+    return nothing new rather than a frame being written.  torn counts
+    the reads that caught the writer and went again"""
+
+    def __init__(self, name:str) -> None:
+        self.shm = _attach(name)
+        buf = self.shm.buf
+        magic, version, columns, slots, length = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f'{name} is not a version {VERSION} frame bus')
+        meta = json.loads(bytes(buf[HEADER.size:HEADER.size + length]))
+        self.names = tuple(meta['names'])
+        self.aircraft = meta['aircraft']
+        self.layout = _Layout(columns, slots, length)
+        self.seq = 0
+        self.frames = 0
+        self.missed = 0 # frames published between two reads
+        self.torn = 0
+        self.read_alerts = 0 # alerts written that this reader is past
+        self.lost = 0 # alerts overwritten before they were read
+
+    @property
+    def closed(self) -> bool:
+        return SEQ.unpack_from(self.shm.buf, self.layout.frame)[0] == CLOSED
+
+    def read(self) -> BusFrame:
+        """the newest frame, or None when there is none since the last read"""
+        buf = self.shm.buf
+        frame = self.layout.frame
+        unpack = self.layout.body.unpack_from
+        for _ in range(RETRIES):
+            seq = SEQ.unpack_from(buf, frame)[0]
+            if seq == self.seq or seq == CLOSED:
+                return None
+            if seq & 1:
+                self.torn += 1
+                continue
+            tick, stamp, *readings = unpack(buf, frame + SEQ.size)
+            if SEQ.unpack_from(buf, frame)[0] != seq:
+                self.torn += 1
+                continue
+            if self.seq:
+                self.missed += (seq - self.seq) // 2 - 1
+            self.seq = seq
+            self.frames += 1
+            return BusFrame(seq // 2, tick, stamp, tuple(readings))
+        return None
+
+    def alerts(self) -> list:
+        """the alerts written since the last call, oldest first"""
+        buf = self.shm.buf
+        layout = self.layout
+        size = ALERT_SLOT.size
+        for _ in range(RETRIES):
+            seq = SEQ.unpack_from(buf, layout.alerts)[0]
+            if seq & 1:
+                self.torn += 1
+                continue
+            written = SEQ.unpack_from(buf, layout.alerts + SEQ.size)[0]
+            first = max(self.read_alerts, written - layout.slots)
+            slots = [ALERT_SLOT.unpack_from(buf, layout.ring + number % layout.slots * size)
+                     for number in range(first, written)]
+            if SEQ.unpack_from(buf, layout.alerts)[0] != seq:
+                self.torn += 1
+                continue
+            self.lost += first - self.read_alerts
+            self.read_alerts = written
+            return [Alert(Severity(severity), source.decode(errors='ignore'), stamp,
+                          message.decode(errors='ignore')) for stamp, severity, source, message in slots]
+        return []
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BusDisplays:
+    """The displays of plane fed from a bus instead of sensors.  Their own
+    band changes go to a bus that is thrown away each frame, the flight
+    computer shows the simulation's alerts off the frame bus"""
+
+    def __init__(self, plane, update_for) -> None:
+        self.quiet = AlertBus()
+        self.displays = plane.build_displays(update_for, self.quiet)
+
+    def show(self, readings:tuple) -> None:
+        for disp, value in zip(self.displays, readings):
+            disp.update(value)
+        self.quiet.drain()
+
+
+class Viewer:
+    """A cockpit window that only shows what is on a bus.  The displays
+    are built from the aircraft profile the simulation flies, so their
+    bands and messages match the pilot's window, and the flight computer
+    shows the simulation's alerts.  raw adds every reading as a number"""
+
+    def __init__(self, reader:BusReader, title:str=None, raw:bool=False) -> None:
+        import aircraft
+        import flightcontrol
+        from flightlog import FlightLog, LogView
+        from widgets import UpdateBatch
+        sg = flightcontrol.load_gui()
+        sg.theme('DarkAmber')
+        self.reader = reader
+        plane = aircraft.load(reader.aircraft)
+        if plane.names != reader.names:
+            raise ValueError(f'{reader.aircraft} does not match the columns on the bus')
+        layout = [[sg.Text(title or plane.title)],
+                  [sg.Push(), *flightcontrol.instrument_frames(plane), sg.Push()],
+                  [sg.Frame('Flight Computer', [[sg.Multiline('', size=(60, flightcontrol.LOG_ROWS),
+                                                              key='-COMPUTER-')]])]]
+        if raw:
+            layout.append([sg.Text('', size=(60, len(plane.names)), font='Courier 9', key='-RAW-')])
+        layout.append([sg.Exit(), sg.Text('', size=(40, 1), key='-STATUS-')])
+        self.window = sg.Window(title or plane.name, layout, finalize=True)
+        self.widgets = UpdateBatch()
+        kinds = flightcontrol.widget_kinds(plane)
+        self.displays = BusDisplays(plane, lambda key: flightcontrol.widget_channel(self.widgets, self.window[key].update,
+                                                                                 kinds.get(key)))
+        self.log = FlightLog()
+        self.log_view = LogView(self.log, flightcontrol.LOG_ROWS)
+        self.raw = raw
+
+    def run(self, frame_period:float=None) -> None:
+        import flightcontrol
+        sg = flightcontrol.sg
+        frame_period = flightcontrol.FRAME_PERIOD if frame_period is None else frame_period
+        reader = self.reader
+        computer = self.window['-COMPUTER-']
+        while True:
+            event, _ = self.window.read(timeout=frame_period)
+            if event in (sg.WIN_CLOSED, 'Exit'):
+                break
+            if reader.closed:
+                self.window['-STATUS-'].update('the simulation has stopped')
+                continue
+            frame = reader.read()
+            if frame is not None:
+                self.displays.show(frame.readings)
+                if self.raw:
+                    self.window['-RAW-'].update('\n'.join(f'{name:<10} {value:12.3f}'
+                                                          for name, value in zip(reader.names, frame.readings)))
+                self.window['-STATUS-'].update(f'tick {frame.tick}  missed {reader.missed}  torn {reader.torn}')
+            self.log.extend(reader.alerts())
+            text = self.log_view.render()
+            if text is not None:
+                computer.update(text)
+            self.widgets.flush()
+        self.window.close()
+        reader.close()
+
+
+def _poll(name:str, stop, period:float) -> None:
+    """a viewer without a window, reads every period seconds until stop is set"""
+    with BusReader(name) as reader:
+        while not stop.wait(period):
+            reader.read()
+            reader.alerts()
+
+
+def bench(viewers=(0, 1, 2, 4), ticks:int=200000, period:float=0.001) -> dict:
+    """ns per publish() with that many viewer processes attached, each
+    reading every period seconds, a lot more often than a window draws"""
+    import multiprocessing
+    results = {}
+    readings = tuple(float(i) for i in range(9))
+    with FrameBus(tuple(f'c{i}' for i in range(9)), '') as bus:
+        for count in viewers:
+            stop = multiprocessing.Event()
+            procs = [multiprocessing.Process(target=_poll, args=(bus.name, stop, period)) for _ in range(count)]
+            for proc in procs:
+                proc.start()
+            time.sleep(0.2)
+            publish = bus.publish
+            start = time.perf_counter_ns()
+            for tick in range(ticks):
+                publish(tick, readings)
+            results[count] = (time.perf_counter_ns() - start) / ticks
+            stop.set()
+            for proc in procs:
+                proc.join()
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='cockpit frame bus')
+    commands = parser.add_subparsers(dest='command', required=True)
+    view = commands.add_parser('view', help='a viewer window on a running simulation')
+    view.add_argument('name', help='the bus, as printed by flightcontrol.py --bus')
+    view.add_argument('--title', help='window title, the aircraft title by default')
+    view.add_argument('--raw', action='store_true', help='also list every reading as a number')
+    commands.add_parser('bench', help='publish cost with viewers attached')
+    args = parser.parse_args()
+    if args.command == 'bench':
+        for count, ns in bench().items():
+            print(f'{count} viewers {ns:8.0f} ns per publish')
+        sys.exit(0)
+    try:
+        reader = BusReader(args.name)
+    except FileNotFoundError:
+        print(f'no frame bus called {args.name}')
+        sys.exit(1)
+    Viewer(reader, args.title, args.raw).run()
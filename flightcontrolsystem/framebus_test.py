@@ -0,0 +1,106 @@
+import multiprocessing
+import time
+import unittest
+from flightcontrolsystem import framebus
+
+names_t = ('tach1', 'fuelC', 'compass')
+
+
+def alert_t(number, message='fuel low'):
+    return framebus.Alert(framebus.Severity.CAUTION, 'fuelC', 1000.0 + number, f'{message} {number}')
+
+
+def watch(name, frames, results):
+    """reads frames off the bus in another process and counts the torn ones"""
+    torn = seen = 0
+    with framebus.BusReader(name) as reader:
+        deadline = time.monotonic() + 10
+        while seen < frames and time.monotonic() < deadline:
+            frame = reader.read()
+            if frame is None:
+                continue
+            seen += 1
+            if frame.readings != (float(frame.tick),) * len(frame.readings):
+                torn += 1
+        results.put((seen, torn, reader.torn))
+
+
+class TestFrameBus(unittest.TestCase):
+    ''' Tests the shared memory frame bus'''
+
+    def test_frames(self):
+        with framebus.FrameBus(names_t, 'plane.json') as bus:
+            reader = framebus.BusReader(bus.name)
+            self.assertEqual(reader.names, names_t)
+            self.assertEqual(reader.aircraft, 'plane.json')
+            self.assertIsNone(reader.read())
+            bus.publish(1, (10.0, 20.0, 30.0))
+            frame = reader.read()
+            self.assertEqual((frame.number, frame.tick, frame.readings), (1, 1, (10.0, 20.0, 30.0)))
+            self.assertIsNone(reader.read())
+            for tick in range(2, 6):
+                bus.publish(tick, (tick, tick, tick))
+            self.assertEqual(reader.read().tick, 5)
+            self.assertEqual(reader.missed, 3)
+            self.assertFalse(reader.closed)
+        self.assertTrue(reader.closed)
+        self.assertIsNone(reader.read())
+        reader.close()
+
+    def test_alerts(self):
+        with framebus.FrameBus(names_t, 'plane.json', alert_slots=8) as bus:
+            reader = framebus.BusReader(bus.name)
+            bus.alerts([alert_t(0), alert_t(1)])
+            self.assertEqual(reader.alerts(), [alert_t(0), alert_t(1)])
+            self.assertEqual(reader.alerts(), [])
+            bus.alerts([alert_t(n) for n in range(2, 14)])
+            self.assertEqual(reader.alerts(), [alert_t(n) for n in range(6, 14)])
+            self.assertEqual(reader.lost, 4)
+            bus.alerts([alert_t(14, 'x' * 200)])
+            self.assertEqual(reader.alerts()[0].message, 'x' * 86)
+            reader.close()
+
+    def test_no_torn_frames(self):
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            self.skipTest('needs fork')
+        with framebus.FrameBus(tuple(f'c{i}' for i in range(16)), 'plane.json') as bus:
+            results = context.Queue()
+            viewers = [context.Process(target=watch, args=(bus.name, 2000, results)) for _ in range(2)]
+            for viewer in viewers:
+                viewer.start()
+            tick = 0
+            deadline = time.monotonic() + 10
+            while any(viewer.is_alive() for viewer in viewers) and time.monotonic() < deadline:
+                tick += 1
+                bus.publish(tick, (float(tick),) * 16)
+                time.sleep(0.0001)
+            for viewer in viewers:
+                viewer.join()
+                seen, torn, _ = results.get(timeout=1)
+                self.assertEqual(seen, 2000)
+                self.assertEqual(torn, 0)
+
+
+class TestBusDisplays(unittest.TestCase):
+    ''' Tests a viewer's displays fed off the bus'''
+
+    def test_band_change(self):
+        from flightcontrolsystem import aircraft
+        plane = aircraft.load(aircraft.DEFAULT)
+        shown = {}
+        displays = framebus.BusDisplays(plane, lambda key: lambda value: shown.__setitem__(key, value))
+        with framebus.FrameBus(plane.names, aircraft.DEFAULT) as bus:
+            reader = framebus.BusReader(bus.name)
+            for tach in (50.0, 95.0, 50.0):
+                # a redline and back, the viewer's displays must not raise
+                bus.publish(1, (tach,) + (50.0,) * (len(plane.names) - 1))
+                displays.show(reader.read().readings)
+            reader.close()
+        self.assertTrue(shown)
+        self.assertEqual(len(displays.quiet), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
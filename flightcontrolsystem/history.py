@@ -0,0 +1,122 @@
+""" Fixed memory history for the trend displays.
+The newest samples are kept as they are and older ones in tiers of
+min/max buckets, each tier FACTOR times coarser than the one below it.
+Memory per channel is fixed when it is built, and window() reads the
+coarsest tier that still gives enough columns, so drawing an hour costs
+about what drawing ten seconds does """
+from array import array
+
+RAW_SIZE = 1024 #newest samples kept as they are
+TIER_SIZE = 512 #buckets in each min/max tier
+TIERS = 5 #with FACTOR 4 the top tier reaches back 512 * 4**5 samples, 29 hours at 200ms
+FACTOR = 4 #samples (or buckets) merged into one bucket of the next tier
+
+
+class _Ring:
+    """newest size (low, high) pairs, raw samples have low == high"""
+    __slots__ = ('low', 'high', 'head', 'count')
+
+    def __init__(self, size:int) -> None:
+        self.low = array('d', [0.0]) * size
+        self.high = array('d', [0.0]) * size
+        self.head = 0 # where the next pair goes
+        self.count = 0
+
+    def push(self, low:float, high:float) -> None:
+        head = self.head
+        self.low[head] = low
+        self.high[head] = high
+        head += 1
+        self.head = 0 if head == len(self.low) else head
+        if self.count < len(self.low):
+            self.count += 1
+
+    def last(self, count:int) -> tuple:
+        """the newest count lows and highs, oldest first"""
+        count = min(count, self.count)
+        start = self.head - count
+        if start >= 0:
+            return self.low[start:self.head], self.high[start:self.head]
+        return (self.low[start:] + self.low[:self.head], self.high[start:] + self.high[:self.head])
+
+
+class TrendHistory:
+    """Multi-resolution history of one channel.  Tier 0 holds raw
+    samples, tier n holds buckets of FACTOR**n samples"""
+
+    def __init__(self, raw_size:int=RAW_SIZE, tier_size:int=TIER_SIZE, tiers:int=TIERS,
+                 factor:int=FACTOR) -> None:
+        self.factor = factor
+        self.rings = [_Ring(raw_size)] + [_Ring(tier_size) for _ in range(tiers)]
+        self.spans = [factor ** n for n in range(tiers + 1)] # samples per entry of each tier
+        # the bucket each tier is filling, merged from the tier below
+        self._low = [0.0] * (tiers + 1)
+        self._high = [0.0] * (tiers + 1)
+        self._fill = [0] * (tiers + 1)
+        self.samples = 0
+
+    def add(self, value:float) -> None:
+        self.rings[0].push(value, value)
+        self.samples += 1
+        low = high = value
+        factor = self.factor
+        fill, lows, highs = self._fill, self._low, self._high
+        for tier in range(1, len(self.rings)):
+            if fill[tier]:
+                low = lows[tier] = min(lows[tier], low)
+                high = highs[tier] = max(highs[tier], high)
+            else:
+                lows[tier] = low
+                highs[tier] = high
+            fill[tier] += 1
+            if fill[tier] < factor:
+                return
+            fill[tier] = 0
+            self.rings[tier].push(low, high)
+
+    @property
+    def reach(self) -> int:
+        """how many samples back the history goes"""
+        partial = self.samples
+        return max(ring.count * span + partial % span for ring, span in zip(self.rings, self.spans))
+
+    def window(self, samples:int, points:int) -> list:
+        """(low, high) columns, oldest first, covering about the newest
+        samples samples in at most points columns.  Every column includes
+        the extremes of the samples it covers"""
+        samples = max(1, min(samples, self.samples))
+        # the finest tier that needs no more than two entries a column and
+        # still reaches back far enough, so the work is bounded by points
+        # however long the window is
+        for tier, (ring, span) in enumerate(zip(self.rings, self.spans)):
+            wanted = -(-samples // span)
+            if wanted <= 2 * points and (ring.count * span + self.samples % span >= samples
+                                         or span == self.spans[-1]):
+                break
+        lows, highs = ring.last(wanted)
+        filling = [t for t in range(1, tier + 1) if self._fill[t]]
+        if filling:
+            # the buckets still filling hold the newest samples
+            lows = lows + array('d', [min(self._low[t] for t in filling)])
+            highs = highs + array('d', [max(self._high[t] for t in filling)])
+        count = len(lows)
+        if count <= points:
+            return list(zip(lows, highs))
+        # count is at most 2 * points + 1 so each column merges one to three
+        columns = []
+        append = columns.append
+        start = 0
+        for col in range(1, points + 1):
+            end = col * count // points
+            if end - start == 1:
+                append((lows[start], highs[start]))
+            else:
+                low, high = lows[start], highs[start]
+                for i in range(start + 1, end):
+                    if lows[i] < low:
+                        low = lows[i]
+                    if highs[i] > high:
+                        high = highs[i]
+                append((low, high))
+            start = end
+        return columns
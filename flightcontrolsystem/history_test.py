@@ -0,0 +1,93 @@
+import random
+import unittest
+from flightcontrolsystem import history
+from flightcontrolsystem.displays import TrendDisplay, TrendPlot
+
+
+def samples_t(count, seed=3):
+    rng = random.Random(seed)
+    return [rng.uniform(0, 100) for _ in range(count)]
+
+
+class TestTrendHistory(unittest.TestCase):
+    ''' Tests the multi-resolution history'''
+
+    def test_recent_samples_are_raw(self):
+        hist = history.TrendHistory()
+        values = samples_t(50)
+        for val in values:
+            hist.add(val)
+        self.assertEqual(hist.window(50, 200), [(val, val) for val in values])
+
+    def test_envelope(self):
+        hist = history.TrendHistory(raw_size=64, tier_size=32, tiers=4)
+        values = samples_t(20000)
+        for count, val in enumerate(values, 1):
+            hist.add(val)
+            if count % 997 == 0:
+                for span in (10, 100, 1000, 5000):
+                    columns = hist.window(span, 40)
+                    recent = values[max(0, count - span):count]
+                    # coarse buckets may reach a little further back, but
+                    # never miss a peak
+                    self.assertLessEqual(len(columns), 40)
+                    self.assertLessEqual(min(low for low, _ in columns), min(recent))
+                    self.assertGreaterEqual(max(high for _, high in columns), max(recent))
+
+    def test_fixed_memory(self):
+        hist = history.TrendHistory()
+        sizes = [len(ring.low) for ring in hist.rings]
+        for val in samples_t(100000):
+            hist.add(val)
+        self.assertEqual([len(ring.low) for ring in hist.rings], sizes)
+        self.assertGreaterEqual(hist.reach, 100000)
+
+
+class TestTrendDisplay(unittest.TestCase):
+    ''' Tests the trend display'''
+
+    def test_draws_only_when_visible(self):
+        drawn = []
+        trend = TrendDisplay(drawn.append, 0, 100, span=10, points=5)
+        for val in range(20):
+            trend.update(val)
+        trend.visible = False
+        trend.update(99)
+        self.assertEqual(len(drawn), 20)
+        self.assertEqual(drawn[-1][-1], (18.0, 19.0))
+        self.assertEqual(trend.history.samples, 21)
+
+
+class Graph:
+    """the bits of an sg.Graph TrendPlot uses, coords are kept per line"""
+
+    def __init__(self):
+        self.lines = {}
+        self.TKCanvas = self
+
+    def draw_line(self, start, end, color=None):
+        self.lines[len(self.lines)] = start + end
+        return len(self.lines) - 1
+
+    def coords(self, line, *coords):
+        self.lines[line] = coords
+
+
+class TestTrendPlot(unittest.TestCase):
+    ''' Tests drawing trend columns'''
+
+    def test_columns_move_lines(self):
+        graph = Graph()
+        plot = TrendPlot(graph, (4, 101))
+        trend = TrendDisplay(plot, 0, 100, span=2, points=2)
+        plot.show(trend)
+        trend.update(25)
+        trend.update(75)
+        self.assertEqual(len(graph.lines), 4)
+        self.assertEqual(graph.lines[1], (-1, -1, -1, -1))
+        self.assertEqual(graph.lines[2], (2, 75.0, 2, 76.0))
+        self.assertEqual(graph.lines[3], (3, 25.0, 3, 26.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
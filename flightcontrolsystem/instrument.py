@@ -0,0 +1,107 @@
+""" Timing hooks for the hot path of FlightSim.run.
+Probes.wrap() puts a timer around a callable and records every call in a
+fixed size log scale histogram.  When the probes are disabled wrap()
+hands back the callable unchanged, so turning them off costs nothing """
+import json
+import time
+from typing import Callable
+
+SUB_BUCKETS = 4 # histogram buckets per power of two, about 19% wide
+
+
+class Histogram:
+    """Log scale histogram of nanosecond timings with a fixed number of
+    buckets, add() is O(1) and memory does not grow with the count"""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (64 * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns:int) -> None:
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        bits = ns.bit_length()
+        sub = (ns >> (bits - 3)) & 3 if bits > 3 else 0
+        self.buckets[bits * SUB_BUCKETS + sub] += 1
+
+    @staticmethod
+    def _low_edge(index:int) -> int:
+        bits, sub = divmod(index, SUB_BUCKETS)
+        if bits <= 3:
+            return (1 << bits) >> 1
+        return (SUB_BUCKETS + sub) << (bits - 3)
+
+    def percentile(self, pct:float) -> int:
+        """the low edge of the bucket holding the pct percentile, in ns"""
+        if not self.count:
+            return 0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= rank:
+                return min(self._low_edge(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """count and times in microseconds"""
+        mean = self.total / self.count if self.count else 0.0
+        return {'count': self.count,
+                'mean_us': mean / 1000,
+                'p50_us': self.percentile(50) / 1000,
+                'p99_us': self.percentile(99) / 1000,
+                'max_us': self.max / 1000}
+
+
+class Probes:
+    """A named set of histograms.  Build it with enabled=False and every
+    wrap() is a no-op"""
+
+    def __init__(self, enabled:bool=True) -> None:
+        self.enabled = enabled
+        self.histograms = {}
+
+    def histogram(self, name:str) -> Histogram:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def wrap(self, name:str, func:Callable) -> Callable:
+        """func timed into the histogram called name"""
+        if not self.enabled:
+            return func
+        add = self.histogram(name).add
+        clock = time.perf_counter_ns
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(clock() - start)
+        return timed
+
+    def wrap_dash(self, dash:list, names:tuple) -> None:
+        """times read_sensor and update of every dash pair"""
+        if not self.enabled:
+            return
+        for name, (sen, disp) in zip(names, dash):
+            sen.read_sensor = self.wrap(f'read.{name}', sen.read_sensor)
+            disp.update = self.wrap(f'update.{name}', disp.update)
+
+    def report(self) -> dict:
+        return {name: hist.summary() for name, hist in self.histograms.items()}
+
+    def text(self) -> str:
+        """the report as lines for the diagnostics panel"""
+        lines = [f'{"stage":<16}{"p50":>8}{"p99":>8}{"max":>8} us']
+        for name, row in self.report().items():
+            lines.append(f'{name:<16}{row["p50_us"]:>8.0f}{row["p99_us"]:>8.0f}{row["max_us"]:>8.0f}')
+        return '\n'.join(lines)
+
+    def export(self, path:str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
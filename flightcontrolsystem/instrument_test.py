@@ -0,0 +1,39 @@
+import unittest
+from flightcontrolsystem import instrument
+
+
+class TestHistogram(unittest.TestCase):
+    ''' Tests the fixed size timing histogram'''
+
+    def test_percentiles(self):
+        hist = instrument.Histogram()
+        for ns in range(1, 10001):
+            hist.add(ns * 1000)
+        self.assertEqual(hist.count, 10000)
+        self.assertEqual(hist.max, 10000000)
+        # buckets are about 19% wide and report their low edge
+        self.assertTrue(0.8 * 5e6 <= hist.percentile(50) <= 5e6)
+        self.assertTrue(0.8 * 9.9e6 <= hist.percentile(99) <= 9.9e6)
+        self.assertEqual(len(hist.buckets), 64 * instrument.SUB_BUCKETS)
+
+    def test_small_values(self):
+        hist = instrument.Histogram()
+        for ns in (0, 1, 2, 5):
+            hist.add(ns)
+        self.assertLessEqual(hist.percentile(100), 5)
+
+
+class TestProbes(unittest.TestCase):
+    ''' Tests wrapping the hot path'''
+
+    def test_disabled_is_free(self):
+        probes = instrument.Probes(enabled=False)
+        self.assertIs(probes.wrap('print', print), print)
+        self.assertEqual(probes.report(), {})
+
+    def test_wrap(self):
+        probes = instrument.Probes()
+        double = probes.wrap('double', lambda x: 2 * x)
+        self.assertEqual([double(x) for x in range(5)], [0, 2, 4, 6, 8])
+        self.assertEqual(probes.report()['double']['count'], 5)
+        self.assertIn('double', probes.text())
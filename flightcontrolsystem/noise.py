@@ -0,0 +1,119 @@
+""" Seeded noise sources for the simulators.
+Each simulator gets its own NoiseSource instead of sharing the global
+random module, so a run can be reproduced and parallel runs never share
+a stream.  The noise is made BLOCK_SIZE samples at a time and handed out
+one by one, and block n is always made from the seed and n alone, so the
+whole state of a source is just its seed and how many samples it has
+handed out """
+import random
+import zlib
+
+BLOCK_SIZE = 1024 #samples made at once
+SEED = 0 #base seed, every source seeded with seed_for() derives from it
+
+
+def seed_for(name:str, run:int=None) -> int:
+    """a seed of its own for the simulator called name.  run tells apart
+    simulators of the same name flown side by side, a sweep point say,
+    without it every simulator called name gets the same stream"""
+    seed = SEED * 0x9E3779B1 + zlib.crc32(name.encode())
+    if run is not None:
+        seed += zlib.crc32(str(run).encode()) * 0x85EBCA6B
+    return seed & 0xFFFFFFFF
+
+
+def reseed(seed:int) -> None:
+    """changes the base seed for every source seeded after this"""
+    global SEED
+    SEED = seed
+
+
+class NoiseModel:
+    """Base class, block() returns count samples drawn from rng"""
+
+    def block(self, rng:random.Random, count:int) -> list:
+        return [0.0] * count
+
+
+class BiasedWalk(NoiseModel):
+    """steps of a random walk, uniform over width around bias.  Summed
+    up they drift by bias per sample"""
+
+    def __init__(self, width:float=1.0, bias:float=0.0) -> None:
+        self.width = width
+        self.low = bias - width / 2
+
+    def block(self, rng:random.Random, count:int) -> list:
+        uniform = rng.random
+        width, low = self.width, self.low
+        return [uniform() * width + low for _ in range(count)]
+
+
+class Gaussian(NoiseModel):
+    """normally distributed noise"""
+
+    def __init__(self, sigma:float=1.0, mean:float=0.0) -> None:
+        self.sigma = sigma
+        self.mean = mean
+
+    def block(self, rng:random.Random, count:int) -> list:
+        gauss = rng.gauss
+        sigma, mean = self.sigma, self.mean
+        return [gauss(mean, sigma) for _ in range(count)]
+
+
+class Jitter(NoiseModel):
+    """uniform noise that never goes past +/- amplitude"""
+
+    def __init__(self, amplitude:float=1.0) -> None:
+        self.amplitude = amplitude
+
+    def block(self, rng:random.Random, count:int) -> list:
+        uniform = rng.random
+        amplitude = self.amplitude
+        span = 2 * amplitude
+        return [uniform() * span - amplitude for _ in range(count)]
+
+
+class NoiseSource:
+    """Hands out the samples of model one at a time from pre-made blocks.
+    next() is an index into the current block except once per block"""
+
+    def __init__(self, model:NoiseModel, seed:int, block_size:int=BLOCK_SIZE) -> None:
+        self.model = model
+        self.seed = seed
+        self.block_size = block_size
+        self.drawn = 0 # samples handed out so far
+        self._block = self._make(0)
+        self._index = 0
+
+    def _make(self, number:int) -> list:
+        # each block has its own generator so any block can be made again
+        # without making the ones before it
+        rng = random.Random(self.seed * 0x100000001 + number)
+        return self.model.block(rng, self.block_size)
+
+    def next(self) -> float:
+        index = self._index
+        if index == self.block_size:
+            self._block = self._make(self.drawn // self.block_size)
+            index = 0
+        self._index = index + 1
+        self.drawn += 1
+        return self._block[index]
+
+    def take(self, count:int) -> list:
+        """the next count samples"""
+        return [self.next() for _ in range(count)]
+
+    def get_state(self) -> tuple:
+        return (self.seed, self.drawn)
+
+    def set_state(self, state:tuple) -> None:
+        self.seed = int(state[0])
+        self.drawn = int(state[1])
+        number, self._index = divmod(self.drawn, self.block_size)
+        if number and not self._index:
+            # the last block handed out was used up
+            number, self._index = number - 1, self.block_size
+        self._block = self._make(number)
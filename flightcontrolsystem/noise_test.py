@@ -0,0 +1,81 @@
+import unittest
+from flightcontrolsystem import noise
+from flightcontrolsystem.noise import NoiseSource, BiasedWalk, Gaussian, Jitter
+from flightcontrolsystem.simulations import Compass
+
+
+class TestNoiseSource(unittest.TestCase):
+    ''' Tests the seeded block noise'''
+
+    def test_same_seed_same_noise(self):
+        first = NoiseSource(Gaussian(2.0), 7, block_size=64).take(300)
+        second = NoiseSource(Gaussian(2.0), 7, block_size=64).take(300)
+        other = NoiseSource(Gaussian(2.0), 8, block_size=64).take(300)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_blocks_follow_on(self):
+        source = NoiseSource(BiasedWalk(), 3, block_size=16)
+        self.assertEqual(source.take(20) + source.take(20), NoiseSource(BiasedWalk(), 3, block_size=16).take(40))
+
+    def test_state_round_trip(self):
+        for drawn in (0, 10, 64, 128, 150):
+            source = NoiseSource(BiasedWalk(1.0, 0.1), 11, block_size=64)
+            source.take(drawn)
+            state = source.get_state()
+            expected = source.take(100)
+            copy = NoiseSource(BiasedWalk(1.0, 0.1), 99, block_size=64)
+            copy.set_state(state)
+            self.assertEqual(copy.take(100), expected, drawn)
+
+    def test_jitter_is_bounded(self):
+        values = NoiseSource(Jitter(0.5), 1).take(5000)
+        self.assertLessEqual(max(values), 0.5)
+        self.assertGreaterEqual(min(values), -0.5)
+
+    def test_walk_drifts_by_bias(self):
+        values = NoiseSource(BiasedWalk(1.0, 0.1), 5).take(20000)
+        self.assertAlmostEqual(sum(values) / len(values), 0.1, delta=0.01)
+
+    def test_seed_for(self):
+        self.assertEqual(noise.seed_for('compass_'), noise.seed_for('compass_'))
+        self.assertNotEqual(noise.seed_for('compass_'), noise.seed_for('airspeed_'))
+
+    def test_next_is_cheap(self):
+        # next() is an index into the current block, a block is only made
+        # once every block_size samples
+        source = NoiseSource(BiasedWalk(), 2, block_size=64)
+        make, made = source._make, []
+        def counted(number):
+            made.append(number)
+            return make(number)
+        source._make = counted
+        source.take(64 * 10)
+        self.assertEqual(made, list(range(1, 10)))
+
+
+class TestCompassNoise(unittest.TestCase):
+    ''' Tests the compass walk is reproducible'''
+
+    def test_compass_repeats(self):
+        first = Compass('-COMPASS-', 22, NoiseSource(BiasedWalk(1.0, 0.1), 4))
+        second = Compass('-COMPASS-', 22, NoiseSource(BiasedWalk(1.0, 0.1), 4))
+        self.assertEqual([first.get_data() for _ in range(2000)], [second.get_data() for _ in range(2000)])
+
+    def test_compass_state(self):
+        compass = Compass('-COMPASS-', 22)
+        for _ in range(1500):
+            compass.get_data()
+        state = compass.get_state()
+        expected = [compass.get_data() for _ in range(100)]
+        compass.set_state(state)
+        self.assertEqual([compass.get_data() for _ in range(100)], expected)
+
+    def test_set_compass(self):
+        compass = Compass('-COMPASS-', 22)
+        compass.setCompass(-90)
+        self.assertEqual(compass.initVal, 270)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+""" Telemetry recorder and replay.
+Every tick is one fixed width record of little endian doubles: the tick,
+the time, the control buttons pressed (one bit per CONTROLS entry), the
+miliseconds the tick covered, the dash pairs read that tick (one bit per
+pair, see Cockpit.set_rates), the throttles and then every sensor
+reading in dash order.  The column names
+are stored in the header so older files still read back.  Replay maps
+the file into memory and feeds the recorded inputs back through a
+cockpit, with or without a window
+
+    python recorder.py replay <file>    replays headless as fast as possible
+"""
+import json
+import mmap
+import struct
+import sys
+import time
+import numpy as np
+from simulations import UPDATE_PERIOD
+from cockpit import Cockpit, THROTTLES, CONTROLS, DASH_NAMES, headless
+import snapshot
+
+MAGIC = b'FSTL'
+VERSION = 5
+HEADER = struct.Struct('<4sHHII') # magic, version, columns, length of names, length of snapshot
+TICK_COLUMNS = ('tick', 'time', 'pressed', 'dt', 'fresh')
+COLUMNS = TICK_COLUMNS + THROTTLES + DASH_NAMES
+
+
+class Recorder:
+    """Appends one record per tick.  overhead() reports what recording
+    cost the tick.  sims is the simulators the flight starts from, the
+    cockpit's, the globals in simulations.py when it is None"""
+
+    def __init__(self, path:str, columns:tuple=COLUMNS, sims:dict=None) -> None:
+        self.columns = columns
+        self.record_format = struct.Struct(f'<{len(columns)}d')
+        self.file = open(path, 'wb')
+        state = snapshot.capture(sims)
+        names = json.dumps(columns).encode()
+        names += b' ' * (-(HEADER.size + len(names) + len(state)) % 8) # records start 8 byte aligned
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(columns), len(names), len(state)) + names + state)
+        self.start = time.perf_counter()
+        self.records = 0
+        self.cost = 0.0
+        self.cost_max = 0.0
+
+    def record(self, tick:int, pressed:int, values:dict, readings:tuple, dt:float=None,
+               fresh:int=None) -> None:
+        """dt is the miliseconds the tick covered, None is one UPDATE_PERIOD.
+        fresh is the pairs read this tick, None is all of them"""
+        clock = time.perf_counter
+        begin = clock()
+        dt = UPDATE_PERIOD if dt is None else dt
+        fresh = (1 << len(readings)) - 1 if fresh is None else fresh
+        self.file.write(self.record_format.pack(tick, begin - self.start, pressed, dt, fresh,
+                                                *[values[key] for key in THROTTLES], *readings))
+        cost = clock() - begin
+        self.records += 1
+        self.cost += cost
+        if cost > self.cost_max:
+            self.cost_max = cost
+
+    def overhead(self) -> dict:
+        """mean and worst recording time per tick in microseconds"""
+        mean = self.cost / self.records if self.records else 0.0
+        return {'records': self.records, 'mean_us': mean * 1e6, 'max_us': self.cost_max * 1e6}
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Recording:
+    """A recorded flight mapped read only into memory.  Columns come back
+    as strided memoryviews or a NumPy view, neither copies the file"""
+
+    def __init__(self, path:str) -> None:
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, length, state = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} telemetry recording')
+        self.columns = tuple(json.loads(bytes(self.map[HEADER.size:HEADER.size + length])))
+        self.state = bytes(self.map[HEADER.size + length:HEADER.size + length + state])
+        self.offset = HEADER.size + length + state
+        self.width = count
+        # a flight cut off mid record still reads up to its last whole tick
+        size = (len(self.map) - self.offset) // (8 * count) * (8 * count)
+        self.doubles = memoryview(self.map)[self.offset:self.offset + size].cast('d')
+
+    def __len__(self) -> int:
+        return len(self.doubles) // self.width
+
+    def column(self, name:str) -> memoryview:
+        index = self.columns.index(name)
+        return self.doubles[index::self.width]
+
+    def row(self, tick:int) -> tuple:
+        start = tick * self.width
+        return tuple(self.doubles[start:start + self.width])
+
+    def array(self) -> np.ndarray:
+        """the whole recording as a (ticks, columns) array"""
+        return np.frombuffer(self.map, dtype='<f8', count=len(self.doubles),
+                             offset=self.offset).reshape(-1, self.width)
+
+    def commands(self, tick:int) -> list:
+        """the control inputs of one recorded tick as (key, arg) commands"""
+        row = self.row(tick)
+        columns = self.columns
+        commands = [(key, row[columns.index(key)]) for key in THROTTLES]
+        pressed = int(row[columns.index('pressed')])
+        commands += [(key, None) for bit, key in enumerate(CONTROLS) if pressed & (1 << bit)]
+        return commands
+
+    def close(self) -> None:
+        """unmaps the file.  A column() or array() still in use keeps the
+        mapping alive, it is unmapped once the last of them is dropped"""
+        try:
+            self.doubles.release()
+            self.map.close()
+        except BufferError:
+            pass
+        # the views hold the map, it is closed with the last of them
+        self.doubles = self.map = None
+
+
+class Replay:
+    """Steps a cockpit through a recording one tick at a time.  The
+    simulators are put back to where they were when recording started.
+    A cockpit with rates replays exactly when the recording began on its
+    first tick, as FlightSim's do"""
+
+    def __init__(self, recording:Recording, cockpit:Cockpit) -> None:
+        self.recording = recording
+        self.cockpit = cockpit
+        self.tick = 0
+        self.dt = recording.column('dt')
+        snapshot.restore(recording.state, cockpit.sims)
+
+    @property
+    def done(self) -> bool:
+        return self.tick >= len(self.recording)
+
+    def step(self) -> tuple:
+        """replays the next tick and returns its readings"""
+        readings = self.cockpit.step(self.recording.commands(self.tick), self.dt[self.tick])
+        self.tick += 1
+        return readings
+
+    def run(self) -> dict:
+        """replays to the end, updating the displays every tick.  Returns
+        the speed against real time and the largest difference from the
+        recorded readings for each sensor, which should all be zero"""
+        recorded = self.recording.array()
+        names = self.cockpit.names
+        first = len(self.recording.columns) - len(names)
+        worst = np.zeros(len(names))
+        show = self.cockpit.show
+        start = time.perf_counter()
+        begin = self.tick
+        while not self.done:
+            row = self.tick
+            readings = self.step()
+            show(readings)
+            np.maximum(worst, np.abs(np.subtract(readings, recorded[row, first:])), out=worst)
+        elapsed = time.perf_counter() - start
+        ticks = self.tick - begin
+        flown = sum(self.dt[begin:self.tick]) / 1000 # simulated seconds
+        return {'ticks': ticks,
+                'seconds': elapsed,
+                'speedup': flown / elapsed if elapsed else 0.0,
+                'max_diff': dict(zip(names, worst.tolist()))}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'replay':
+        print(__doc__)
+        sys.exit(1)
+    recording = Recording(sys.argv[2])
+    print(Replay(recording, headless()).run())
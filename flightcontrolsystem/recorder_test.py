@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from flightcontrolsystem import recorder
+
+throttles_t = [10, 35, 80, 100, 100, 60, 20, 0]
+
+
+class TestRecorder(unittest.TestCase):
+    ''' Tests recording a flight and replaying it'''
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.fstl')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def fly(self, ticks):
+        cockpit = recorder.headless()
+        with recorder.Recorder(self.path) as rec:
+            for tick in range(ticks):
+                commands = [('-THR1-', throttles_t[tick % 8]), ('-THR2-', throttles_t[-tick % 8])]
+                if tick == 5:
+                    commands.append(('-NORTH-', None))
+                readings = cockpit.step(commands)
+                rec.record(cockpit.ticks, cockpit.pressed, cockpit.values, readings)
+        self.assertEqual(rec.overhead()['records'], ticks)
+        return cockpit
+
+    def test_columns(self):
+        self.fly(50)
+        recording = recorder.Recording(self.path)
+        self.assertEqual(len(recording), 50)
+        self.assertEqual(list(recording.column('tick')), [float(t) for t in range(1, 51)])
+        self.assertEqual(recording.column('-THR1-')[3], throttles_t[3])
+        self.assertEqual(recording.commands(5)[-1], ('-NORTH-', None))
+        self.assertEqual(recording.array().shape, (50, len(recorder.COLUMNS)))
+        recording.close()
+
+    def test_close_with_views(self):
+        self.fly(20)
+        recording = recorder.Recording(self.path)
+        table = recording.array()
+        ticks = recording.column('tick')
+        recording.close()
+        self.assertEqual(table[19, 0], 20.0)
+        self.assertEqual(ticks[0], 1.0)
+
+    def test_truncated_file(self):
+        self.fly(10)
+        with open(self.path, 'ab') as file:
+            file.write(b'\0' * 12)
+        recording = recorder.Recording(self.path)
+        self.assertEqual(len(recording), 10)
+        recording.close()
+
+    def test_replay(self):
+        self.fly(30)
+        recording = recorder.Recording(self.path)
+        replay = recorder.Replay(recording, recorder.headless())
+        result = replay.run()
+        self.assertTrue(replay.done)
+        self.assertEqual(result['ticks'], 30)
+        self.assertEqual(set(result['max_diff'].values()), {0.0})
@@ -0,0 +1,186 @@
+""" Fixed timestep scheduling for the simulation.
+The simulation ticks on its own thread at a fixed rate, the GUI hands
+control inputs over through a CommandQueue and renders whatever the
+last published snapshot is.  A RateSchedule lets the slow instruments
+be read less often than the tick """
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, NamedTuple
+from alerts import AlertBus, Severity
+
+
+class CommandQueue:
+    """Control inputs going from the GUI thread to the simulation thread.
+    deque.append and deque.popleft are atomic, so there is no lock"""
+
+    def __init__(self) -> None:
+        self._queue = deque()
+
+    def put(self, key:str, arg:float=None) -> None:
+        self._queue.append((key, arg))
+
+    def drain(self) -> list:
+        """removes and returns every queued command, oldest first"""
+        commands = []
+        popleft = self._queue.popleft
+        while True:
+            try:
+                commands.append(popleft())
+            except IndexError:
+                return commands
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class Snapshot(NamedTuple):
+    """what one simulation tick publishes for the GUI"""
+    tick: int
+    readings: tuple
+
+
+class RateSchedule:
+    """Which dash pairs are read on each tick.  divisors[i] is the ticks
+    between reads of pair i, 1 reads it every tick.  The slow pairs are
+    given phases that spread them over the cycle, so every tick reads
+    about as many pairs as any other.  together is pairs of indexes that
+    are compared with each other, the faster of the two is read on every
+    tick the slower one is when its divisor divides the slower's"""
+
+    def __init__(self, divisors:list, together=()) -> None:
+        self.divisors = tuple(divisors)
+        self.cycle = math.lcm(*divisors)
+        load = [0] * self.cycle
+        phases = [None] * len(divisors)
+        partners = {}
+        for first, second in together:
+            partners.setdefault(first, []).append(second)
+            partners.setdefault(second, []).append(first)
+        # slowest first, each takes the phase whose ticks are least busy
+        # unless a slower partner has been placed already
+        for i in sorted(range(len(divisors)), key=lambda i: -divisors[i]):
+            step = divisors[i]
+            placed = [other for other in partners.get(i, ()) if phases[other] is not None]
+            if placed:
+                phases[i] = phases[placed[0]] % step
+            else:
+                phases[i] = min(range(step), key=lambda phase: (max(load[phase::step]), phase))
+            for tick in range(phases[i], self.cycle, step):
+                load[tick] += 1
+        self.phases = tuple(phases)
+        self.slots = tuple(tuple(i for i, step in enumerate(divisors) if tick % step == phases[i])
+                           for tick in range(self.cycle))
+        self.masks = tuple(sum(1 << i for i in slot) for slot in self.slots)
+
+    @classmethod
+    def from_rates(cls, names:tuple, rates:dict, tick_period:float, together=()) -> 'RateSchedule':
+        """rates maps a dash name to the miliseconds between its reads,
+        names left out are read every tick.  together is pairs of names
+        to read on the same ticks"""
+        together = [(names.index(first), names.index(second)) for first, second in together
+                    if first in names and second in names]
+        return cls([max(1, round(rates.get(name, tick_period) / tick_period)) for name in names], together)
+
+    @property
+    def load(self) -> tuple:
+        """the fewest and most pairs read on one tick"""
+        counts = [len(slot) for slot in self.slots]
+        return min(counts), max(counts)
+
+
+class SchedulerStats(NamedTuple):
+    """timing of the scheduler, times are in milliseconds.  jitter is how
+    late a tick started, an overrun is a tick that ran into the next slot
+    and skipped counts the slots dropped to catch back up.  errors counts
+    the ticks that raised"""
+    ticks: int
+    overruns: int
+    skipped: int
+    errors: int
+    jitter_last: float
+    jitter_mean: float
+    jitter_max: float
+
+
+class FixedRateScheduler:
+    """Calls tick() every period milliseconds on its own thread.
+    When a tick runs long the missed slots are dropped rather than
+    run back to back, so the simulation never bursts.  A tick that raises
+    does not stop the thread, the error goes to alerts when there is a
+    bus and otherwise the first one is raised again by stop()"""
+
+    def __init__(self, tick:Callable[[], None], period:float, alerts:AlertBus=None) -> None:
+        self.tick = tick
+        self.period = period
+        self.alerts = alerts
+        self._thread = None
+        self._stop = threading.Event()
+        self._ticks = 0
+        self._overruns = 0
+        self._skipped = 0
+        self._errors = 0
+        self._error = None # first error when there is no alert bus
+        self._jitter_last = 0.0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> SchedulerStats:
+        ticks = self._ticks
+        mean = self._jitter_total / ticks if ticks else 0.0
+        return SchedulerStats(ticks, self._overruns, self._skipped, self._errors,
+                              self._jitter_last * 1000, mean * 1000, self._jitter_max * 1000)
+
+    def _run(self) -> None:
+        period = self.period / 1000
+        clock = time.perf_counter
+        wait = self._stop.wait
+        next_time = clock()
+        while not self._stop.is_set():
+            delay = next_time - clock()
+            if delay > 0 and wait(delay):
+                break
+            jitter = clock() - next_time
+            try:
+                self.tick()
+            except Exception as exc:
+                self._failed(exc)
+            self._ticks += 1
+            self._jitter_last = jitter
+            self._jitter_total += jitter
+            if jitter > self._jitter_max:
+                self._jitter_max = jitter
+            next_time += period
+            behind = clock() - next_time
+            if behind > 0:
+                self._overruns += 1
+                missed = int(behind // period)
+                self._skipped += missed
+                next_time += missed * period
+
+    def _failed(self, exc:Exception) -> None:
+        self._errors += 1
+        if self.alerts is not None:
+            self.alerts.publish(Severity.WARNING, 'scheduler', f'Tick failed: {exc!r}')
+        elif self._error is None:
+            self._error = exc
@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+from flightcontrolsystem import scheduler, cockpit
+from flightcontrolsystem.alerts import AlertBus
+
+
+class TestCommandQueue(unittest.TestCase):
+    ''' Tests handing commands between threads'''
+
+    def test_drain(self):
+        queue = scheduler.CommandQueue()
+        queue.put('-THR1-', 55)
+        queue.put('-REFUEL-')
+        self.assertEqual(queue.drain(), [('-THR1-', 55), ('-REFUEL-', None)])
+        self.assertEqual(len(queue), 0)
+
+
+class TestFixedRateScheduler(unittest.TestCase):
+    ''' Tests the fixed timestep scheduler'''
+
+    def run_ticks(self, tick, count, period=10, alerts=None):
+        """runs tick on a scheduler until it has been called count times,
+        the test waits on the ticks rather than on the clock"""
+        calls = []
+        done = threading.Event()
+        def counted():
+            calls.append(time.perf_counter())
+            if len(calls) == count:
+                done.set()
+            tick(len(calls))
+        sched = scheduler.FixedRateScheduler(counted, period, alerts)
+        sched.start()
+        self.assertTrue(done.wait(10))
+        return sched, calls
+
+    def test_rate(self):
+        sched, calls = self.run_ticks(lambda n: None, 20)
+        sched.stop()
+        stats = sched.stats()
+        self.assertFalse(sched.running)
+        self.assertEqual(stats.ticks, len(calls))
+        # every tick waits for its slot, so they are never closer than
+        # the period however busy the machine is
+        self.assertGreaterEqual(calls[19] - calls[0], 19 * 0.010 - 0.001)
+
+    def test_overrun_skips(self):
+        sched, _ = self.run_ticks(lambda n: time.sleep(0.025), 5)
+        sched.stop()
+        stats = sched.stats()
+        self.assertEqual(stats.overruns, stats.ticks)
+        self.assertGreaterEqual(stats.skipped, stats.ticks)
+
+    @staticmethod
+    def fail_every_other(n):
+        if n % 2:
+            raise ValueError(n)
+
+    def test_errors_reraised_on_stop(self):
+        sched, _ = self.run_ticks(self.fail_every_other, 6)
+        with self.assertRaises(ValueError) as caught:
+            sched.stop()
+        self.assertEqual(caught.exception.args, (1,))
+        stats = sched.stats()
+        self.assertEqual(stats.errors, (stats.ticks + 1) // 2)
+        self.assertGreaterEqual(stats.ticks, 6)
+
+    def test_errors_published(self):
+        alerts = AlertBus()
+        sched, _ = self.run_ticks(self.fail_every_other, 6, alerts=alerts)
+        sched.stop()
+        published = alerts.drain()
+        self.assertEqual(len(published), sched.stats().errors)
+        self.assertEqual({alert.source for alert in published}, {'scheduler'})
+
+
+class TestRateSchedule(unittest.TestCase):
+    ''' Tests spreading the slow pairs over the ticks'''
+
+    def test_every_pair_at_its_rate(self):
+        sched = scheduler.RateSchedule.from_rates(cockpit.DASH_NAMES, cockpit.RATES, 20)
+        self.assertEqual(sched.divisors, (1, 1, 50, 50, 50, 50, 50, 10, 1))
+        self.assertEqual(sched.cycle, 50)
+        for i, step in enumerate(sched.divisors):
+            self.assertEqual(sum(i in slot for slot in sched.slots), sched.cycle // step)
+        self.assertEqual(sched.load, (3, 4))
+
+    def test_slow_pairs_are_spread(self):
+        sched = scheduler.RateSchedule([4, 4, 4, 4, 2, 2])
+        self.assertEqual(sched.load, (2, 2))
+        self.assertEqual(sched.masks[0], sum(1 << i for i in sched.slots[0]))
+
+
+class TestCockpitRates(unittest.TestCase):
+    ''' Tests reading the dash in rate groups'''
+
+    def fly(self, rates, ticks=600, period=100):
+        pit = cockpit.headless(sims=cockpit.simulations.build())
+        if rates:
+            pit.set_rates(rates, period)
+        pit.step([('-THR1-', 70), ('-THR2-', 40)], period)
+        rows = [(pit.step((), period), pit.fresh) for _ in range(ticks)]
+        return pit, rows
+
+    def test_compass_drift_follows_time(self):
+        # a minute is 300 steps of the walk whatever the tick or rates, a
+        # pair read in rate groups may not have been read for its last one
+        for rates, tick in ((None, 200), (None, 100), (cockpit.RATES, 100), (cockpit.RATES, 20), (None, 30)):
+            pit = cockpit.headless(sims=cockpit.simulations.build())
+            if rates:
+                pit.set_rates(rates, tick)
+            for _ in range(round(60000 / tick)):
+                pit.step((), tick)
+            self.assertIn(pit.compass.noise.drawn, (299, 300), (rates, tick))
+
+    def test_slow_pairs_integrate(self):
+        _, single = self.fly(None)
+        pit, multi = self.fly(cockpit.RATES)
+        fuel = [pit.names.index(name) for name in ('fuelL', 'fuelC', 'fuelR')]
+        seen = 0
+        for (expected, _), (readings, fresh) in zip(single, multi):
+            seen |= fresh
+            self.assertEqual(readings[0], expected[0])
+            for i in fuel:
+                if fresh & (1 << i):
+                    self.assertAlmostEqual(readings[i], expected[i], places=6)
+        self.assertEqual(seen, pit.all_fresh)
+        self.assertLess(max(bin(fresh).count('1') for _, fresh in multi), len(pit.dash))
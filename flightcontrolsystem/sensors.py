@@ -5,47 +5,77 @@ connect to a simulator, but in the near future they will
 individually connect to hardware
  """
 
-from simulations import Simulator
+from typing import TYPE_CHECKING
+from calibration import Calibration
+if TYPE_CHECKING:
+    from simulations import Simulator
+
+#scale factors shared by the sensors and the headless fleet simulator
+TACH_SCALE_FACTOR = 0.025
+TEMPR_SCALE_FACTOR = 75.0/1.3
+TEMPR_OFFSET = -20.0
+NO_SPEED = 0
+AIRSPEED_SCALE_FACTOR = 550.0/2.79
 
 class Sensors:
     """This is the base class from which all of our sensors will be derived,
     so it has little functionality other than being a common definition 
     for the interface """
     
-    def __init__(self, sim:Simulator) -> None:
+    def __init__(self, sim:'Simulator') -> None:
         """This parameter is the instance
           of the simulator class that 
           provides the data. """
         self.sim = sim
 
-    def read_sensor(self, values:dict) -> float:
+    def read_sensor(self, values:dict, dt:float=None) -> float:
         """takes in parameter as dict of values from event loop and 
-        returns a value obtained """
-        return self.sim.get_data(values)
+        returns a value obtained.  dt is the miliseconds since the last
+        reading, see Simulator.get_data """
+        return self.sim.get_data(values, dt)
 
 
 class Tach_sensor(Sensors):
-    """calculates tach values to be displayed"""
-    def read_sensor(self, values:dict) -> float:
-        TACH_SCALE_FACTOR = 0.025
-        return self.sim.get_data(values) * TACH_SCALE_FACTOR
+    """calculates tach values to be displayed, scale defaults to
+    TACH_SCALE_FACTOR.  A calibration table replaces the scale"""
+    def __init__(self, sim:'Simulator', scale:float=None, calibration:Calibration=None) -> None:
+        super().__init__(sim)
+        self.scale = TACH_SCALE_FACTOR if scale is None else scale
+        self.calibration = calibration or Calibration.linear(self.scale)
+        self.convert = self.calibration.convert
+
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        return self.convert(self.sim.get_data(values, dt))
     
 
 class Tempr_sensor(Sensors):
-    """calculates tempr values to be displayed"""
-    def read_sensor(self, values: dict) -> float:
-        TEMPR_SCALE_FACTOR = 75.0/1.3
-        OFFSET = -20.0
-        return (self.sim.get_data(values) * TEMPR_SCALE_FACTOR) - OFFSET
+    """calculates tempr values to be displayed, scale and offset default
+    to TEMPR_SCALE_FACTOR and TEMPR_OFFSET.  A calibration table, for a
+    thermocouple curve say, replaces both"""
+    def __init__(self, sim:'Simulator', scale:float=None, offset:float=None,
+                 calibration:Calibration=None) -> None:
+        super().__init__(sim)
+        self.scale = TEMPR_SCALE_FACTOR if scale is None else scale
+        self.offset = TEMPR_OFFSET if offset is None else offset
+        self.calibration = calibration or Calibration.linear(self.scale, self.offset)
+        self.convert = self.calibration.convert
+
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        return self.convert(self.sim.get_data(values, dt))
     
 
 class Fuel_sensor(Sensors):
     """The fuel sensor will use hardware in the future, so a class needs to 
-    be constructed as a placeholder now.  This is about as simple as can be,
-      there are presently no changes to the constructor or read_sensor(). """
+    be constructed as a placeholder now.  Without a calibration table for
+    the sender the reading is passed straight through"""
+    def __init__(self, sim:'Simulator', calibration:Calibration=None) -> None:
+        super().__init__(sim)
+        self.calibration = calibration
 
-    def read_sensor(self, values: dict) -> float:
-        return super().read_sensor(values)
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        if self.calibration is None:
+            return super().read_sensor(values, dt)
+        return self.calibration.convert(self.sim.get_data(values, dt))
     
     @staticmethod
     def pounds_to_gallons(pounds:float):
@@ -57,17 +87,22 @@ class Compass_sensor(Sensors):
     """ The compass sensor will use hardware in the future, but for now it is
     just a place holder"""
     
-    def read_sensor(self, values: dict) -> float:
-        return super().read_sensor(values)
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        return super().read_sensor(values, dt)
     
 
 class Airspeed_sensor(Sensors):
     """Does simple conversion for what the scale factor is to calculate
-    aispeed from 0 to 550mph aprox."""
-    def read_sensor(self, values: dict) -> float:
-        NO_SPEED = 0
-        AIRSPEED_SCALE_FACTOR = 550.0/2.79
-        speed = int(self.sim.get_data(values) * AIRSPEED_SCALE_FACTOR)
+    aispeed from 0 to 550mph aprox.  scale defaults to AIRSPEED_SCALE_FACTOR,
+    a calibration table for the pitot replaces it"""
+    def __init__(self, sim:'Simulator', scale:float=None, calibration:Calibration=None) -> None:
+        super().__init__(sim)
+        self.scale = AIRSPEED_SCALE_FACTOR if scale is None else scale
+        self.calibration = calibration or Calibration.linear(self.scale)
+        self.convert = self.calibration.convert
+
+    def read_sensor(self, values:dict, dt:float=None) -> float:
+        speed = int(self.convert(self.sim.get_data(values, dt)))
         if speed < NO_SPEED:
             return NO_SPEED
         else:
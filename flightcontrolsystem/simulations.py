@@ -1,23 +1,14 @@
-import random
 from flightsimexception import FlightSimException
+from filters import Kernel, MovingAverage
+from noise import NoiseSource, BiasedWalk, seed_for
 """ Simulators for each sensor """
 
 
-#each instance of the simulation needs to be global to be
-#accessed by program.  If the classes were instantiated elsewhere
-#this would not be needed.  This simulation emulates hardware
-#so this becomes an association/aggrigation
-global tach1_
-global tach2_
-global compass_
-global engTemp1_
-global engTemp2_
-global fuelL_
-global fuelC_
-global fuelR_
-global airspeed_
-
-global UPDATE_PERIOD
+#each instance of the simulation is global so it can be shared by the
+#program.  They are built from the factories at the bottom of this file
+#the first time they are asked for (simulations.tach1_ or get('tach1_')),
+#so importing this module builds nothing.  This simulation emulates
+#hardware so this becomes an association/aggrigation
 UPDATE_PERIOD = 200
 
 
@@ -31,57 +22,140 @@ class Simulator:
         self.devID = devID
         self.value = initVal # default value
 
-    def get_data(self,values:dict) -> float:
+    def get_data(self,values:dict,dt:float=None) -> float:
         """values is the dictionary of values of which the devID is the key
+        and dt is the time in miliseconds since the last call, one
+        UPDATE_PERIOD when it is None.
         Base Class Simulation just returns initVal from constructor
         Need to override to get simulated data"""
         return self.value
 
+    def get_state(self) -> tuple:
+        """every number needed to put the simulator back exactly where it
+        is now, see snapshot.py"""
+        return (self.value,)
+
+    def set_state(self, state:tuple) -> None:
+        self.value = state[0]
+
     
 class Compass(Simulator):
     """Creates a random walk with bias for heading,
     Outputs a value between 0 and 359 degrees as an integer
-    in the float output (for display purposes)"""
+    in the float output (for display purposes).  The walk takes one step
+    every UPDATE_PERIOD, so it drifts as fast however often it is read"""
 
     # _value = 0
 
-    def __init__(self, devID: str, initVal: float) -> None:
+    def __init__(self, devID: str, initVal: float, noise:NoiseSource=None, name:str='compass_',
+                 run:int=None) -> None:
+        """noise makes the steps of the walk, by default a walk that
+        drifts COMPASS_DRIFT degrees a step seeded from name and run.
+        Noise is seeded that way everywhere, see seed_for(), so this
+        default walks the same as the built-in compass"""
         super().__init__(devID, initVal)
         self.initVal = initVal
-
-    def get_data(self, values:dict=None) -> float:
-        """Creates the radom walk output with drift"""
-        delta = random.random() - 0.5 + 0.1 #0.005 this is how fast compass drifts
-        self.initVal = (self.initVal + delta + 360) %360
-        return int(self.initVal)
+        if noise is None:
+            noise = NoiseSource(BiasedWalk(COMPASS_STEP, COMPASS_DRIFT), seed_for(name, run))
+        self.noise = noise
+        self.period = UPDATE_PERIOD # ms per step of the walk
+        self._carry = 0.0 # ms since the last whole step
+
+    def get_data(self, values:dict=None, dt:float=None) -> float:
+        """Creates the radom walk output with drift, one step for every
+        period in dt and one step when dt is None.  Any part of a period
+        left over carries into the next call, like DelaySim"""
+        if dt is None:
+            steps = 1
+        else:
+            carry = self._carry + dt
+            steps = int(carry // self.period)
+            self._carry = carry - steps * self.period
+        heading = self.initVal
+        step = self.noise.next
+        for _ in range(steps):
+            heading = (heading + step() + 360) %360
+        self.initVal = heading
+        return int(heading)
+
+    def get_state(self) -> tuple:
+        return (self.value, self.initVal, self._carry, *self.noise.get_state())
+
+    def set_state(self, state:tuple) -> None:
+        self.value, self.initVal, self._carry = state[:3]
+        self.noise.set_state(state[3:])
     
-    @classmethod
-    def setCompass(cls, direction:int) -> None:
-        cls.self.initVal = direction % 360
+    def setCompass(self, direction:int) -> None:
+        self.initVal = direction % 360
 
 
 class DelaySim(Simulator):
     """Create a delay filter to cause a lag in the outputs"""
-    def __init__(self, devID:str, initVal:float, outLow:float ,outHigh:float ,delay:int) -> None:
+    def __init__(self, devID:str, initVal:float, outLow:float ,outHigh:float ,delay:int,
+                 kernel:type[Kernel]=MovingAverage, noise:NoiseSource=None) -> None:
         super().__init__(devID, initVal)
         """devID is the device used for input with a range of 0 - 100
         initVal is the inital value of the output
         outLow and outHigh define the range of the output device
-        delay is the delay in miliseconds"""
+        delay is the delay in miliseconds
+        kernel is the filter from filters.py that shapes the lag
+        noise is an optional NoiseSource added to the input, in output units"""
+        self.noise = noise
         self._delay = delay
-        numback = self._delay//UPDATE_PERIOD # number of backvalues
-        self.backvalues = [initVal] * numback
+        self.period = UPDATE_PERIOD # ms per sample in the lag window
+        self._carry = 0.0 # ms since the last whole sample
+        numback = self._delay//self.period # number of backvalues
+        self.filter = kernel(numback, initVal)
         self.slope = (outHigh - outLow) / 100.0
         self.offset = outLow / self.slope
 
-    def get_data(self, values: dict) -> float:
-        """uses the value found in the dictionary as the input"""
-        val = ((values[self.devID]) - self.offset) * self.slope
-        self.backvalues.pop(0)
-        self.backvalues.append(val)
-        self.value = (sum(self.backvalues)/len(self.backvalues))
+    def _input(self, values:dict) -> float:
+        """scales the input device into the output range"""
+        return ((values[self.devID]) - self.offset) * self.slope
+
+    def get_data(self, values: dict, dt:float=None) -> float:
+        """uses the value found in the dictionary as the input, held
+        for dt miliseconds.  The input is sampled once per period and any
+        part of a period left over carries into the next call, so one
+        long step lands exactly where many short ones would"""
+        sample = self._input(values)
+        if dt is None:
+            samples = 1
+        else:
+            carry = self._carry + dt
+            samples = int(carry // self.period)
+            self._carry = carry - samples * self.period
+        # noise is only drawn when a sample is taken, so reads between
+        # samples do not use up the stream
+        if samples and self.noise is not None:
+            sample += self.noise.next()
+        if dt is None:
+            self.value = self.filter.step(sample)
+        else:
+            self.value = self.filter.advance(sample, samples)
         return self.value
-    
+
+    def get_state(self) -> tuple:
+        noise = self.noise.get_state() if self.noise is not None else ()
+        return (self.value, self._delay, self._carry, *noise, *self.filter.get_state())
+
+    def set_state(self, state:tuple) -> None:
+        self.value = state[0]
+        self._delay = int(state[1])
+        self._carry = state[2]
+        # the noise state is as long as it always is for this source, the
+        # filter takes the rest since its window follows the delay
+        start = 3
+        if self.noise is not None:
+            start += len(self.noise.get_state())
+            self.noise.set_state(state[3:start])
+        self.filter.set_state(state[start:])
+
+    @property
+    def backvalues(self) -> list:
+        """the samples in the lag window, oldest first"""
+        return self.filter.history()
+
     @property
     def delay(self):
         """gets current delay"""
@@ -89,29 +163,53 @@ class DelaySim(Simulator):
     
     @delay.setter
     def delay(self, new_delay:int):
-        """sets new delay"""
+        """sets new delay, the filter keeps its history"""
         self._delay = new_delay
-        numback = self._delay // UPDATE_PERIOD
-        self.backvalues = [self.value] * numback
+        self.filter.resize(self._delay // self.period)
 
 
 class Fuel(Simulator):
     """This is where the hardware would out put data
     in this case we fabricate the data that is output"""
-    BURN_RATE = 0.002 #pounds per second takes into consideration the scale factors used
+    BURN_RATE = 0.002 #burned per throttle point every BURN_PERIOD, takes into consideration the scale factors used
+    BURN_PERIOD = 200 #ms
 
     def __init__(self, devID:str, initVal:float,devID2:str) -> None:
         super().__init__(devID,initVal)
         self.devID2 = devID2
         self.__total = initVal / 100
 
-    def get_data(self, values:dict) -> float:
-        self.__total = self.__total - (Fuel.BURN_RATE * ((values[self.devID] + values[self.devID2]) / 2))
-        if self.devID2 is not None:
-            self.__total = self.__total - (Fuel.BURN_RATE * values[self.devID2])
+    def throttle(self, values:dict) -> float:
+        """the average throttle of the engines feeding from this tank"""
+        if self.devID2 is None:
+            return values[self.devID]
+        return (values[self.devID] + values[self.devID2]) / 2
+
+    def burn(self, values:dict) -> float:
+        """scaled fuel burned per milisecond at these throttles.  A tank
+        given a BURN_RATE of its own burns at that, see factories()"""
+        return self.BURN_RATE * self.throttle(values) / Fuel.BURN_PERIOD
+
+    def get_data(self, values:dict, dt:float=None) -> float:
+        """burns the fuel for dt miliseconds at a steady throttle, the
+        burn is linear so this is exact for any dt"""
+        dt = UPDATE_PERIOD if dt is None else dt
+        self.__total = self.__total - self.burn(values) * dt
         self.__total = self.__total if self.__total > 0 else 0
         return self.__total
+
+    def time_to_empty(self, values:dict) -> float:
+        """seconds until the tank runs dry at these throttles, inf when
+        nothing is burning"""
+        burn = self.burn(values)
+        return self.__total / burn / 1000 if burn > 0 else float('inf')
     
+    def get_state(self) -> tuple:
+        return (self.value, self.__total)
+
+    def set_state(self, state:tuple) -> None:
+        self.value, self.__total = state
+
     @classmethod #changes burn rate
     def burnRate(cls, newRate:float):
         cls.BURN_RATE = newRate
@@ -136,28 +234,13 @@ class AirSpeed(DelaySim):
     """This is where the hardware would out put data
     in this case we fabricate the data that is output  refure to 
     DelaySim super class for full description"""
-    def __init__(self, devID: str, initVal: float, outLow: float, outHigh: float, delay: int, devID2:str) -> None:
-        super().__init__(devID, initVal, outLow, outHigh, delay)
+    def __init__(self, devID: str, initVal: float, outLow: float, outHigh: float, delay: int, devID2:str,
+                 noise:NoiseSource=None) -> None:
+        super().__init__(devID, initVal, outLow, outHigh, delay, noise=noise)
         self.devID2 = devID2
 
-    def get_data(self, values: dict) -> float:
-        val = (((values[self.devID] + values[self.devID2]) / 2) - self.offset) * self.slope
-        self.backvalues.pop(0)
-        self.backvalues.append(val)
-        self.value = (sum(self.backvalues)/len(self.backvalues))
-        return self.value
-    
-    @property
-    def delay(self):
-        """gets current delay"""
-        return self._delay
-    
-    @delay.setter
-    def delay(self, new_delay:int):
-        """sets new delay"""
-        self._delay = new_delay
-        numback = self._delay // UPDATE_PERIOD
-        self.backvalues = [self.value] * numback
+    def _input(self, values: dict) -> float:
+        return (((values[self.devID] + values[self.devID2]) / 2) - self.offset) * self.slope
     
 
 # create tach simulators
@@ -166,8 +249,6 @@ TACH_INITIAL = 600 #RPM
 TACH_LOW_RANGE = 0 
 TACH_HIGH_RANGE = 3850.0 #RPM Max output 
 
-tach1_ = DelaySim('-THR1-', TACH_INITIAL, TACH_LOW_RANGE, TACH_HIGH_RANGE, TACH_DELAY)
-tach2_ = DelaySim('-THR2-', TACH_INITIAL, TACH_LOW_RANGE, TACH_HIGH_RANGE, TACH_DELAY)
 
 #create temp simulators
 TEMPR_DELAY = 10000 #ms 
@@ -175,21 +256,16 @@ TEMPR_INITIAL = 0.15 #volts
 TEMPR_LOW_RANGE = 0.0 #volts = - 30 degrees F 
 TEMPR_HIGH_RANGE = 1.3 #volts = 250 degrees F 
 
-engTemp1_ = DelaySim('-THR1-', TEMPR_INITIAL, TEMPR_LOW_RANGE, TEMPR_HIGH_RANGE, TEMPR_DELAY)
-engTemp2_ = DelaySim('-THR2-', TEMPR_INITIAL, TEMPR_LOW_RANGE, TEMPR_HIGH_RANGE, TEMPR_DELAY)
 
 #create fuel burn
 INIT_CENTER = 9000
 INIT_WING = 8000
 
-fuelL_ = Fuel('-THR1-',INIT_WING ,'-THR2-')
-fuelC_ = Fuel('-THR1-', INIT_CENTER, '-THR2-')
-fuelR_ = Fuel('-THR1-', INIT_WING,'-THR2-')
-
 
 #creates compass simulations
 INIT_DIRECTION = 22
-compass_ = Compass('-COMPASS-', INIT_DIRECTION)
+COMPASS_STEP = 1.0 #degrees, width of each step of the walk
+COMPASS_DRIFT = 0.1 #degrees per step, this is how fast compass drifts
 
 #creates airspeed simulations
 DELAY_SPD = 20000 #MS
@@ -197,4 +273,85 @@ INITIAL_SPD = 0 # NOT MOVING
 LOW_RANGE_SPD = 0.31 #VOLTS OFFSET SO THROTTLE OF 10 HAS 0 MPH
 HIGH_RANGE_SPD = 3.1 #VOLTS
 
-airspeed_ = AirSpeed('-THR1-', INITIAL_SPD, LOW_RANGE_SPD, HIGH_RANGE_SPD, DELAY_SPD, '-THR2-')
\ No newline at end of file
+
+def factories(seed:int=None, **constants) -> dict:
+    """a factory for each built-in simulator.  They read the constants
+    above when they are called, so a change to a constant applies to
+    every simulator built after it, but any constant given here is used
+    instead, factories(TACH_DELAY=1000).  BURN_RATE gives just the tanks
+    these build a burn rate of their own, Fuel.burnRate() no longer
+    reaches them.  seed gives the noise a stream of its own, see
+    noise.seed_for(), so sets built side by side do not share one"""
+    unknown = constants.keys() - globals().keys() - {'BURN_RATE'}
+    if unknown:
+        raise KeyError(f'no constant called {", ".join(sorted(unknown))}')
+    def c(name:str):
+        return constants[name] if name in constants else globals()[name]
+    def tank(initial:str):
+        def build() -> Fuel:
+            fuel = Fuel('-THR1-', c(initial), '-THR2-')
+            if 'BURN_RATE' in constants:
+                fuel.BURN_RATE = constants['BURN_RATE']
+            return fuel
+        return build
+    return {
+        'tach1_': lambda: DelaySim('-THR1-', c('TACH_INITIAL'), c('TACH_LOW_RANGE'), c('TACH_HIGH_RANGE'),
+                                   c('TACH_DELAY')),
+        'tach2_': lambda: DelaySim('-THR2-', c('TACH_INITIAL'), c('TACH_LOW_RANGE'), c('TACH_HIGH_RANGE'),
+                                   c('TACH_DELAY')),
+        'engTemp1_': lambda: DelaySim('-THR1-', c('TEMPR_INITIAL'), c('TEMPR_LOW_RANGE'), c('TEMPR_HIGH_RANGE'),
+                                      c('TEMPR_DELAY')),
+        'engTemp2_': lambda: DelaySim('-THR2-', c('TEMPR_INITIAL'), c('TEMPR_LOW_RANGE'), c('TEMPR_HIGH_RANGE'),
+                                      c('TEMPR_DELAY')),
+        'fuelL_': tank('INIT_WING'),
+        'fuelC_': tank('INIT_CENTER'),
+        'fuelR_': tank('INIT_WING'),
+        'compass_': lambda: Compass('-COMPASS-', c('INIT_DIRECTION'),
+                                    NoiseSource(BiasedWalk(c('COMPASS_STEP'), c('COMPASS_DRIFT')),
+                                                seed_for('compass_', seed))),
+        'airspeed_': lambda: AirSpeed('-THR1-', c('INITIAL_SPD'), c('LOW_RANGE_SPD'), c('HIGH_RANGE_SPD'),
+                                      c('DELAY_SPD'), '-THR2-'),
+    }
+
+
+FACTORIES = factories()
+_instances = {}
+
+
+def get(name:str) -> Simulator:
+    """the global simulator called name, built the first time it is asked for"""
+    sim = _instances.get(name)
+    if sim is None:
+        sim = _instances[name] = FACTORIES[name]()
+    return sim
+
+
+def register(name:str, factory) -> None:
+    """adds or replaces a simulator factory, an existing instance is dropped"""
+    FACTORIES[name] = factory
+    _instances.pop(name, None)
+
+
+def build(factories:dict=None) -> dict:
+    """a private set of simulators fresh from factories, FACTORIES by
+    default.  Nothing else shares them, so this is how an aircraft profile
+    flies its own without touching the globals, see aircraft.py"""
+    factories = FACTORIES if factories is None else factories
+    return {name: factory() for name, factory in factories.items()}
+
+
+def reset() -> None:
+    """drops every simulator so the next get() builds a fresh one"""
+    _instances.clear()
+
+
+def simulators() -> dict:
+    """the global simulators by name"""
+    return {name: get(name) for name in FACTORIES}
+
+
+def __getattr__(name:str):
+    """lets simulations.tach1_ and friends build on first use"""
+    if name in FACTORIES:
+        return get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -22,3 +22,129 @@ class TestSim_BaseClass(unittest.TestCase):
         test3 = sim.Simulator(devID_t,initVal_t)
         self.assertEqual(test3.get_data(values_t),result_t)
 
+
+class TestFuel(unittest.TestCase):
+    ''' Tests the fuel burn'''
+
+    def test_burns_average_throttle(self):
+        tank = sim.Fuel('-THR1-', 8000, '-THR2-')
+        tank.get_data({'-THR1-': 40, '-THR2-': 60})
+        burned = 8000 - tank.total
+        self.assertAlmostEqual(burned, sim.Fuel.BURN_RATE * 50 * sim.UPDATE_PERIOD / sim.Fuel.BURN_PERIOD * 100)
+
+    def test_long_step_matches_short_ones(self):
+        values = {'-THR1-': 75, '-THR2-': 25}
+        short = sim.Fuel('-THR1-', 8000, '-THR2-')
+        long = sim.Fuel('-THR1-', 8000, '-THR2-')
+        for _ in range(600):
+            short.get_data(values, 50)
+        self.assertAlmostEqual(long.get_data(values, 30000), short.get_data(values, 0), places=6)
+
+    def test_time_to_empty(self):
+        values = {'-THR1-': 100, '-THR2-': 100}
+        tank = sim.Fuel('-THR1-', 8000, '-THR2-')
+        seconds = tank.time_to_empty(values)
+        tank.get_data(values, seconds * 1000)
+        self.assertAlmostEqual(tank.total, 0.0, places=6)
+        self.assertEqual(tank.time_to_empty({'-THR1-': 0, '-THR2-': 0}), float('inf'))
+
+
+class TestRegistry(unittest.TestCase):
+    ''' Tests the lazily built global simulators'''
+
+    def setUp(self):
+        self.built = []
+        def factory():
+            self.built.append(sim.Simulator(devID_t, initVal_t))
+            return self.built[-1]
+        sim.register('test_', factory)
+
+    def tearDown(self):
+        sim.FACTORIES.pop('test_', None)
+        sim._instances.pop('test_', None)
+
+    def test_built_on_first_use(self):
+        self.assertEqual(self.built, [])
+        first = sim.get('test_')
+        self.assertIs(sim.test_, first)
+        self.assertIs(sim.get('test_'), first)
+        self.assertEqual(self.built, [first])
+
+    def test_register_drops_the_old_one(self):
+        old = sim.get('test_')
+        sim.register('test_', lambda: sim.Simulator(devID_t, 5))
+        new = sim.get('test_')
+        self.assertIsNot(new, old)
+        self.assertEqual(new.value, 5)
+
+    def test_reset(self):
+        old = sim.get('test_')
+        sim.reset()
+        self.assertIsNot(sim.get('test_'), old)
+        self.assertEqual(len(self.built), 2)
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            sim.nothing_
+        with self.assertRaises(KeyError):
+            sim.get('nothing_')
+
+    def test_build_is_private(self):
+        sims = sim.build()
+        self.assertEqual(sims.keys(), sim.FACTORIES.keys())
+        self.assertIsNot(sims['test_'], sim.get('test_'))
+        tanks = sim.build(sim.factories(INIT_CENTER=100, BURN_RATE=0.01))
+        self.assertEqual(tanks['fuelC_'].total, 100)
+        self.assertEqual(tanks['fuelC_'].BURN_RATE, 0.01)
+        self.assertEqual(sim.Fuel.BURN_RATE, sim.get('fuelC_').BURN_RATE)
+        with self.assertRaises(KeyError):
+            sim.factories(NOT_A_CONSTANT=1)
+
+
+throttle_t = {'-THR1-': 50}
+
+
+class WideNoise(sim.NoiseSource):
+    """a noise source with a longer state than the usual seed and count"""
+
+    def get_state(self):
+        return (*super().get_state(), 7.0)
+
+    def set_state(self, state):
+        assert state[-1] == 7.0
+        super().set_state(state[:-1])
+
+
+class TestState(unittest.TestCase):
+    ''' Tests putting simulators back where they were'''
+
+    def test_noise_of_any_size(self):
+        noisy = sim.DelaySim('-THR1-', 0.15, 0.0, 1.3, 1000, noise=WideNoise(sim.BiasedWalk(0.1), 3))
+        for _ in range(20):
+            noisy.get_data(throttle_t, 150)
+        state = noisy.get_state()
+        expected = [noisy.get_data(throttle_t, 150) for _ in range(20)]
+        noisy.delay = 3000
+        noisy.set_state(state)
+        self.assertEqual([noisy.get_data(throttle_t, 150) for _ in range(20)], expected)
+
+    def test_compass_seeded_by_name(self):
+        built_in = sim.build()['compass_']
+        default = sim.Compass('-COMPASS-', sim.INIT_DIRECTION)
+        self.assertEqual([built_in.get_data() for _ in range(50)], [default.get_data() for _ in range(50)])
+
+    def test_runs_do_not_share_noise(self):
+        def walk(seed):
+            compass = sim.build(sim.factories(seed))['compass_']
+            return [compass.get_data() for _ in range(50)]
+        self.assertEqual(walk(1), walk(1))
+        self.assertNotEqual(walk(1), walk(2))
+
+    def test_noise_follows_samples_not_reads(self):
+        drawn = []
+        for dt, reads in ((50, 40), (200, 10)):
+            noisy = sim.DelaySim('-THR1-', 0.15, 0.0, 1.3, 1000, noise=sim.NoiseSource(sim.BiasedWalk(0.1), 3))
+            for _ in range(reads):
+                noisy.get_data(throttle_t, dt)
+            drawn.append(noisy.noise.drawn)
+        self.assertEqual(drawn, [10, 10])
@@ -0,0 +1,119 @@
+""" Snapshot and restore of the whole simulation.
+capture() packs the state of every simulator, noise sources included,
+and the shared Fuel.BURN_RATE into one small compressed blob, restore()
+puts all of it back exactly.  TimeWarp runs a
+headless cockpit faster than real time and keeps a checkpoint every so
+many ticks so a long flight can be jumped back into.  Its checkpoints
+also hold the cockpit's own state, Cockpit.get_state(), so a rewind
+puts the alerts, validator and rate groups back too
+
+    python snapshot.py [hours] [speed]    warps through a flight
+"""
+import struct
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable
+import simulations
+from simulations import Fuel
+from cockpit import Cockpit, headless
+
+MAGIC = b'FSS4'
+HEADER = struct.Struct('<4sdH') # magic, Fuel.BURN_RATE, number of simulators
+CHECKPOINT_EVERY = 3000 #ticks, 10 simulated minutes at 200ms
+CHECKPOINTS_KEPT = 36
+
+
+def capture(sims:dict=None) -> bytes:
+    """packs the state of sims (the simulations.py globals by default)"""
+    sims = simulations.simulators() if sims is None else sims
+    parts = [HEADER.pack(MAGIC, Fuel.BURN_RATE, len(sims))]
+    for name, sim in sims.items():
+        state = sim.get_state()
+        label = name.encode()
+        parts.append(struct.pack(f'<B{len(label)}sI{len(state)}d', len(label), label, len(state), *state))
+    return zlib.compress(b''.join(parts))
+
+
+def restore(blob:bytes, sims:dict=None) -> None:
+    """puts back the state from capture(), sims must have the same names"""
+    sims = simulations.simulators() if sims is None else sims
+    data = zlib.decompress(blob)
+    magic, burn_rate, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a simulator snapshot')
+    offset = HEADER.size
+    states = {}
+    for _ in range(count):
+        length = data[offset]
+        name = data[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        (size,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        states[name] = struct.unpack_from(f'<{size}d', data, offset)
+        offset += 8 * size
+    if states.keys() != sims.keys():
+        raise ValueError(f'snapshot holds {sorted(states)}, expected {sorted(sims)}')
+    for name, sim in sims.items():
+        sim.set_state(states[name])
+    Fuel.burnRate(burn_rate)
+
+
+class TimeWarp:
+    """Flies a cockpit headless at speed times real time (as fast as
+    possible when speed is None), checkpointing every `every` ticks.
+    The checkpoints hold the cockpit's own simulators"""
+
+    def __init__(self, cockpit:Cockpit, every:int=CHECKPOINT_EVERY, keep:int=CHECKPOINTS_KEPT) -> None:
+        self.cockpit = cockpit
+        self.every = every
+        self.keep = keep
+        self.checkpoints = OrderedDict() # tick -> (cockpit state, blob)
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self.checkpoints[self.cockpit.ticks] = (self.cockpit.get_state(), capture(self.cockpit.sims))
+        while len(self.checkpoints) > self.keep:
+            self.checkpoints.popitem(last=False)
+
+    def run(self, ticks:int, commands:Callable[[int], list]=None, speed:float=None) -> float:
+        """flies ticks more ticks, commands(tick) returns the (key, arg)
+        commands for that tick.  Returns the speed actually reached"""
+        cockpit = self.cockpit
+        period = simulations.UPDATE_PERIOD / 1000
+        start = time.perf_counter()
+        for count in range(1, ticks + 1):
+            cockpit.show(cockpit.step(commands(cockpit.ticks) if commands else ()))
+            if cockpit.ticks % self.every == 0:
+                self.checkpoint()
+            if speed:
+                ahead = start + count * period / speed - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+        elapsed = time.perf_counter() - start
+        return ticks * period / elapsed if elapsed else float('inf')
+
+    def rewind(self, tick:int) -> int:
+        """jumps back to the last checkpoint at or before tick and returns
+        the tick it landed on.  Later checkpoints are dropped"""
+        landed = max((t for t in self.checkpoints if t <= tick), default=None)
+        if landed is None:
+            raise ValueError(f'no checkpoint at or before tick {tick}')
+        state, blob = self.checkpoints[landed]
+        restore(blob, self.cockpit.sims)
+        self.cockpit.set_state(state)
+        for later in [t for t in self.checkpoints if t > landed]:
+            del self.checkpoints[later]
+        return landed
+
+
+if __name__ == '__main__':
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    warp = TimeWarp(headless())
+    ticks = int(hours * 3600 * 1000 / simulations.UPDATE_PERIOD)
+    climb = lambda tick: [('-THR1-', 100 if tick % 1000 < 600 else 40), ('-THR2-', 90)]
+    reached = warp.run(ticks, climb, speed)
+    print(f'flew {hours} h in {ticks} ticks at {reached:.0f}x real time, '
+          f'{len(warp.checkpoints)} checkpoints of {len(capture())} bytes')
@@ -0,0 +1,51 @@
+import unittest
+from flightcontrolsystem import snapshot
+
+throttles_t = [('-THR1-', 90), ('-THR2-', 35)]
+
+
+class TestSnapshot(unittest.TestCase):
+    ''' Tests capturing and restoring every simulator'''
+
+    def test_restore_is_exact(self):
+        cockpit = snapshot.headless()
+        cockpit.step(throttles_t)
+        blob = snapshot.capture()
+        first = [cockpit.step(throttles_t) for _ in range(200)]
+        cockpit.step([('-UP-', None)])
+        snapshot.restore(blob)
+        second = [cockpit.step(throttles_t) for _ in range(200)]
+        self.assertEqual(first, second)
+
+    def test_time_warp_rewind(self):
+        cockpit = snapshot.headless()
+        warp = snapshot.TimeWarp(cockpit, every=100)
+        start = cockpit.ticks
+        warp.run(250, lambda tick: throttles_t)
+        expected = [cockpit.step(throttles_t) for _ in range(10)]
+        self.assertEqual(warp.rewind(start + 250), start + 200)
+        warp.run(50, lambda tick: throttles_t)
+        self.assertEqual([cockpit.step(throttles_t) for _ in range(10)], expected)
+
+    def test_rewind_across_a_band_change(self):
+        from flightcontrolsystem.validation import Validator, default_rules
+        cockpit = snapshot.headless(sims=snapshot.simulations.build())
+        cockpit.set_rates({'engTemp1': 1000, 'engTemp2': 1000, 'compass': 600}, 200)
+        cockpit.validator = Validator(default_rules(), cockpit.names, cockpit.alerts)
+        warp = snapshot.TimeWarp(cockpit, every=50)
+        warp.run(50, lambda tick: [('-THR1-', 30), ('-THR2-', 30)])
+        cockpit.alerts.drain()
+        climb = lambda tick: [('-THR1-', 100), ('-THR2-', 100)]
+        def fly():
+            warp.run(80, climb)
+            return [cockpit.step(()) for _ in range(5)], [(a.source, a.message) for a in cockpit.alerts.drain()]
+        first = fly()
+        self.assertIn(('tach1', 'Engine RPM is REDLINE'), first[1])
+        # back before the climb the tach is in the green again, so the
+        # same climb gives the same readings and the same alerts
+        self.assertEqual(warp.rewind(60), 50)
+        self.assertEqual(fly(), first)
+
+    def test_bad_blob(self):
+        with self.assertRaises(ValueError):
+            snapshot.restore(snapshot.zlib.compress(b'nope' + bytes(20)))
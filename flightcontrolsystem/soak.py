@@ -0,0 +1,225 @@
+""" Long duration soak test.
+Flies the dash FlightSim builds, with the same validator, rate groups,
+trends, flight computer log and widget batch, against a stub window for
+hours of simulated time as fast as it will go.  A script of throttle
+and button legs is repeated for the whole run.  Every sample period the
+soak takes a tracemalloc snapshot and the tick latencies since the last
+one, and at the end reports
+    growing     allocation sites still growing over the second half of
+                the run, a ring filling up then staying put is not
+    memory      traced memory over the second half
+    latency     median of the mean tick times of the last quarter of the
+                samples against the first quarter
+Any of them past its limit fails the soak, so it can gate a build.
+tracemalloc makes a tick about 20 times slower and how much slower moves
+with the size of the traced heap, so latency drift is only judged with
+--no-trace.  Gate on one run of each
+
+    python soak.py --hours 8 --report soak.json    exits 1 when it fails
+    python soak.py --hours 24 --no-trace
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from statistics import median
+import simulations
+import aircraft
+from cockpit import StubWindow
+from instrument import Histogram
+from flightcontrol import Flight, FRAME_PERIOD, ALERT_BATCH
+
+SAMPLE_PERIOD = 600 #simulated seconds between samples
+SITE_GROWTH = 256 * 1024 #bytes an allocation site may still grow over the second half
+MEMORY_GROWTH = 1024 * 1024 #bytes all of traced memory may still grow over the second half
+LATENCY_DRIFT = 1.5 #how much slower the last quarter's median tick may be than the first's
+TOP_SITES = 20 #growing sites kept in the report
+
+#a script is a list of (seconds, throttle1, throttle2, buttons) legs, the
+#buttons are pressed as the leg starts
+SCRIPTS = {'shift': [(120, 100, 100, ('-DN-',)),
+                     (300, 85, 85, ('-UP-',)),
+                     (1200, 60, 60, ()),
+                     (30, 60, 60, ('-NORTH-',)),
+                     (600, 0, 100, ()),
+                     (300, 70, 70, ('-REFUEL-', '-REFUEL-')),
+                     (600, 40, 40, ('-DN-',)),
+                     (450, 10, 10, ('-REFUEL-',))]}
+
+
+class Soak(Flight):
+    """One soak run.  plane is the aircraft profile, tick_period the
+    simulated miliseconds per tick and trace False leaves tracemalloc
+    off, for latency alone"""
+
+    def __init__(self, plane:str=aircraft.DEFAULT, tick_period:float=simulations.UPDATE_PERIOD,
+                 script:list=SCRIPTS['shift'], sample_period:float=SAMPLE_PERIOD, trace:bool=True) -> None:
+        # the same Flight FlightSim flies, against a stub window
+        super().__init__(aircraft.load(plane), StubWindow(), tick_period, FRAME_PERIOD)
+        self.script = script
+        self.sample_period = sample_period
+        self.trace = trace
+        if self.trends:
+            self.show_trend(self.trend_default())
+        # FlightSim prints the center tank every tick
+        self.stdout = open(os.devnull, 'w')
+        self.samples = []
+        self.snapshots = []
+
+    def commands(self):
+        """(commands, ticks) for each leg of the script, round and round"""
+        while True:
+            for seconds, thr1, thr2, buttons in self.script:
+                commands = [('-THR1-', thr1), ('-THR2-', thr2)] + [(key, None) for key in buttons]
+                yield commands, max(1, round(seconds * 1000 / self.tick_period))
+
+    def frame(self, readings:tuple) -> None:
+        """what FlightSim.run does with a new snapshot"""
+        self.cockpit.show(readings)
+        for index, trend in self.trend_index:
+            trend.update(readings[index])
+        batch = self.alerts.drain(ALERT_BATCH)
+        if batch:
+            self.log.extend(batch)
+        text = self.log_view.render()
+        if text is not None:
+            self.window['-COMPUTER-'].update(text)
+        self.widgets.flush()
+
+    def run(self, hours:float) -> dict:
+        """flies hours of simulated time and returns the report"""
+        period = self.tick_period
+        ticks = round(hours * 3600 * 1000 / period)
+        per_sample = max(1, round(self.sample_period * 1000 / period))
+        step, frame, fuel = self.cockpit.step, self.frame, self.stdout
+        tank = self.cockpit.tank
+        clock = time.perf_counter_ns
+        latency = Histogram()
+        legs = self.commands()
+        left = 0
+        # a frame is drawn on the first tick at or after each frame period,
+        # so on average once every frame_period, as FlightSim.run draws
+        frame_period = frame_at = self.frame_period
+        if self.trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            for tick in range(1, ticks + 1):
+                commands = ()
+                if not left:
+                    commands, left = next(legs)
+                left -= 1
+                begin = clock()
+                readings = step(commands, period)
+                print(tank, file=fuel)
+                if tick * period >= frame_at:
+                    frame(readings)
+                    frame_at += frame_period
+                latency.add(clock() - begin)
+                if tick % per_sample == 0:
+                    self.sample(tick * period / 1000, latency)
+                    latency = Histogram()
+        finally:
+            if self.trace:
+                tracemalloc.stop()
+        return self.report(ticks, time.perf_counter() - start)
+
+    def sample(self, seconds:float, latency:Histogram) -> None:
+        summary = latency.summary()
+        sample = {'sim_s': seconds, 'mean_us': summary['mean_us'], 'p50_us': summary['p50_us'],
+                  'p99_us': summary['p99_us'], 'max_us': summary['max_us']}
+        if self.trace:
+            # the soak's own bookkeeping is not what is being tested
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)))
+            sites = {f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}': stat.size
+                     for stat in snapshot.statistics('lineno')}
+            sample['traced'] = sum(sites.values())
+            self.snapshots.append(sites)
+        self.samples.append(sample)
+
+    def report(self, ticks:int, wall:float) -> dict:
+        samples = self.samples
+        failures = []
+        report = {'aircraft': self.aircraft.name,
+                  'simulated_s': ticks * self.tick_period / 1000,
+                  'ticks': ticks,
+                  'wall_s': wall,
+                  'speedup': ticks * self.tick_period / 1000 / wall if wall else 0.0,
+                  'traced': self.trace,
+                  'samples': samples}
+        if len(samples) < 4:
+            failures.append(f'{len(samples)} samples is too few to judge, fly longer or sample more often')
+        else:
+            quarter = len(samples) // 4
+            # the mean of each sample rather than its p50, which is only as
+            # fine as the histogram buckets
+            first = median(s['mean_us'] for s in samples[:quarter])
+            last = median(s['mean_us'] for s in samples[-quarter:])
+            drift = last / first if first else 1.0
+            report['latency'] = {'first_us': first, 'last_us': last, 'drift': drift}
+            if drift > LATENCY_DRIFT and not self.trace:
+                failures.append(f'ticks are {drift:.2f}x slower at the end than at the start')
+        if self.trace and len(self.snapshots) >= 4:
+            middle, end = self.snapshots[len(self.snapshots) // 2], self.snapshots[-1]
+            growing = sorted(((end[site] - middle.get(site, 0), site) for site in end), reverse=True)
+            report['growing'] = [{'site': site, 'middle_kib': middle.get(site, 0) / 1024,
+                                  'last_kib': end[site] / 1024, 'growth_kib': growth / 1024}
+                                 for growth, site in growing[:TOP_SITES] if growth > 0]
+            for growth, site in growing:
+                if growth <= SITE_GROWTH:
+                    break
+                failures.append(f'{site} grew {growth / 1024:.0f} KiB over the second half')
+            grown = samples[-1]['traced'] - samples[len(samples) // 2]['traced']
+            report['memory'] = {'middle_kib': samples[len(samples) // 2]['traced'] / 1024,
+                                'last_kib': samples[-1]['traced'] / 1024, 'growth_kib': grown / 1024}
+            if grown > MEMORY_GROWTH:
+                failures.append(f'traced memory grew {grown / 1024:.0f} KiB over the second half')
+        report['failures'] = failures
+        report['passed'] = not failures
+        return report
+
+    def close(self) -> None:
+        self.stdout.close()
+        self.log.close()
+
+
+def summary(report:dict) -> str:
+    """the report as a few lines for the terminal"""
+    lines = [f"{report['aircraft']}: {report['simulated_s'] / 3600:.1f} h simulated in {report['wall_s']:.0f} s "
+             f"({report['speedup']:.0f}x), {report['ticks']} ticks"]
+    if 'latency' in report:
+        latency = report['latency']
+        lines.append(f"tick mean {latency['first_us']:.1f} us -> {latency['last_us']:.1f} us "
+                     f"(x{latency['drift']:.2f}{', traced so not judged' if report['traced'] else ''})")
+    if 'memory' in report:
+        memory = report['memory']
+        lines.append(f"traced {memory['middle_kib']:.0f} KiB -> {memory['last_kib']:.0f} KiB over the second half")
+        for site in report['growing'][:5]:
+            lines.append(f"  +{site['growth_kib']:8.1f} KiB  {site['site']}")
+    lines.extend(f'FAIL {failure}' for failure in report['failures'])
+    lines.append('PASS' if report['passed'] else 'FAILED')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='headless long duration soak test')
+    parser.add_argument('--hours', type=float, default=8.0, help='simulated hours to fly')
+    parser.add_argument('--aircraft', default=aircraft.DEFAULT, help='the aircraft profile to fly')
+    parser.add_argument('--tick', type=float, default=simulations.UPDATE_PERIOD, help='miliseconds per tick')
+    parser.add_argument('--sample', type=float, default=SAMPLE_PERIOD, help='simulated seconds between samples')
+    parser.add_argument('--no-trace', action='store_true', help='latency only, without tracemalloc')
+    parser.add_argument('--report', help='also write the whole report to this JSON file')
+    args = parser.parse_args()
+    soak = Soak(args.aircraft, args.tick, sample_period=args.sample, trace=not args.no_trace)
+    try:
+        result = soak.run(args.hours)
+    finally:
+        soak.close()
+    print(summary(result))
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(result, file, indent=2)
+    sys.exit(0 if result['passed'] else 1)
@@ -0,0 +1,65 @@
+import unittest
+from flightcontrolsystem import soak
+
+
+class TestSoak(unittest.TestCase):
+    ''' Tests the soak report and its pass/fail'''
+
+    def test_clean_run_passes(self):
+        run = soak.Soak(sample_period=20)
+        report = run.run(0.04)
+        run.close()
+        self.assertTrue(report['passed'], report['failures'])
+        self.assertEqual(report['ticks'], 720)
+        self.assertEqual(len(report['samples']), 7)
+        self.assertIn('memory', report)
+        self.assertIn('drift', report['latency'])
+        self.assertIn('PASS', soak.summary(report))
+
+    def test_leak_is_flagged(self):
+        run = soak.Soak(sample_period=20)
+        kept = []
+        show = run.cockpit.show
+        def leaky(readings):
+            kept.append(bytes(2048))
+            show(readings)
+        run.cockpit.show = leaky
+        report = run.run(0.04)
+        run.close()
+        self.assertFalse(report['passed'])
+        self.assertIn('soak_test.py', report['growing'][0]['site'])
+        self.assertTrue(any('soak_test.py' in failure for failure in report['failures']))
+
+    def test_latency_drift_is_flagged(self):
+        run = soak.Soak(sample_period=20, trace=False)
+        grown = []
+        step = run.cockpit.step
+        def slower(commands, dt):
+            grown.extend(range(20))
+            sum(grown)
+            return step(commands, dt)
+        run.cockpit.step = slower
+        report = run.run(0.1)
+        run.close()
+        self.assertGreater(report['latency']['drift'], soak.LATENCY_DRIFT)
+        self.assertFalse(report['passed'])
+
+    def test_widgets_are_quantized(self):
+        run = soak.Soak(tick_period=20, trace=False)
+        run.run(0.01)
+        run.close()
+        self.assertIsInstance(run.window['-TACH1-'].value, int)
+        self.assertIsInstance(run.window['-AIRSPEED-'].value, str)
+        # fed once a frame, not once a tick
+        self.assertEqual(run.trends['airspeed'].span, 60 * 1000 // soak.FRAME_PERIOD)
+        self.assertEqual(run.trends['airspeed'].history.samples, 3600 * 10 // soak.FRAME_PERIOD)
+
+    def test_too_short_fails(self):
+        run = soak.Soak(trace=False)
+        report = run.run(0.01)
+        run.close()
+        self.assertFalse(report['passed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
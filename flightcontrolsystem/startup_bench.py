@@ -0,0 +1,65 @@
+""" Startup benchmark for short lived batch workers.
+Starts fresh interpreters and reports the median time to import each
+entry point and the latency of the first tick of a headless cockpit
+
+    python startup_bench.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RUNS = 15
+
+#each probe prints a JSON dict of milliseconds
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+result = {{"import_ms": (imported - start) * 1000,
+           "tk_loaded": "tkinter" in sys.modules,
+           "numpy_loaded": "numpy" in sys.modules}}
+if {tick}:
+    import cockpit
+    built = time.perf_counter()
+    pit = cockpit.headless()
+    pit.show(pit.step([("-THR1-", 50)]))
+    result["first_tick_ms"] = (time.perf_counter() - built) * 1000
+print(json.dumps(result))
+'''
+
+ENTRY_POINTS = (('simulations', True), ('cockpit', True), ('fleet', False), ('flightcontrol', False))
+
+
+def probe(module:str, tick:bool) -> dict:
+    out = subprocess.run([sys.executable, '-c', PROBE.format(module=module, tick=tick)],
+                         cwd=HERE, capture_output=True, text=True)
+    if out.returncode:
+        return None
+    return json.loads(out.stdout)
+
+
+def interpreter_ms() -> float:
+    import time
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    print(f'bare interpreter start  {statistics.median(interpreter_ms() for _ in range(runs)):8.1f} ms')
+    for module, tick in ENTRY_POINTS:
+        results = [probe(module, tick) for _ in range(runs)]
+        if None in results:
+            print(f'import {module:<16} failed (missing dependency?)')
+            continue
+        line = f'import {module:<16} {statistics.median(r["import_ms"] for r in results):8.1f} ms'
+        if tick:
+            line += f'   first tick {statistics.median(r["first_tick_ms"] for r in results):6.2f} ms'
+        loaded = [name for name in ('tk', 'numpy') if results[0][f'{name}_loaded']]
+        line += f'   loads {", ".join(loaded)}' if loaded else '   headless'
+        print(line)
@@ -0,0 +1,195 @@
+""" Parameter sweeps over the headless simulation.
+A point is a dict of simulations.py parameters, fly() builds a private
+set of simulators from them, flies a headless cockpit on it through a
+throttle profile and returns summary metrics.  Nothing in simulations.py
+is changed, so a sweep can run beside a live cockpit.
+Sweep fans the points across every core with a process pool and keeps
+each result on disk keyed by a hash of the point and the profile, so
+running a sweep again only flies the points it has not seen
+
+    python sweep.py --grid TACH_DELAY=1000,1500,2000 --grid BURN_RATE=0.001,0.002
+    python sweep.py --sample 20 --profile cruise --minutes 60
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import simulations
+from simulations import Fuel
+from cockpit import DASH_NAMES, FUEL_TANKS, headless
+from alerts import AlertBus
+
+CACHE_VERSION = 2 #bump when fly() changes what a point produces
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sweep_cache')
+
+#the parameters a point may set, with the range sample() draws from
+PARAMETERS = {'TACH_DELAY': (200, 5000),
+              'TEMPR_DELAY': (2000, 30000),
+              'DELAY_SPD': (5000, 40000),
+              'BURN_RATE': (0.0005, 0.004),
+              'INIT_CENTER': (2000, 10000),
+              'INIT_WING': (2000, 10000)}
+
+#a throttle profile is a list of (seconds, throttle1, throttle2) legs
+PROFILES = {'climb': [(60, 100, 100), (240, 80, 80), (300, 60, 60)],
+            'cruise': [(30, 90, 90), (570, 55, 55)],
+            'engine_out': [(60, 100, 100), (120, 0, 100), (420, 60, 60)]}
+
+
+def defaults() -> dict:
+    """the parameters as simulations.py has them now"""
+    return {name: Fuel.BURN_RATE if name == 'BURN_RATE' else getattr(simulations, name)
+            for name in PARAMETERS}
+
+
+def grid(**values) -> list:
+    """every combination of the listed values, grid(TACH_DELAY=[1000, 2000])"""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*values.values())]
+
+
+def sample(count:int, seed:int=None, names:tuple=None) -> list:
+    """count points drawn uniformly from the PARAMETERS ranges"""
+    rng = random.Random(seed)
+    names = names or tuple(PARAMETERS)
+    return [{name: rng.uniform(*PARAMETERS[name]) for name in names} for _ in range(count)]
+
+
+def noise_seed(point:dict) -> int:
+    """the noise seed of point, every point flies noise of its own and
+    the same point always flies the same noise"""
+    return zlib.crc32(json.dumps(point, sort_keys=True).encode())
+
+
+def simulators(point:dict) -> dict:
+    """the built-in simulators with the parameters of point, a set of
+    their own that nothing else flies"""
+    for name in point:
+        if name not in PARAMETERS:
+            raise KeyError(f'{name} is not a sweep parameter')
+    return simulations.build(simulations.factories(noise_seed(point), **point))
+
+
+def fly(point:dict, profile:list, period:float=None) -> dict:
+    """flies one point through profile headless and returns its metrics.
+    Parameters left out of the point keep their simulations.py value"""
+    return _fly(simulators(point), profile, simulations.UPDATE_PERIOD if period is None else period)
+
+
+def _fly(sims:dict, profile:list, period:float) -> dict:
+    alerts = AlertBus(maxlen=None)
+    cockpit = headless(alerts, sims=sims)
+    airspeed = DASH_NAMES.index('airspeed')
+    tanks = [DASH_NAMES.index(name) for name in FUEL_TANKS]
+    peak = 0.0
+    empty = {}
+    elapsed = 0.0
+    for seconds, thr1, thr2 in profile:
+        commands = [('-THR1-', thr1), ('-THR2-', thr2)]
+        for _ in range(round(seconds * 1000 / period)):
+            readings = cockpit.step(commands, period)
+            cockpit.show(readings)
+            commands = ()
+            elapsed += period / 1000
+            peak = max(peak, readings[airspeed])
+            for name, index in zip(FUEL_TANKS, tanks):
+                if name not in empty and readings[index] <= 0:
+                    empty[name] = elapsed
+    counts = Counter(f'{alert.source}.{alert.severity.name}' for alert in alerts.drain())
+    return {'seconds': elapsed,
+            'peak_airspeed': peak,
+            'alerts': dict(sorted(counts.items())),
+            'empty_s': {name: empty.get(name) for name in FUEL_TANKS},
+            'endurance_s': cockpit.endurance()}
+
+
+def key(point:dict, profile:list, period:float=None) -> str:
+    """hash of everything that decides the result of a point"""
+    text = json.dumps({'version': CACHE_VERSION, 'point': {**defaults(), **point},
+                       'profile': profile, 'period': period or simulations.UPDATE_PERIOD},
+                      sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Sweep:
+    """Flies points on a process pool with a cache of finished points in
+    cache_dir.  workers defaults to every core"""
+
+    def __init__(self, profile:list, cache_dir:str=CACHE_DIR, workers:int=None) -> None:
+        self.profile = profile
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count()
+        self.hits = 0
+        self.flown = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, name:str) -> str:
+        return os.path.join(self.cache_dir, name + '.json')
+
+    def load(self, name:str) -> dict:
+        try:
+            with open(self._path(name)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, name:str, result:dict) -> None:
+        # written beside the cache entry then renamed, so a sweep that is
+        # killed never leaves half a result behind.  The temp file is
+        # named for the process so two sweeps never write the same one
+        temp = f'{self._path(name)}.{os.getpid()}.tmp'
+        with open(temp, 'w') as file:
+            json.dump(result, file)
+        os.replace(temp, self._path(name))
+
+    def run(self, points:list) -> list:
+        """(point, metrics) for every point, in order"""
+        names = [key(point, self.profile) for point in points]
+        results = [self.load(name) for name in names]
+        todo = [i for i, result in enumerate(results) if result is None]
+        self.hits += len(points) - len(todo)
+        if todo:
+            with ProcessPoolExecutor(min(self.workers, len(todo))) as pool:
+                flown = pool.map(fly, [points[i] for i in todo], itertools.repeat(self.profile))
+                for i, result in zip(todo, flown):
+                    self.save(names[i], result)
+                    results[i] = result
+            self.flown += len(todo)
+        return list(zip(points, results))
+
+
+def parse_grid(specs:list) -> list:
+    """['TACH_DELAY=1000,2000', ...] -> grid points"""
+    values = {}
+    for spec in specs:
+        name, _, listed = spec.partition('=')
+        values[name] = [float(value) for value in listed.split(',')]
+    return grid(**values)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='headless parameter sweeps')
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2',
+                        help=f'values for one parameter, any of {", ".join(PARAMETERS)}')
+    parser.add_argument('--sample', type=int, help='random points instead of a grid')
+    parser.add_argument('--seed', type=int, help='seed for --sample')
+    parser.add_argument('--profile', default='climb', choices=PROFILES)
+    parser.add_argument('--minutes', type=float, help='repeat the profile to fly this long')
+    parser.add_argument('--cache', default=CACHE_DIR, help='folder the results are kept in')
+    parser.add_argument('--workers', type=int, help='processes, every core by default')
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    if args.minutes:
+        length = sum(leg[0] for leg in profile)
+        profile = profile * max(1, round(args.minutes * 60 / length))
+    points = sample(args.sample, args.seed) if args.sample else parse_grid(args.grid) or [{}]
+    sweep = Sweep(profile, args.cache, args.workers)
+    for point, metrics in sweep.run(points):
+        print(json.dumps({'point': point, **metrics}))
+    print(f'{len(points)} points, {sweep.flown} flown, {sweep.hits} from the cache')
@@ -0,0 +1,80 @@
+import tempfile
+import unittest
+from flightcontrolsystem import sweep
+
+profile_t = [(20, 100, 100), (20, 40, 40)]
+
+
+class TestPoints(unittest.TestCase):
+    ''' Tests building the points of a sweep'''
+
+    def test_grid(self):
+        points = sweep.grid(TACH_DELAY=[1000, 2000], BURN_RATE=[0.001, 0.002, 0.003])
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points[0], {'TACH_DELAY': 1000, 'BURN_RATE': 0.001})
+
+    def test_sample_is_seeded(self):
+        self.assertEqual(sweep.sample(3, seed=4), sweep.sample(3, seed=4))
+        for point in sweep.sample(20, seed=1):
+            for name, value in point.items():
+                low, high = sweep.PARAMETERS[name]
+                self.assertTrue(low <= value <= high)
+
+    def test_key(self):
+        self.assertEqual(sweep.key({}, profile_t), sweep.key(sweep.defaults(), profile_t))
+        self.assertNotEqual(sweep.key({'BURN_RATE': 0.003}, profile_t), sweep.key({}, profile_t))
+
+
+class TestFly(unittest.TestCase):
+    ''' Tests flying one point'''
+
+    def test_globals_untouched(self):
+        simulations = sweep.simulations
+        before = sweep.defaults()
+        live = sweep.headless()
+        tank = simulations.get('fuelL_')
+        fast = sweep.fly({'BURN_RATE': 0.02, 'INIT_WING': 2000}, profile_t)
+        slow = sweep.fly({}, profile_t)
+        self.assertEqual(sweep.defaults(), before)
+        self.assertIs(simulations.get('fuelL_'), tank)
+        self.assertIs(live.dash[4][0].sim, tank)
+        self.assertEqual(tank.BURN_RATE, simulations.Fuel.BURN_RATE)
+        self.assertAlmostEqual(fast['seconds'], 40.0)
+        self.assertIsNotNone(fast['empty_s']['fuelL'])
+        self.assertIsNone(slow['empty_s']['fuelL'])
+        self.assertGreater(slow['endurance_s']['fuelC'], fast['endurance_s']['fuelC'])
+        self.assertGreater(slow['peak_airspeed'], 0)
+
+    def test_point_is_flown(self):
+        slow = sweep.fly({'DELAY_SPD': 40000}, [(3, 100, 100)])
+        quick = sweep.fly({'DELAY_SPD': 2000}, [(3, 100, 100)])
+        self.assertGreater(quick['peak_airspeed'], slow['peak_airspeed'] * 4)
+
+    def test_points_fly_their_own_noise(self):
+        def walk(point):
+            compass = sweep.simulators(point)['compass_']
+            return [compass.get_data() for _ in range(50)]
+        self.assertEqual(walk({'TACH_DELAY': 1000}), walk({'TACH_DELAY': 1000}))
+        self.assertNotEqual(walk({'TACH_DELAY': 1000}), walk({'TACH_DELAY': 2000}))
+
+    def test_bad_parameter(self):
+        with self.assertRaises(KeyError):
+            sweep.fly({'UPDATE_PERIOD': 50}, profile_t)
+
+
+class TestSweep(unittest.TestCase):
+    ''' Tests the pool and the cache'''
+
+    def test_cache(self):
+        points = sweep.grid(TACH_DELAY=[1000, 3000], DELAY_SPD=[10000, 20000])
+        with tempfile.TemporaryDirectory() as folder:
+            first = sweep.Sweep(profile_t, folder, workers=2)
+            results = first.run(points)
+            self.assertEqual((first.flown, first.hits), (4, 0))
+            again = sweep.Sweep(profile_t, folder, workers=2)
+            self.assertEqual(again.run(points + [{}]), results + [({}, sweep.fly({}, profile_t))])
+            self.assertEqual((again.flown, again.hits), (1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+""" Live telemetry for the ground station.
+The Publisher streams every tick's sensor readings and every alert as
+compact binary frames over a local TCP or Unix socket to any number of
+subscribers.  Each subscriber has its own bounded queue, when one falls
+behind its oldest frames are dropped, so a slow consumer never holds up
+the tick or the other subscribers.
+
+A frame is a little endian header, the length of the body, the kind,
+the tick and time.time(), then the body
+    HELLO       the column names as JSON, sent once on connect
+    READINGS    one double per column
+    ALERT       severity, source length, source and the message in UTF-8
+
+    python telemetry.py [host:port | unix path]    reference subscriber
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+from alerts import Alert, Severity
+
+HEADER = struct.Struct('<IBId') # body length, kind, tick, time
+ALERT_HEAD = struct.Struct('<BB') # severity, length of source
+HELLO, READINGS, ALERT = range(3)
+QUEUE_SIZE = 256 #frames a subscriber may fall behind before the oldest are dropped
+WRITE_BUFFER = 64 * 1024 #bytes the socket may buffer, past this frames wait in the queue
+DEFAULT_ADDRESS = ('127.0.0.1', 5700)
+
+
+def encode(kind:int, tick:int, body:bytes, stamp:float=None) -> bytes:
+    return HEADER.pack(len(body), kind, tick, time.time() if stamp is None else stamp) + body
+
+
+def encode_readings(tick:int, readings:tuple) -> bytes:
+    return encode(READINGS, tick, struct.pack(f'<{len(readings)}d', *readings))
+
+
+def encode_alert(tick:int, alert:Alert) -> bytes:
+    source = alert.source.encode()
+    body = ALERT_HEAD.pack(alert.severity, len(source)) + source + alert.message.encode()
+    return encode(ALERT, tick, body, alert.timestamp)
+
+
+class Frame(NamedTuple):
+    """a decoded frame, data is the column names, the readings or the Alert"""
+    kind: int
+    tick: int
+    stamp: float
+    data: object
+
+
+def decode(kind:int, tick:int, stamp:float, body:bytes) -> Frame:
+    if kind == READINGS:
+        return Frame(kind, tick, stamp, struct.unpack(f'<{len(body) // 8}d', body))
+    if kind == ALERT:
+        severity, length = ALERT_HEAD.unpack_from(body)
+        start = ALERT_HEAD.size
+        source = body[start:start + length].decode()
+        message = body[start + length:].decode()
+        return Frame(kind, tick, stamp, Alert(Severity(severity), source, stamp, message))
+    return Frame(kind, tick, stamp, tuple(json.loads(body)))
+
+
+class SubscriberStats(NamedTuple):
+    peer: str
+    sent: int
+    dropped: int
+
+
+class _Subscriber:
+    """the queue and writer task of one connection"""
+
+    def __init__(self, writer:asyncio.StreamWriter, maxlen:int) -> None:
+        self.writer = writer
+        self.queue = deque(maxlen=maxlen)
+        self.ready = asyncio.Event()
+        self.peer = str(writer.get_extra_info('peername') or writer.get_extra_info('sockname'))
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, frame:bytes) -> None:
+        queue = self.queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(frame)
+
+    async def run(self) -> None:
+        writer = self.writer
+        popleft = self.queue.popleft
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                writer.write(popleft())
+                self.sent += 1
+                # only this subscriber waits on its socket, the tick keeps
+                # filling its queue and the oldest frames fall off
+                await writer.drain()
+
+
+class Publisher:
+    """Serves telemetry at address, a (host, port) tuple for TCP or a
+    path for a Unix socket.  readings() and alerts() are called from the
+    simulation and never block, the sockets are written on an event loop
+    in a background thread"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, columns:tuple=None, queue_size:int=QUEUE_SIZE) -> None:
+        if columns is None:
+            from cockpit import DASH_NAMES
+            columns = DASH_NAMES
+        self.address = address
+        self.hello = encode(HELLO, 0, json.dumps(columns).encode())
+        self.queue_size = queue_size
+        self.subscribers = () # replaced rather than changed, so the tick can iterate it
+        self.published = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._pending = False
+        self._serving = set()
+        self._error = None # why the server could not bind, raised by start()
+
+    def start(self) -> None:
+        """serves on a background thread, raises whatever stopped the
+        server binding its address, an address in use say"""
+        self._ready.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),),
+                                        name='telemetry', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        error, self._error = self._error, None
+        if error is not None:
+            self._thread.join()
+            self._thread = None
+            raise error
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join()
+            self._thread = None
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                # a socket file left behind would stop the next start
+                os.unlink(self.address)
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        try:
+            if isinstance(self.address, str):
+                self._server = await asyncio.start_unix_server(self._serve, self.address)
+            else:
+                self._server = await asyncio.start_server(self._serve, *self.address)
+                self.address = self._server.sockets[0].getsockname()[:2]
+        except Exception as exc:
+            self._error = exc
+            return
+        finally:
+            self._ready.set()
+        await self._stop.wait()
+        self._server.close()
+        # dropping the connections ends every _serve, even one stuck on
+        # a subscriber that stopped reading
+        for sub in self.subscribers:
+            sub.writer.transport.abort()
+        await asyncio.gather(*self._serving, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _serve(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        writer.transport.set_write_buffer_limits(WRITE_BUFFER)
+        sub = _Subscriber(writer, self.queue_size)
+        sub.put(self.hello)
+        sub.ready.set()
+        self.subscribers += (sub,)
+        self._serving.add(asyncio.current_task())
+        # subscribers never send anything, end of file means they left
+        tasks = [asyncio.create_task(sub.run()), asyncio.create_task(reader.read())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.subscribers = tuple(s for s in self.subscribers if s is not sub)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+            self._serving.discard(asyncio.current_task())
+
+    def _wake(self) -> None:
+        self._pending = False
+        for sub in self.subscribers:
+            sub.ready.set()
+
+    def send(self, frame:bytes) -> None:
+        """queues one encoded frame for every subscriber"""
+        subscribers = self.subscribers
+        if not subscribers:
+            return
+        for sub in subscribers:
+            sub.put(frame)
+        self.published += 1
+        # one wake up per loop pass however many frames are published
+        if not self._pending:
+            self._pending = True
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def readings(self, tick:int, readings:tuple) -> None:
+        if self.subscribers:
+            self.send(encode_readings(tick, readings))
+
+    def alerts(self, tick:int, alerts:list) -> None:
+        for alert in alerts:
+            self.send(encode_alert(tick, alert))
+
+    def stats(self) -> list:
+        return [SubscriberStats(sub.peer, sub.sent, sub.dropped) for sub in self.subscribers]
+
+
+class Subscriber:
+    """Reference client, iterating it yields the decoded frames until the
+    publisher goes away.  columns is filled in from the HELLO frame"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout:float=None) -> None:
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.file = self.sock.makefile('rb')
+        self.columns = None
+
+    def read(self) -> Frame:
+        """the next frame, None once the publisher has closed"""
+        head = self.file.read(HEADER.size)
+        if len(head) < HEADER.size:
+            return None
+        length, kind, tick, stamp = HEADER.unpack(head)
+        frame = decode(kind, tick, stamp, self.file.read(length))
+        if kind == HELLO:
+            self.columns = frame.data
+        return frame
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+
+def parse_address(text:str):
+    """host:port or :port for TCP, anything else is a Unix socket path"""
+    host, colon, port = text.rpartition(':')
+    if colon and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return text
+
+
+if __name__ == '__main__':
+    address = parse_address(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ADDRESS
+    sub = Subscriber(address)
+    try:
+        for frame in sub:
+            if frame.kind == READINGS:
+                print(frame.tick, ' '.join(f'{name}={value:.1f}' for name, value in zip(sub.columns, frame.data)))
+            elif frame.kind == ALERT:
+                alert = frame.data
+                print(frame.tick, alert.severity.name, alert.source, alert.message)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sub.close()
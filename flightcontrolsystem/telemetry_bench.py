@@ -0,0 +1,76 @@
+""" Benchmark for the telemetry publisher.
+Publishes a burst of reading frames from the tick thread to a growing
+number of subscribers reading on their own threads and prints how long
+a publish held up the tick, frames per second delivered and how many
+frames the subscribers dropped.  One more run adds a stalled subscriber
+that never reads, the tick latency should not change
+
+    python telemetry_bench.py [frames]
+"""
+import statistics
+import sys
+import threading
+import time
+import telemetry
+from cockpit import DASH_NAMES
+from instrument import Histogram
+
+FRAMES = 20000
+SUBSCRIBERS = (0, 1, 4, 16, 64)
+READINGS = tuple(float(i) for i in range(len(DASH_NAMES)))
+
+
+def consume(sub:telemetry.Subscriber, counts:list, index:int) -> None:
+    for frame in sub:
+        if frame.kind == telemetry.READINGS:
+            counts[index] += 1
+
+
+def bench(subscribers:int, frames:int, stalled:bool=False) -> dict:
+    pub = telemetry.Publisher(('127.0.0.1', 0))
+    pub.start()
+    subs = [telemetry.Subscriber(pub.address) for _ in range(subscribers)]
+    counts = [0] * subscribers
+    readers = [threading.Thread(target=consume, args=(sub, counts, i), daemon=True)
+               for i, sub in enumerate(subs)]
+    for reader in readers:
+        reader.start()
+    if stalled:
+        subs.append(telemetry.Subscriber(pub.address))
+    while len(pub.subscribers) < len(subs):
+        time.sleep(0.001)
+
+    hist = Histogram()
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for tick in range(frames):
+        begin = clock()
+        pub.readings(tick, READINGS)
+        hist.add(clock() - begin)
+    # the readers are done once their counts stop moving
+    last, finished = None, time.perf_counter()
+    while counts != last:
+        last = list(counts)
+        time.sleep(0.05)
+        if counts != last:
+            finished = time.perf_counter()
+    elapsed = finished - start
+    dropped = sum(stats.dropped for stats in pub.stats())
+    pub.stop()
+    for sub in subs:
+        sub.close()
+    return {'publish_p50_us': hist.percentile(50) / 1000,
+            'publish_p99_us': hist.percentile(99) / 1000,
+            'delivered_fps': statistics.mean(counts) / elapsed if counts else 0.0,
+            'dropped': dropped}
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    print(f'{"subscribers":>12}{"p50 us":>10}{"p99 us":>10}{"frames/s":>12}{"dropped":>10}')
+    runs = [(count, False) for count in SUBSCRIBERS] + [(SUBSCRIBERS[-2], True)]
+    for count, stalled in runs:
+        result = bench(count, frames, stalled)
+        label = f'{count}+stalled' if stalled else str(count)
+        print(f'{label:>12}{result["publish_p50_us"]:>10.1f}{result["publish_p99_us"]:>10.1f}'
+              f'{result["delivered_fps"]:>12.0f}{result["dropped"]:>10}')
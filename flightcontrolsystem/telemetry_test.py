@@ -0,0 +1,79 @@
+import os
+import tempfile
+import time
+import unittest
+from flightcontrolsystem import telemetry
+from flightcontrolsystem.alerts import AlertBus, Severity
+
+columns_t = ('tach1', 'airspeed')
+
+
+def wait_for_subscribers(pub, count):
+    deadline = time.monotonic() + 2
+    while len(pub.subscribers) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class TestPublisher(unittest.TestCase):
+    ''' Tests streaming frames to subscribers'''
+
+    def stream(self, address):
+        pub = telemetry.Publisher(address, columns_t)
+        pub.start()
+        subs = [telemetry.Subscriber(pub.address, timeout=2) for _ in range(3)]
+        wait_for_subscribers(pub, 3)
+        alert = AlertBus().publish(Severity.WARNING, 'airspeed', 'Overspeed')
+        pub.readings(1, (2.5, 310.0))
+        pub.alerts(1, [alert])
+        for sub in subs:
+            hello, readings, warning = sub.read(), sub.read(), sub.read()
+            self.assertEqual((hello.kind, sub.columns), (telemetry.HELLO, columns_t))
+            self.assertEqual((readings.kind, readings.tick, readings.data), (telemetry.READINGS, 1, (2.5, 310.0)))
+            self.assertEqual(warning.data, alert)
+            sub.close()
+        pub.stop()
+
+    def test_tcp(self):
+        self.stream(('127.0.0.1', 0))
+
+    def test_unix(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'telemetry.sock')
+            self.stream(path)
+            self.assertFalse(os.path.exists(path))
+            # the same path again, as a second flight would
+            self.stream(path)
+
+    def test_address_in_use(self):
+        pub = telemetry.Publisher(('127.0.0.1', 0), columns_t)
+        pub.start()
+        other = telemetry.Publisher(pub.address, columns_t)
+        with self.assertRaises(OSError):
+            other.start()
+        pub.stop()
+
+    def test_slow_subscriber_drops_oldest(self):
+        pub = telemetry.Publisher(('127.0.0.1', 0), columns_t, queue_size=8)
+        pub.start()
+        stalled = telemetry.Subscriber(pub.address, timeout=2) # never reads
+        wait_for_subscribers(pub, 1)
+        readings = tuple(range(100))
+        worst = 0.0
+        for tick in range(20000):
+            start = time.perf_counter()
+            pub.readings(tick, readings)
+            worst = max(worst, time.perf_counter() - start)
+        self.assertLess(worst, 0.05)
+        time.sleep(0.05)
+        stats = pub.stats()[0]
+        self.assertGreater(stats.dropped, 0)
+        self.assertLessEqual(stats.dropped + stats.sent, 20001)
+        # the subscriber is behind but still reads whole frames
+        self.assertEqual(stalled.read().kind, telemetry.HELLO)
+        self.assertEqual(stalled.read().data, readings)
+        stalled.close()
+        pub.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,391 @@
+""" Validation of the sensor readings.
+A Validator sits between read_sensor and Display.update.  Each dash pair
+has rules, checked on every reading in O(1) with no history kept beyond
+a few counters:
+    Range       the reading is outside low to high
+    Rate        the reading moved faster than limit units a second
+    Stuck       the reading repeated for samples readings after an input moved
+    CrossCheck  two readings disagreed for persist readings while their
+                inputs had been equal for settle readings
+A broken rule never stops the tick.  It is reported once when it breaks,
+as a SensorException on validator.faults and an alert for the flight
+computer, and the pair is shown its last good reading while a Range or
+Rate rule is broken.  validate() runs the same rules over the columns of
+a recorded flight in bulk with NumPy and finds the same faults
+
+    python validation.py flight.rec     lists the faults in a recording
+"""
+import copy
+import sys
+from collections import deque
+from Sensorexception import SensorException
+from alerts import AlertBus, Severity
+from simulations import UPDATE_PERIOD
+from cockpit import THROTTLES
+
+FAULTS_KEPT = 256 #oldest faults are dropped past this
+
+
+class Rule:
+    """Base class, check() is True while the rule is broken.  bulk() does
+    the same for whole columns, table maps each column name to its NumPy
+    array and dt is the dt column"""
+    name = 'rule'
+    hold = False # the pair keeps showing its last good reading while broken
+    broken = False # set by the Validator
+    reads = () # names of the other pairs the rule compares with
+    needs = 0 # their fresh bits, the rule only runs when they were all read, set by the Validator
+
+    def bind(self, names:tuple) -> bool:
+        """looks up any other pair the rule reads, False when it is not there"""
+        return True
+
+    def check(self, value:float, readings:tuple, values:dict, dt:float) -> bool:
+        return False
+
+    def message(self, value:float) -> str:
+        return f'failed {self.name} at {value:.1f}'
+
+    def bulk(self, column, table:dict, dt):
+        import numpy as np
+        return np.zeros(len(column), bool)
+
+    def get_state(self) -> dict:
+        """a copy of everything the rule keeps between readings"""
+        return copy.deepcopy(vars(self))
+
+    def set_state(self, state:dict) -> None:
+        vars(self).clear()
+        vars(self).update(copy.deepcopy(state))
+
+
+def _runs(mask):
+    """for each element the number of True elements in a row ending there"""
+    import numpy as np
+    index = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, index))
+    return index - last_false
+
+
+class Range(Rule):
+    name = 'range'
+    hold = True
+
+    def __init__(self, low:float, high:float) -> None:
+        self.low = low
+        self.high = high
+
+    def check(self, value:float, readings:tuple, values:dict, dt:float) -> bool:
+        return not self.low <= value <= self.high
+
+    def message(self, value:float) -> str:
+        return f'reading {value:.1f} outside {self.low} to {self.high}'
+
+    def bulk(self, column, table:dict, dt):
+        return ~((column >= self.low) & (column <= self.high))
+
+
+class Rate(Rule):
+    name = 'rate'
+    hold = True
+
+    def __init__(self, limit:float) -> None:
+        self.limit = limit # units a second
+        self.last = None
+
+    def check(self, value:float, readings:tuple, values:dict, dt:float) -> bool:
+        last = self.last
+        self.last = value
+        return last is not None and dt > 0 and abs(value - last) * 1000 / dt > self.limit
+
+    def message(self, value:float) -> str:
+        return f'reading jumped to {value:.1f}, faster than {self.limit} a second'
+
+    def bulk(self, column, table:dict, dt):
+        import numpy as np
+        broken = np.zeros(len(column), bool)
+        step = dt[1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            broken[1:] = (step > 0) & (np.abs(np.diff(column)) * 1000 / step > self.limit)
+        return broken
+
+
+class Stuck(Rule):
+    """the same reading samples times in a row.  With inputs the count
+    only starts once one of them has moved more than moved from where it
+    was when the reading last changed, so a steady instrument at a steady
+    throttle is fine and a lagging one gets samples readings to respond"""
+    name = 'stuck'
+
+    def __init__(self, samples:int, inputs:tuple=(), moved:float=1.0) -> None:
+        self.samples = samples
+        self.inputs = inputs
+        self.moved = moved
+        self.last = None
+        self.run = 0 # readings since the reading last changed
+        self.start = () # the inputs when the reading last changed
+        self.moved_at = None # the run when an input first moved
+
+    def check(self, value:float, readings:tuple, values:dict, dt:float) -> bool:
+        if value != self.last:
+            self.last = value
+            self.run = 1
+            self.start = [values[key] for key in self.inputs]
+            self.moved_at = None
+            return False
+        self.run += 1
+        if not self.inputs:
+            return self.run >= self.samples
+        if self.moved_at is None:
+            moved = self.moved
+            if any(abs(values[key] - start) > moved for key, start in zip(self.inputs, self.start)):
+                self.moved_at = self.run
+            return False
+        return self.run - self.moved_at >= self.samples
+
+    def message(self, value:float) -> str:
+        return f'reading stuck at {value:.1f}'
+
+    def bulk(self, column, table:dict, dt):
+        import numpy as np
+        same = np.zeros(len(column), bool)
+        same[1:] = column[1:] == column[:-1]
+        run = _runs(same) + 1
+        if not self.inputs:
+            return run >= self.samples
+        index = np.arange(len(column))
+        start = index - run + 1
+        moved = np.zeros(len(column), bool)
+        for key in self.inputs:
+            moved |= np.abs(table[key] - table[key][start]) > self.moved
+        # the first move at or after each index, so first[start] is the
+        # first move of the run
+        first = np.minimum.accumulate(np.where(moved, index, len(column))[::-1])[::-1]
+        return index - first[start] >= self.samples
+
+
+class CrossCheck(Rule):
+    """the reading and the other pair's differ by more than tolerance for
+    persist readings in a row, once the inputs driving the two have been
+    the same for settle readings"""
+    name = 'cross'
+
+    def __init__(self, other:str, tolerance:float, persist:int, inputs:tuple, settle:int) -> None:
+        self.other = other
+        self.tolerance = tolerance
+        self.persist = persist
+        self.inputs = inputs
+        self.settle = settle
+        self.index = None
+        self.settled = 0
+        self.apart = 0
+
+    @property
+    def reads(self) -> tuple:
+        return (self.other,)
+
+    def bind(self, names:tuple) -> bool:
+        if self.other not in names:
+            return False
+        self.index = names.index(self.other)
+        return True
+
+    def check(self, value:float, readings:tuple, values:dict, dt:float) -> bool:
+        first, second = self.inputs
+        self.settled = self.settled + 1 if values[first] == values[second] else 0
+        self.apart = self.apart + 1 if abs(value - readings[self.index]) > self.tolerance else 0
+        return self.settled >= self.settle and self.apart >= self.persist
+
+    def message(self, value:float) -> str:
+        return f'reading {value:.1f} disagrees with {self.other}'
+
+    def bulk(self, column, table:dict, dt):
+        import numpy as np
+        first, second = self.inputs
+        settled = _runs(table[first] == table[second])
+        apart = _runs(np.abs(column - table[self.other]) > self.tolerance)
+        return (settled >= self.settle) & (apart >= self.persist)
+
+
+def default_rules() -> dict:
+    """fresh rules for the built-in dash, keyed by dash name"""
+    return {'tach1': (Range(0, 100), Rate(300), Stuck(25, ('-THR1-',), 5),
+                      CrossCheck('tach2', 2.0, 5, ('-THR1-', '-THR2-'), 10)),
+            'tach2': (Range(0, 100), Rate(300), Stuck(25, ('-THR2-',), 5)),
+            'engTemp1': (Range(0, 100), Rate(50), Stuck(100, ('-THR1-',), 5),
+                         CrossCheck('engTemp2', 2.0, 5, ('-THR1-', '-THR2-'), 60)),
+            'engTemp2': (Range(0, 100), Rate(50), Stuck(100, ('-THR2-',), 5)),
+            'fuelL': (Range(0, 100),),
+            'fuelC': (Range(0, 100),),
+            'fuelR': (Range(0, 100),),
+            'compass': (Range(0, 360), Stuck(150)),
+            'airspeed': (Range(0, 550), Rate(200))}
+
+
+class Validator:
+    """Checks every tick's readings against rules, a dict of dash name to
+    its rules.  Rules for a pair the dash does not have, or that read one,
+    are left out.  check() returns the readings to show"""
+
+    def __init__(self, rules:dict, names:tuple, alerts:AlertBus=None, maxlen:int=FAULTS_KEPT) -> None:
+        self.names = names
+        self.alerts = alerts
+        self.faults = deque(maxlen=maxlen) # SensorException for every rule that broke
+        self.channels = []
+        for name, checks in rules.items():
+            if name in names:
+                checks = [rule for rule in checks if rule.bind(names)]
+                for rule in checks:
+                    rule.needs = sum(1 << names.index(other) for other in rule.reads)
+                self.channels.append((names.index(name), name, checks))
+        self.good = [None] * len(names) # the last reading that broke no holding rule
+        self.held = [False] * len(names) # the pairs showing their good reading
+        self.broken = 0 # rules broken right now
+
+    def check(self, readings:tuple, values:dict, dt:float=None, tick:int=None, fresh:int=None,
+              elapsed:list=None) -> tuple:
+        """fresh has a bit set for each pair read this tick and elapsed
+        the miliseconds each of them covered, see Cockpit.set_rates.  The
+        rules only see the readings of the pairs that were read"""
+        dt = UPDATE_PERIOD if dt is None else dt
+        shown = None
+        held = self.held
+        for index, name, rules in self.channels:
+            if fresh is not None and not fresh >> index & 1:
+                if held[index]:
+                    if shown is None:
+                        shown = list(readings)
+                    shown[index] = self.good[index]
+                continue
+            if elapsed is not None:
+                dt = elapsed[index]
+            value = readings[index]
+            hold = False
+            for rule in rules:
+                if fresh is not None and rule.needs & ~fresh:
+                    # a pair it compares with was not read this tick, the
+                    # rule waits for a tick both were
+                    hold = hold or rule.broken and rule.hold
+                    continue
+                if rule.check(value, readings, values, dt):
+                    if not rule.broken:
+                        rule.broken = True
+                        self._fault(name, rule, value, tick)
+                    if rule.hold:
+                        hold = True
+                elif rule.broken:
+                    rule.broken = False
+                    self._cleared(name, rule)
+            if not hold:
+                self.good[index] = value
+            held[index] = hold and self.good[index] is not None
+            if held[index]:
+                if shown is None:
+                    shown = list(readings)
+                shown[index] = self.good[index]
+        return readings if shown is None else tuple(shown)
+
+    def _fault(self, name:str, rule:Rule, value:float, tick:int) -> None:
+        message = f'{name} {rule.message(value)}'
+        self.faults.append(SensorException(message, name, rule.name, value, tick))
+        self.broken += 1
+        if self.alerts is not None:
+            self.alerts.publish(Severity.WARNING, name, message)
+
+    def _cleared(self, name:str, rule:Rule) -> None:
+        self.broken -= 1
+        if self.alerts is not None:
+            self.alerts.publish(Severity.INFO, name, f'{name} {rule.name} check ok')
+
+    def together(self) -> list:
+        """(name, other) for every rule comparing two pairs, they want to
+        be read on the same ticks, see Cockpit.set_rates"""
+        return [(name, other) for _, name, rules in self.channels for rule in rules for other in rule.reads]
+
+    def get_state(self) -> tuple:
+        """what the next check() depends on, the faults are left out"""
+        return (list(self.good), list(self.held), self.broken,
+                [[rule.get_state() for rule in rules] for _, _, rules in self.channels])
+
+    def set_state(self, state:tuple) -> None:
+        good, held, self.broken, rules = state
+        self.good, self.held = list(good), list(held)
+        for (_, _, checks), states in zip(self.channels, rules):
+            for rule, rule_state in zip(checks, states):
+                rule.set_state(rule_state)
+
+    def drain(self) -> list:
+        """removes and returns the faults so far, oldest first"""
+        faults = list(self.faults)
+        self.faults.clear()
+        return faults
+
+
+def validate(array, columns:tuple, rules:dict=None) -> list:
+    """the faults in a recorded flight, array has a row per tick and the
+    named columns, see recorder.Recording.array().  The rules are fresh
+    ones from default_rules() unless given, as in Validator every rule
+    reports once when it breaks.  The readings shown are not held.  With
+    a fresh column each pair is only checked on the ticks it was read,
+    over the time since its last read, like Cockpit.set_rates does"""
+    import numpy as np
+    rules = default_rules() if rules is None else rules
+    table = {name: array[:, i] for i, name in enumerate(columns)}
+    dt = table['dt'] if 'dt' in table else np.full(len(array), float(UPDATE_PERIOD))
+    ticks = table['tick'] if 'tick' in table else np.arange(1, len(array) + 1)
+    # the readings follow the throttles, in the order of the fresh bits
+    names = columns[columns.index(THROTTLES[-1]) + 1:] if THROTTLES[-1] in columns else columns
+    fresh = table['fresh'].astype(np.int64) if 'fresh' in table else None
+    clock = np.cumsum(dt)
+    faults = []
+    for name, checks in rules.items():
+        if name not in table:
+            continue
+        for rule in checks:
+            if not rule.bind(columns):
+                continue
+            # the rows the rule is checked on, the pair and every pair it
+            # compares with read on the same tick
+            rows = None
+            if fresh is not None and name in names:
+                read = fresh >> names.index(name) & 1
+                for other in rule.reads:
+                    if other in names:
+                        read = read & (fresh >> names.index(other) & 1)
+                rows = np.flatnonzero(read)
+                if len(rows) == len(array):
+                    rows = None
+            if rows is None:
+                pair, pair_dt, pair_ticks = table, dt, ticks
+            else:
+                pair = {key: column[rows] for key, column in table.items()}
+                pair_dt = np.diff(clock[rows], prepend=0.0)
+                pair_ticks = ticks[rows]
+            column = pair[name]
+            broken = rule.bulk(column, pair, pair_dt)
+            starts = np.flatnonzero(broken & ~np.concatenate(([False], broken[:-1])))
+            for row in starts:
+                value = float(column[row])
+                faults.append(SensorException(f'{name} {rule.message(value)}', name, rule.name, value,
+                                              int(pair_ticks[row])))
+    faults.sort(key=lambda fault: fault.tick)
+    return faults
+
+
+def validate_recording(path:str, rules:dict=None) -> list:
+    from recorder import Recording
+    recording = Recording(path)
+    try:
+        return validate(recording.array(), recording.columns, rules)
+    finally:
+        recording.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    faults = validate_recording(sys.argv[1])
+    for fault in faults:
+        print(f'{fault.tick:>8} {fault.rule:<6} {fault}')
+    print(f'{len(faults)} faults')
@@ -0,0 +1,183 @@
+import random
+import unittest
+import numpy as np
+from flightcontrolsystem import cockpit, validation
+
+simulations = cockpit.simulations
+names_t = cockpit.DASH_NAMES
+
+
+class Glitchy(simulations.Simulator):
+    """passes another simulator through, now and then spiking or freezing"""
+
+    def __init__(self, sim, seed):
+        super().__init__(sim.devID, 0)
+        self.sim = sim
+        self.rng = random.Random(seed)
+        self.frozen = 0
+
+    def get_data(self, values, dt=None):
+        value = self.sim.get_data(values, dt)
+        if self.frozen:
+            self.frozen -= 1
+            return self.value
+        roll = self.rng.random()
+        if roll < 0.002:
+            return value + 500
+        if roll < 0.004:
+            self.frozen = 60
+        self.value = value
+        return value
+
+
+def glitchy_cockpit(seed=1):
+    simulations.reset()
+    pit = cockpit.headless()
+    for index in (0, 2, 8):
+        sen = pit.dash[index][0]
+        sen.sim = Glitchy(sen.sim, seed + index)
+    return pit
+
+
+def fly_t(pit, ticks, seed=2):
+    """(tick, dt, thr1, thr2, readings) rows of a flight with moving throttles"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(ticks):
+        commands = []
+        if rng.random() < 0.02:
+            throttle = rng.choice((0, 30, 60, 100))
+            commands = [('-THR1-', throttle), ('-THR2-', throttle if rng.random() < 0.7 else 10)]
+        readings = pit.step(commands, rng.uniform(150, 250))
+        rows.append((pit.ticks, pit.dt, pit.values['-THR1-'], pit.values['-THR2-'], *readings))
+    return rows
+
+
+class TestRules(unittest.TestCase):
+    ''' Tests each rule on its own'''
+
+    def test_range_holds_last_good(self):
+        bus = validation.AlertBus()
+        check = validation.Validator({'a': (validation.Range(0, 10),)}, ('a',), bus)
+        values = {}
+        self.assertEqual(check.check((5.0,), values), (5.0,))
+        self.assertEqual(check.check((50.0,), values), (5.0,))
+        self.assertEqual(check.check((60.0,), values), (5.0,))
+        self.assertEqual(check.check((7.0,), values), (7.0,))
+        faults = check.drain()
+        self.assertEqual(len(faults), 1)
+        self.assertIsInstance(faults[0], validation.SensorException)
+        self.assertEqual((faults[0].source, faults[0].rule, faults[0].value), ('a', 'range', 50.0))
+        alerts = bus.drain()
+        self.assertEqual([alert.severity for alert in alerts], [validation.Severity.WARNING, validation.Severity.INFO])
+
+    def test_rate(self):
+        check = validation.Validator({'a': (validation.Rate(10),)}, ('a',))
+        for value in (0.0, 1.0, 2.0, 9.0, 10.0):
+            check.check((value,), {}, 200)
+        self.assertEqual([fault.value for fault in check.drain()], [9.0])
+
+    def test_stuck_waits_for_the_input(self):
+        check = validation.Validator({'a': (validation.Stuck(5, ('-THR1-',), 1),)}, ('a',))
+        values = {'-THR1-': 10}
+        for _ in range(20):
+            check.check((3.0,), values)
+        self.assertEqual(check.drain(), [])
+        values['-THR1-'] = 80
+        for _ in range(5):
+            check.check((3.0,), values)
+        self.assertEqual(check.drain(), [])
+        check.check((3.0,), values)
+        self.assertEqual(len(check.drain()), 1)
+
+    def test_cross_check(self):
+        rules = {'a': (validation.CrossCheck('b', 1.0, 3, ('-THR1-', '-THR2-'), 4),)}
+        check = validation.Validator(rules, ('a', 'b'))
+        values = {'-THR1-': 50, '-THR2-': 20}
+        for _ in range(10):
+            check.check((10.0, 20.0), values)
+        self.assertEqual(check.drain(), [])
+        values['-THR2-'] = 50
+        for tick in range(1, 5):
+            check.check((10.0, 20.0), values, tick=tick)
+        self.assertEqual([fault.tick for fault in check.drain()], [4])
+
+    def test_cross_check_waits_for_both(self):
+        rules = {'a': (validation.CrossCheck('b', 1.0, 3, ('-THR1-', '-THR2-'), 1),)}
+        check = validation.Validator(rules, ('a', 'b'))
+        values = {'-THR1-': 50, '-THR2-': 50}
+        for tick in range(1, 10):
+            # b held over from an older tick is not compared with
+            check.check((10.0, 20.0), values, tick=tick, fresh=0b01)
+        self.assertEqual(check.drain(), [])
+        for tick in range(10, 13):
+            check.check((10.0, 20.0), values, tick=tick, fresh=0b11)
+        self.assertEqual([fault.tick for fault in check.drain()], [12])
+
+    def test_missing_pairs_are_left_out(self):
+        rules = validation.default_rules()
+        check = validation.Validator(rules, ('tach1', 'compass'))
+        self.assertEqual([name for _, name, _ in check.channels], ['tach1', 'compass'])
+        self.assertNotIn('cross', [rule.name for rule in check.channels[0][2]])
+
+
+class TestCockpitValidation(unittest.TestCase):
+    ''' Tests the validator on the simulated dash'''
+
+    def test_clean_flight_has_no_faults(self):
+        simulations.reset()
+        pit = cockpit.headless()
+        pit.validator = validation.Validator(validation.default_rules(), pit.names, pit.alerts)
+        fly_t(pit, 3000)
+        self.assertEqual(pit.validator.drain(), [])
+
+    def test_clean_flight_with_rates(self):
+        pit = cockpit.headless(sims=simulations.build())
+        pit.validator = validation.Validator(validation.default_rules(), pit.names, pit.alerts)
+        schedule = pit.set_rates(cockpit.RATES, 20)
+        engines = [pit.names.index(name) for name in ('engTemp1', 'engTemp2')]
+        self.assertEqual(len({schedule.phases[i] for i in engines}), 1)
+        fly_t(pit, 6000)
+        self.assertEqual(pit.validator.drain(), [])
+
+    def test_glitches_are_found_and_held(self):
+        pit = glitchy_cockpit()
+        pit.validator = validation.Validator(validation.default_rules(), pit.names, pit.alerts)
+        rows = fly_t(pit, 3000)
+        faults = pit.validator.drain()
+        self.assertTrue({'range', 'rate'} <= {fault.rule for fault in faults})
+        for row in rows:
+            self.assertLessEqual(row[4], 100)
+            self.assertLessEqual(row[12], 550)
+
+    def test_bulk_matches_streaming(self):
+        rows = fly_t(glitchy_cockpit(3), 4000, seed=5)
+        columns = ('tick', 'dt', '-THR1-', '-THR2-') + names_t
+        streaming = validation.Validator(validation.default_rules(), names_t, maxlen=None)
+        for tick, dt, thr1, thr2, *readings in rows:
+            streaming.check(tuple(readings), {'-THR1-': thr1, '-THR2-': thr2}, dt, tick)
+        expected = sorted((f.tick, f.source, f.rule, f.value) for f in streaming.drain())
+        found = validation.validate(np.array(rows), columns)
+        self.assertEqual(sorted((f.tick, f.source, f.rule, f.value) for f in found), expected)
+        self.assertTrue({'range', 'rate', 'stuck', 'cross'} <= {rule for _, _, rule, _ in expected})
+
+    def test_bulk_matches_streaming_with_rates(self):
+        pit = glitchy_cockpit(4)
+        pit.set_rates(cockpit.RATES, 200)
+        validator = pit.validator = validation.Validator(validation.default_rules(), pit.names, maxlen=None)
+        raw = [] # what the validator was given, before anything was held
+        check = validator.check
+        def keep(readings, values, dt, tick, fresh, elapsed):
+            raw.append(readings + (fresh,))
+            return check(readings, values, dt, tick, fresh, elapsed)
+        validator.check = keep
+        rows = [row[:4] + given for row, given in zip(fly_t(pit, 4000, seed=6), raw)]
+        expected = sorted((f.tick, f.source, f.rule, f.value) for f in pit.validator.drain())
+        columns = ('tick', 'dt') + cockpit.THROTTLES + names_t + ('fresh',)
+        found = validation.validate(np.array(rows), columns)
+        self.assertEqual(sorted((f.tick, f.source, f.rule, f.value) for f in found), expected)
+        self.assertTrue(expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
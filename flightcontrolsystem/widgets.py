@@ -0,0 +1,89 @@
+""" Update layer between the displays and the GUI elements.
+Each element gets a WidgetChannel that quantizes the value to what the
+element can actually show.  Changed values wait in the UpdateBatch and
+are sent to the elements together by flush(), once per frame, so an
+update that would not change the screen never reaches Tk """
+from typing import Callable, NamedTuple
+
+
+def bar_quantizer(max_value:int=100) -> Callable:
+    """a progress bar shows whole steps between 0 and max_value"""
+    def quantize(value:float) -> int:
+        return int(round(min(max(value, 0), max_value)))
+    return quantize
+
+
+def text_quantizer(value) -> str:
+    """a text element shows the string, numbers as whole units"""
+    if isinstance(value, float):
+        value = int(value)
+    return str(value)
+
+
+class UpdateStats(NamedTuple):
+    """requested is every call made by the displays, issued is how many
+    of them reached an element"""
+    requested: int
+    issued: int
+    flushes: int
+
+    @property
+    def saved(self) -> int:
+        return self.requested - self.issued
+
+
+class WidgetChannel:
+    """Callable that stands in for an element's update method"""
+    __slots__ = ('batch', 'update', 'quantize', 'shown', 'value')
+
+    def __init__(self, batch:'UpdateBatch', update:Callable, quantize:Callable=None) -> None:
+        self.batch = batch
+        self.update = update
+        self.quantize = quantize
+        self.shown = None # what the element is showing now
+        self.value = None # what it will show after the next flush
+
+    def __call__(self, value) -> None:
+        batch = self.batch
+        batch.requested += 1
+        if self.quantize is not None:
+            value = self.quantize(value)
+        self.value = value
+        if value != self.shown:
+            batch.pending[self] = None
+        else:
+            batch.pending.pop(self, None)
+
+    def issue(self) -> None:
+        self.update(self.value)
+        self.shown = self.value
+
+
+class UpdateBatch:
+    """Owns the channels for one window and flushes them once per frame"""
+
+    def __init__(self) -> None:
+        self.pending = {} # channels with a change waiting, kept in order
+        self.requested = 0
+        self.issued = 0
+        self.flushes = 0
+
+    def channel(self, update:Callable, quantize:Callable=None) -> WidgetChannel:
+        """wraps an element's update method"""
+        return WidgetChannel(self, update, quantize)
+
+    def flush(self) -> int:
+        """sends every changed value to its element and returns how many
+        elements were updated"""
+        pending = self.pending
+        if not pending:
+            return 0
+        self.pending = {}
+        for channel in pending:
+            channel.issue()
+        self.issued += len(pending)
+        self.flushes += 1
+        return len(pending)
+
+    def stats(self) -> UpdateStats:
+        return UpdateStats(self.requested, self.issued, self.flushes)
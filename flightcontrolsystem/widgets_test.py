@@ -0,0 +1,47 @@
+import unittest
+from flightcontrolsystem import widgets
+from flightcontrolsystem import displays
+
+
+class TestUpdateBatch(unittest.TestCase):
+    ''' Tests the dirty checked widget updates'''
+
+    def setUp(self):
+        self.issued = []
+        self.batch = widgets.UpdateBatch()
+        self.bar = self.batch.channel(self.issued.append, widgets.bar_quantizer(100))
+
+    def test_skips_unchanged(self):
+        for value in (40.2, 40.4, 39.6, 40.0):
+            self.bar(value)
+            self.batch.flush()
+        self.assertEqual(self.issued, [40])
+        self.assertEqual(self.batch.stats(), widgets.UpdateStats(4, 1, 1))
+        self.assertEqual(self.batch.stats().saved, 3)
+
+    def test_coalesces_per_frame(self):
+        self.bar(10)
+        self.bar(55)
+        self.bar(70.7)
+        self.assertEqual(self.issued, [])
+        self.assertEqual(self.batch.flush(), 1)
+        self.assertEqual(self.issued, [71])
+
+    def test_change_and_back_is_dropped(self):
+        self.bar(20)
+        self.batch.flush()
+        self.bar(30)
+        self.bar(20)
+        self.assertEqual(self.batch.flush(), 0)
+        self.assertEqual(self.issued, [20])
+
+    def test_compass_cardinal(self):
+        heading = []
+        cardinal = []
+        disp = displays.CompassDisp(self.batch.channel(heading.append, widgets.text_quantizer),
+                                    self.batch.channel(cardinal.append))
+        for value in (5, 6, 7, 350, 23, 24):
+            disp.update(value)
+            self.batch.flush()
+        self.assertEqual(heading, ['5', '6', '7', '350', '23', '24'])
+        self.assertEqual(cardinal, ['N', 'NE'])